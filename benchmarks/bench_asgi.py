@@ -0,0 +1,166 @@
+"""
+Нагрузочный тест: пропускная способность списка постов под WSGI
+и под ASGI при большом числе одновременных клиентов.
+
+Серверы не запускаются, обработчики Django вызываются в процессе:
+  * WSGI - WSGIHandler, клиенты в потоках, одновременно обрабатывается
+    не больше --threads запросов (как у сервера с пулом потоков);
+  * ASGI, синхронные представления - обычный ASGIHandler, Django
+    выполняет представления через один общий поток;
+  * ASGI, асинхронные представления - yatube_api.asgi.application,
+    запросы к БД идут через пул ASYNC_VIEWS['MAX_WORKERS'] (равный
+    --threads), подсчет и выборка страницы выполняются параллельно.
+
+SQLite отвечает за микросекунды, поэтому сетевая задержка настоящей
+БД имитируется параметром --db-latency (мс на каждый SQL-запрос).
+Клиенты авторизованы, чтобы ответы не брались из кеша.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_asgi.py --concurrency 100 --db-latency 2
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from common import (auth_headers, create_posts, create_users, print_table,
+                    setup_django)
+
+PATH = '/api/v1/posts/'
+QUERY = 'limit=20'
+
+
+def add_latency(latency):
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # Объект соединения потока переживает переподключения
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install, weak=False)
+
+
+def run_wsgi(requests, concurrency, threads, token):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    slots = threading.Semaphore(threads)
+    timings = []
+
+    def request():
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': PATH,
+            'QUERY_STRING': QUERY, 'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80', 'HTTP_HOST': 'testserver',
+            'HTTP_AUTHORIZATION': token, 'wsgi.input': BytesIO(),
+            'wsgi.url_scheme': 'http',
+        }
+        start = time.perf_counter()
+        with slots:
+            response = handler(environ, lambda status, headers: None)
+            b''.join(response)
+            response.close()
+        timings.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(concurrency) as clients:
+        for _ in range(requests):
+            clients.submit(request)
+    return timings
+
+
+def run_asgi(application, requests, concurrency, token):
+    timings = []
+
+    async def request():
+        messages = [{'type': 'http.request', 'body': b''}]
+        body = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Клиент не отключается, пока ответ не отправлен
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                body.append(message.get('body', b''))
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': PATH,
+            'query_string': QUERY.encode(),
+            'headers': [(b'host', b'testserver'),
+                        (b'authorization', token.encode())],
+        }
+        start = time.perf_counter()
+        await application(scope, receive, send)
+        timings.append(time.perf_counter() - start)
+
+    async def client(count):
+        for _ in range(count):
+            await request()
+
+    async def main():
+        share, extra = divmod(requests, concurrency)
+        await asyncio.gather(*(
+            client(share + (number < extra))
+            for number in range(concurrency)
+        ))
+
+    asyncio.run(main())
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--db-latency', type=float, default=2.0)
+    parser.add_argument('--posts', type=int, default=10_000)
+    args = parser.parse_args()
+
+    setup_django(ASYNC_VIEWS={'MAX_WORKERS': args.threads})
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.asgi import ASGIHandler
+
+    from yatube_api.asgi import application
+
+    author_ids = create_users(10)
+    create_posts(author_ids, args.posts)
+    user = get_user_model().objects.get(pk=author_ids[0])
+    token = auth_headers(user)['HTTP_AUTHORIZATION']
+    add_latency(args.db_latency / 1000)
+
+    cases = (
+        ('WSGI', lambda: run_wsgi(
+            args.requests, args.concurrency, args.threads, token)),
+        ('ASGI, синхронные', lambda: run_asgi(
+            ASGIHandler(), args.requests, args.concurrency, token)),
+        ('ASGI, асинхронные', lambda: run_asgi(
+            application, args.requests, args.concurrency, token)),
+    )
+    rows = []
+    for name, run in cases:
+        start = time.perf_counter()
+        timings = run()
+        elapsed = time.perf_counter() - start
+        timings.sort()
+        rows.append((
+            name, f'{len(timings) / elapsed:.0f}',
+            f'{statistics.median(timings) * 1000:.1f}',
+            f'{timings[int(len(timings) * 0.95)] * 1000:.1f}',
+        ))
+
+    print_table(('сервер', 'запросов/с', 'p50, мс', 'p95, мс'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Накладные расходы аутентификации на запрос: JWTAuthentication
+из simplejwt против CachedJWTAuthentication (api/authentication.py).
+
+Замеряется один вызов authenticate() с тем же токеном: без кеша
+каждый раз проверяется подпись и читается пользователь из БД,
+с кешем после первого вызова - только поиск в LRU-кешах процесса.
+Отдельно показан «холодный» вызов с пустыми кешами.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_auth.py
+"""
+import argparse
+
+from common import (auth_headers, create_users, measure, print_table,
+                    setup_django)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.test import RequestFactory
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    from api.authentication import (CachedJWTAuthentication, token_cache,
+                                    user_cache)
+
+    user = get_user_model().objects.get(pk=create_users(1)[0])
+    request = RequestFactory().get('/', **auth_headers(user))
+
+    def clear():
+        cache.clear()
+        token_cache.clear()
+        user_cache.clear()
+
+    plain = JWTAuthentication()
+    cached = CachedJWTAuthentication()
+
+    def cold():
+        clear()
+        cached.authenticate(request)
+
+    plain_ms = measure(lambda: plain.authenticate(request), args.repeat)
+    cold_ms = measure(cold, args.repeat)
+    clear()
+    cached.authenticate(request)
+    cached_ms = measure(lambda: cached.authenticate(request), args.repeat)
+
+    print_table(('аутентификация', 'мкс на вызов'), [
+        ('JWTAuthentication', f'{plain_ms * 1000:.1f}'),
+        ('кеширующая, пустой кеш', f'{cold_ms * 1000:.1f}'),
+        ('кеширующая', f'{cached_ms * 1000:.1f}'),
+    ])
+    print(f'ускорение: {plain_ms / cached_ms:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Массовое создание постов и комментариев.
+
+Сравнивает пропускную способность создания по одному объекту
+на запрос (POST /posts/, POST /posts/{id}/comments/) и пачкой
+одним запросом (POST /posts/bulk/, POST /posts/{id}/comments/bulk/).
+
+Запуск из корня репозитория:
+    python benchmarks/bench_bulk_create.py
+"""
+import argparse
+import json
+import time
+
+from common import auth_headers, print_table, setup_django
+
+
+def throughput(func, count):
+    """Объектов в секунду при создании `count` объектов функцией func."""
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, nargs='+',
+                        default=[100, 1_000])
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from posts.models import Post
+
+    User = get_user_model()
+    client = Client()
+    author = User.objects.create_user(username='bulk_author')
+    headers = auth_headers(author)
+    post = Post.objects.create(text='Пост для комментариев', author=author)
+    endpoints = (
+        ('посты', '/api/v1/posts/'),
+        ('комментарии', f'/api/v1/posts/{post.id}/comments/'),
+    )
+
+    rows = []
+    for name, url in endpoints:
+        for count in args.items:
+            items = [{'text': f'Текст {number}'} for number in range(count)]
+
+            def one_by_one():
+                for item in items:
+                    client.post(url, item, **headers)
+
+            def batch():
+                response = client.post(
+                    f'{url}bulk/', json.dumps(items),
+                    content_type='application/json', **headers
+                )
+                assert response.status_code == 201, response.content
+
+            single = throughput(one_by_one, count)
+            bulk = throughput(batch, count)
+            rows.append((
+                name, count, f'{single:.0f}', f'{bulk:.0f}',
+                f'{bulk / single:.1f}'
+            ))
+
+    print_table(
+        ('объекты', 'количество', 'по одному, шт/с', 'пачкой, шт/с',
+         'ускорение'),
+        rows
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Одновременные чтение и запись в SQLite: профиль development
+(журнал отката, новое соединение на каждый запрос) против production
+(WAL, synchronous=NORMAL, mmap, постоянные соединения),
+см. DB_PROFILE в settings.py и posts/database.py.
+
+Писатели в потоках создают посты через ORM, читатели листают
+последние посты и считают их. После каждой операции вызывается
+close_old_connections(), как в конце запроса. Время ожидания
+блокировки в обоих профилях одинаковое, --busy-timeout.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_database.py --writers 4 --readers 8
+"""
+import argparse
+import shutil
+import statistics
+import threading
+import time
+
+from common import create_posts, create_users, print_table, setup_django
+
+
+def run(duration, writers, readers, author_id):
+    from django.db import OperationalError, close_old_connections
+    from posts.models import Post
+
+    stop = threading.Event()
+    results = {'write': [], 'read': [], 'errors': 0}
+    lock = threading.Lock()
+
+    def write(number):
+        Post.objects.create(text=f'Новый пост {number}', author_id=author_id)
+
+    def read(number):
+        list(Post.objects.order_by('-pub_date')[:20].values('id', 'text'))
+        Post.objects.count()
+
+    def worker(kind, operation):
+        number = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                operation(number)
+            except OperationalError:
+                # "database is locked" после истечения времени ожидания
+                with lock:
+                    results['errors'] += 1
+            else:
+                with lock:
+                    results[kind].append(time.perf_counter() - start)
+            finally:
+                close_old_connections()
+            number += 1
+
+    threads = [
+        threading.Thread(target=worker, args=('write', write))
+        for _ in range(writers)
+    ] + [
+        threading.Thread(target=worker, args=('read', read))
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def percentile(timings, share):
+    if not timings:
+        return '-'
+    timings = sorted(timings)
+    return f'{timings[int(len(timings) * share)] * 1000:.1f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--busy-timeout', type=float, default=5)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    from django.conf import settings
+    from django.db import connections
+
+    author_ids = create_users(10)
+    create_posts(author_ids, args.posts)
+    connections.close_all()
+
+    timeout_ms = int(args.busy_timeout * 1000)
+    profiles = (
+        ('development', 0, {}),
+        ('production', 600, {
+            'journal_mode': 'wal',
+            'synchronous': 'normal',
+            'mmap_size': 256 * 1024 * 1024,
+            'busy_timeout': timeout_ms,
+        }),
+    )
+    database = settings.DATABASES['default']
+    rows = []
+    for name, max_age, pragmas in profiles:
+        # Каждому профилю своя копия базы: режим WAL хранится в файле
+        path = f'{db_path}.{name}'
+        shutil.copyfile(db_path, path)
+        database['NAME'] = path
+        database['CONN_MAX_AGE'] = max_age
+        database['OPTIONS']['timeout'] = args.busy_timeout
+        settings.DATABASE_TUNING = {
+            'SQLITE_PRAGMAS': pragmas, 'HEALTH_CHECKS': bool(max_age),
+        }
+        results = run(
+            args.duration, args.writers, args.readers, author_ids[0]
+        )
+        connections.close_all()
+        rows.append((
+            name,
+            f'{len(results["write"]) / args.duration:.0f}',
+            f'{len(results["read"]) / args.duration:.0f}',
+            f'{statistics.median(results["write"]) * 1000:.1f}'
+            if results['write'] else '-',
+            percentile(results['write'], 0.95),
+            percentile(results['read'], 0.95),
+            results['errors'],
+        ))
+
+    print_table(
+        ('профиль', 'записей/с', 'чтений/с', 'запись p50, мс',
+         'запись p95, мс', 'чтение p95, мс', 'ошибок блокировки'),
+        rows
+    )
+
+
+if __name__ == '__main__':
+    main()
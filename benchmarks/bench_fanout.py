@@ -0,0 +1,97 @@
+"""
+Рассылка постов в ленты подписчиков (fan-out on write).
+
+Показывает, что время ответа на создание поста не растет с числом
+подписчиков автора, сколько занимает сама рассылка в фоне
+и как меняется время чтения ленты.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_fanout.py
+"""
+import argparse
+
+from common import (auth_headers, create_posts, create_users, measure,
+                    print_table, setup_django)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--followers', type=int, nargs='+',
+                        default=[100, 1_000, 10_000])
+    parser.add_argument('--authors', type=int, default=1_000)
+    parser.add_argument('--posts-per-author', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django(FEED_FANOUT={
+        'ENABLED': True, 'CELEBRITY_THRESHOLD': 10 ** 9, 'ASYNC': True
+    })
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from posts import timeline
+    from posts.models import Follow, Post
+
+    User = get_user_model()
+    client = Client()
+    readers = create_users(max(args.followers), prefix='reader')
+
+    rows = []
+    for count in args.followers:
+        author = User.objects.create_user(username=f'author{count}')
+        Follow.objects.bulk_create(
+            (Follow(user_id=user_id, following=author)
+             for user_id in readers[:count]),
+            batch_size=5000
+        )
+        headers = auth_headers(author)
+        create_ms = measure(
+            lambda: client.post(
+                '/api/v1/posts/', {'text': 'Новый пост'}, **headers
+            ),
+            args.repeat
+        )
+        # Дожидаемся фоновой рассылки, чтобы замеры не мешали друг другу
+        timeline._get_executor().submit(lambda: None).result()
+
+        post = Post.objects.create(text='Пост для замера', author=author)
+        fan_out_ms = measure(
+            lambda: timeline.fan_out_posts([post.id]), 1
+        )
+        rows.append((count, f'{create_ms:.2f}', f'{fan_out_ms:.2f}'))
+
+    print_table(
+        ('подписчиков', 'создание поста, мс', 'рассылка в фоне, мс'), rows
+    )
+
+    # Чтение ленты: запрос по подпискам против материализованной ленты
+    author_ids = create_users(args.authors, prefix='writer')
+    create_posts(author_ids, args.authors * args.posts_per_author)
+    reader = User.objects.create_user(username='feed_reader')
+    Follow.objects.bulk_create(
+        Follow(user=reader, following_id=author_id)
+        for author_id in author_ids
+    )
+    headers = auth_headers(reader)
+    url = '/api/v1/feed/?limit=20'
+
+    settings.FEED_FANOUT = {'ENABLED': False}
+    pull_ms = measure(lambda: client.get(url, **headers), args.repeat)
+
+    settings.FEED_FANOUT = {
+        'ENABLED': True, 'CELEBRITY_THRESHOLD': 10 ** 9, 'ASYNC': False
+    }
+    timeline.fan_out_posts(
+        Post.objects.filter(author_id__in=author_ids)
+        .values_list('id', flat=True)
+    )
+    push_ms = measure(lambda: client.get(url, **headers), args.repeat)
+    print()
+    print_table(
+        ('подписок', 'лента запросом, мс', 'материализованная лента, мс'),
+        [(args.authors, f'{pull_ms:.2f}', f'{push_ms:.2f}')]
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Время выдачи ленты подписок для пользователей с 1k-10k подписок.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_feed.py --authors 10000 --posts-per-author 20
+"""
+import argparse
+
+from common import (auth_headers, create_posts, create_users, measure,
+                    print_table, setup_django)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--authors', type=int, default=10_000)
+    parser.add_argument('--posts-per-author', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from posts.models import Follow
+
+    User = get_user_model()
+    author_ids = create_users(args.authors, prefix='author')
+    create_posts(author_ids, args.authors * args.posts_per_author)
+    print(f'Авторов: {args.authors}, '
+          f'постов: {args.authors * args.posts_per_author}')
+
+    client = Client()
+    url = '/api/v1/feed/'
+    rows = []
+    for following in (1_000, 5_000, 10_000):
+        if following > args.authors:
+            continue
+        reader = User.objects.create_user(username=f'reader{following}')
+        Follow.objects.bulk_create(
+            (Follow(user=reader, following_id=author_id)
+             for author_id in author_ids[:following]),
+            batch_size=5000
+        )
+        headers = auth_headers(reader)
+        first = client.get(url, {'limit': args.limit}, **headers)
+        next_url = first.json()['next']
+        first_ms = measure(
+            lambda: client.get(url, {'limit': args.limit}, **headers),
+            args.repeat
+        )
+        next_ms = measure(lambda: client.get(next_url, **headers), args.repeat)
+        rows.append((following, f'{first_ms:.2f}', f'{next_ms:.2f}'))
+
+    print_table(('подписок', 'первая страница, мс', 'следующая, мс'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Сравнение пагинации по смещению и по ключу на большой таблице постов.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_pagination.py --posts 1000000
+"""
+import argparse
+
+from common import (create_posts, create_users, measure, print_table,
+                    setup_django)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+    from api.pagination import KeysetPagination
+    from posts.models import Post
+
+    author_ids = create_users(100)
+    create_posts(author_ids, args.posts)
+    print(f'Постов в базе: {args.posts}')
+
+    client = Client()
+    url = '/api/v1/posts/'
+    paginator = KeysetPagination()
+    offsets = [0, 1_000, 10_000, 100_000, args.posts - args.limit]
+    rows = []
+    for offset in sorted({item for item in offsets
+                          if 0 <= item < args.posts}):
+        # Курсор на запись перед нужной страницей готовим заранее,
+        # как если бы клиент дошел до нее по ссылкам `next`
+        cursor = ''
+        if offset:
+            previous = Post.objects.values('pub_date', 'id')[offset - 1]
+            paginator.ordering_fields = ('pub_date', 'id')
+            cursor = paginator.encode_cursor(
+                paginator.get_position(previous)
+            )
+        offset_ms = measure(
+            lambda: client.get(url, {'limit': args.limit, 'offset': offset}),
+            args.repeat
+        )
+        keyset_ms = measure(
+            lambda: client.get(url, {'limit': args.limit, 'cursor': cursor}),
+            args.repeat
+        )
+        rows.append((offset, f'{offset_ms:.2f}', f'{keyset_ms:.2f}'))
+
+    print_table(('offset', 'limit/offset, мс', 'keyset, мс'), rows)
+
+
+if __name__ == '__main__':
+    main()
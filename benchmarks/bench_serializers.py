@@ -0,0 +1,83 @@
+"""
+Сериализация списков: обычные сериализаторы DRF против
+скомпилированных (api/compiled.py), которые собирают ответ
+из строк values() без создания объектов моделей.
+
+Замеряется выборка и сериализация страницы постов и комментариев
+одного поста; время рендеринга JSON в обоих случаях одинаковое
+и не учитывается.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_serializers.py
+"""
+import argparse
+
+from common import (create_posts, create_users, measure, print_table,
+                    setup_django)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+',
+                        default=[10, 100, 1_000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import RequestFactory
+    from api.compiled import compile_serializer
+    from api.mixins import build_query_plan
+    from api.serializers import CommentSerializer, PostSerializer
+    from posts.models import Comment, Post
+
+    author_ids = create_users(100)
+    create_posts(author_ids, max(args.rows))
+    post = Post.objects.first()
+    Comment.objects.bulk_create(
+        Comment(text=f'Комментарий {number}', author_id=author_ids[0],
+                post=post)
+        for number in range(max(args.rows))
+    )
+    context = {'request': RequestFactory().get('/')}
+
+    def prepare(serializer_class, queryset):
+        serializer = serializer_class(context=context)
+        select_related, only = build_query_plan(serializer)
+        planned = queryset.select_related(*select_related).only(*only)
+        compiled = compile_serializer(serializer)
+
+        def drf(size):
+            return serializer_class(
+                planned[:size], many=True, context=context
+            ).data
+
+        def fast(size):
+            return compiled.many(compiled.values(queryset)[:size])
+
+        return drf, fast
+
+    rows = []
+    cases = (
+        ('посты', *prepare(PostSerializer, Post.objects.all())),
+        ('комментарии', *prepare(
+            CommentSerializer, Comment.objects.filter(post=post)
+            .order_by('created', 'id')
+        )),
+    )
+    for name, drf, fast in cases:
+        for size in args.rows:
+            drf_ms = measure(lambda: drf(size), args.repeat)
+            fast_ms = measure(lambda: fast(size), args.repeat)
+            rows.append((
+                name, size, f'{drf_ms:.2f}', f'{fast_ms:.2f}',
+                f'{drf_ms / fast_ms:.1f}'
+            ))
+
+    print_table(
+        ('объекты', 'строк', 'DRF, мс', 'скомпилированный, мс', 'ускорение'),
+        rows
+    )
+
+
+if __name__ == '__main__':
+    main()
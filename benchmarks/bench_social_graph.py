@@ -0,0 +1,86 @@
+"""
+Счетчики подписок и проверка подписки через posts/social_graph.py.
+
+Сравнивает подсчет строк Follow с чтением счетчика (без кеша,
+из общего кеша и из LRU-кеша процесса) и проверку подписки
+запросом EXISTS с проверкой через кеш для автора с большим
+числом подписчиков.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_social_graph.py
+"""
+import argparse
+
+from common import (LOCMEM_CACHES, create_users, measure, print_table,
+                    setup_django)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--followers', type=int, nargs='+',
+                        default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django(CACHES=LOCMEM_CACHES)
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from posts import social_graph
+    from posts.models import Follow, FollowCounts
+
+    User = get_user_model()
+    readers = create_users(max(args.followers), prefix='reader')
+
+    def cold(func):
+        def run():
+            cache.clear()
+            social_graph.local_cache.clear()
+            func()
+        return run
+
+    def shared(func):
+        def run():
+            social_graph.local_cache.clear()
+            func()
+        return run
+
+    rows = []
+    for count in args.followers:
+        author = User.objects.create_user(username=f'author{count}')
+        # Массовая вставка идет в обход сигналов, счетчик ставим сами
+        Follow.objects.bulk_create(
+            (Follow(user_id=user_id, following=author)
+             for user_id in readers[:count]),
+            batch_size=5000
+        )
+        FollowCounts.objects.create(user=author, followers=count)
+        follows = Follow.objects.filter(following=author)
+        reader_id = readers[count - 1]
+        exists = follows.filter(user_id=reader_id).exists
+
+        def get_count():
+            return social_graph.get_followers_count(author.id)
+
+        def check():
+            return social_graph.is_following(reader_id, author.id)
+
+        rows.append((
+            count,
+            f'{measure(follows.count, args.repeat):.3f}',
+            f'{measure(cold(get_count), args.repeat):.3f}',
+            f'{measure(shared(get_count), args.repeat):.3f}',
+            f'{measure(get_count, args.repeat):.4f}',
+            f'{measure(exists, args.repeat):.3f}',
+            f'{measure(check, args.repeat):.4f}',
+        ))
+
+    print_table(
+        ('подписчиков', 'COUNT(*), мс', 'счетчик из БД, мс',
+         'счетчик из кеша, мс', 'счетчик из LRU, мс',
+         'EXISTS, мс', 'подписка из LRU, мс'),
+        rows
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Стоимость проверки лимита частоты (api/throttling.py):
+SlidingWindowThrottle против SimpleRateThrottle из DRF, который
+хранит историю запросов и переписывает ее в кеш целиком.
+
+Замеряется один вызов allow_request() при заполненном наполовину
+лимите; кеш - LocMemCache, как в настройках проекта.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_throttling.py
+"""
+import argparse
+from types import SimpleNamespace
+
+from common import LOCMEM_CACHES, measure, print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--limits', type=int, nargs='+',
+                        default=[10, 100, 1_000])
+    parser.add_argument('--repeat', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django(CACHES=LOCMEM_CACHES)
+    from django.core.cache import cache
+    from rest_framework.settings import api_settings
+    from rest_framework.throttling import UserRateThrottle
+
+    from api.throttling import SlidingWindowThrottle
+
+    request = SimpleNamespace(
+        user=SimpleNamespace(is_authenticated=True, pk=1)
+    )
+    view = SimpleNamespace(throttle_scope='bench', action='create')
+
+    rows = []
+    for limit in args.limits:
+        # Лимит вдвое выше числа замеров, чтобы запросы не отклонялись
+        rate = f'{max(limit, args.repeat) * 2}/h'
+        api_settings.DEFAULT_THROTTLE_RATES['bench.create'] = rate
+        UserRateThrottle.rate = rate
+        cache.clear()
+        for _ in range(limit):
+            SlidingWindowThrottle().allow_request(request, view)
+            UserRateThrottle().allow_request(request, view)
+        drf_us = measure(
+            lambda: UserRateThrottle().allow_request(request, view),
+            args.repeat
+        ) * 1000
+        sliding_us = measure(
+            lambda: SlidingWindowThrottle().allow_request(request, view),
+            args.repeat
+        ) * 1000
+        rows.append((limit, f'{drf_us:.1f}', f'{sliding_us:.1f}'))
+
+    print_table(
+        ('запросов в окне', 'DRF, мкс', 'скользящее окно, мкс'), rows
+    )
+
+
+if __name__ == '__main__':
+    main()
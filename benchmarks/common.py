@@ -0,0 +1,131 @@
+"""
+Общие утилиты для бенчмарков.
+Каждый бенчмарк работает с отдельной временной базой SQLite,
+чтобы не трогать рабочую базу проекта.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = BASE_DIR / 'yatube_api'
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+def setup_django(db_path=None, **overrides):
+    """
+    Настраивает Django на временную базу и применяет миграции.
+    Дополнительные настройки можно передать именованными аргументами.
+    """
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube_api.settings')
+
+    import django
+    from django.conf import settings
+
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    settings.DATABASES['default']['NAME'] = db_path
+    # Фоновые потоки пишут в ту же базу, ждем блокировку, а не падаем
+    settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 30
+    settings.DEBUG = False
+    # Бенчмарки шлют сотни запросов подряд, лимиты частоты им мешают
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []
+    }
+    # Кеш ответов отвечал бы на анонимные запросы без обращения к БД.
+    # Бенчмарки, которые меряют работу с кешем, передают CACHES сами
+    settings.CACHES = DUMMY_CACHES
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def measure(func, repeat=20):
+    """Возвращает медианное время выполнения функции в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def create_users(count, prefix='user'):
+    """Создает пользователей одним INSERT на пачку и возвращает их id."""
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    User.objects.bulk_create(
+        (User(username=f'{prefix}{number}', password='!')
+         for number in range(count)),
+        batch_size=5000
+    )
+    return list(
+        User.objects.filter(username__startswith=prefix)
+        .values_list('id', flat=True)
+    )
+
+
+def create_posts(author_ids, count, batch_size=50000):
+    """
+    Быстро вставляет посты сырым SQL с разными датами публикации.
+    ORM здесь не используется: bulk_create проставил бы всем постам
+    одинаковую дату из auto_now_add.
+    """
+    from django.db import connection, transaction
+    from posts.models import Post
+
+    table = Post._meta.db_table
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    sql = (
+        f'INSERT INTO {table} '
+        '(text, pub_date, updated, author_id, image, image_variants, '
+        'group_id, fanned_out, comments_count) '
+        'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)'
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(0, count, batch_size):
+            rows = []
+            for number in range(offset, min(offset + batch_size, count)):
+                date = connection.ops.adapt_datetimefield_value(
+                    start + timedelta(seconds=number)
+                )
+                rows.append((
+                    f'Пост номер {number}', date, date,
+                    author_ids[number % len(author_ids)], '', '{}', None,
+                    False, 0,
+                ))
+            cursor.executemany(sql, rows)
+
+
+def print_table(headers, rows):
+    widths = [
+        max(len(str(item)) for item in column)
+        for column in zip(headers, *rows)
+    ]
+    line = '  '.join(f'{{:>{width}}}' for width in widths)
+    print(line.format(*headers))
+    for row in rows:
+        print(line.format(*row))
+
+
+def auth_headers(user):
+    """Заголовок с JWT-токеном для запросов от имени пользователя."""
+    from rest_framework_simplejwt.tokens import AccessToken
+    return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
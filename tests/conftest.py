@@ -1,6 +1,8 @@
 import sys
 import os
 
+import pytest
+
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
@@ -27,9 +29,34 @@ if FILENAME not in project_dir_content:
         'Убедитесь, что у вас верная структура проекта.'
     )
 
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(tmp_path_factory):
+    from django.conf import settings
+
+    # Тестовая SQLite в файле, а не в общей памяти: в памяти SQLite
+    # блокирует таблицы целиком и не ждет освобождения блокировки,
+    # поэтому параллельные запросы в тестах падали бы с ошибкой
+    database = settings.DATABASES['default']
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        database.setdefault('TEST', {})['NAME'] = str(
+            tmp_path_factory.mktemp('db') / 'test.sqlite3'
+        )
+
+
+@pytest.fixture(autouse=True)
+def read_from_primary(settings):
+    # С DB_REPLICAS тесты объявляют только основную базу, поэтому
+    # чтение с реплик включают лишь тесты, которым это нужно
+    settings.DATABASE_REPLICAS = {
+        **settings.DATABASE_REPLICAS, 'ALIASES': []
+    }
+
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
+    'tests.fixtures.fixture_cache',
 ]
 
 # test .md
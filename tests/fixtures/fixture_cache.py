@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    from api.authentication import token_cache, user_cache
+    from posts.social_graph import local_cache
+
+    # Между тестами база очищается без сигналов, поэтому сбрасываем
+    # и кеш, чтобы закешированные значения не переживали тест
+    cache.clear()
+    local_cache.clear()
+    token_cache.clear()
+    user_cache.clear()
+    yield
+    cache.clear()
+    local_cache.clear()
+    token_cache.clear()
+    user_cache.clear()
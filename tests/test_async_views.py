@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import threading
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.core.cache import cache
+from django.urls import resolve
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import asynchronous
+from api.pagination import PostPagination
+from api.views import CommentViewSet
+from posts.models import Comment, Group, Post
+
+ASGI_URLCONF = 'yatube_api.asgi_urls'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncViews:
+
+    urls = (
+        '/api/v1/posts/',
+        '/api/v1/posts/?limit=2&offset=1',
+        '/api/v1/posts/?limit=2&fields=id,text',
+        '/api/v1/posts/{post_id}/',
+        '/api/v1/posts/{post_id}/comments/',
+        '/api/v1/groups/',
+    )
+
+    @pytest.fixture
+    def data(self, user, another_user):
+        group = Group.objects.create(title='Группа', slug='group')
+        posts = [
+            Post.objects.create(text=f'Пост {number}', author=user,
+                                group=group if number % 2 else None)
+            for number in range(5)
+        ]
+        Comment.objects.create(text='Комментарий', author=another_user,
+                               post=posts[0])
+        return posts[0]
+
+    def get_all(self, client, post):
+        cache.clear()
+        return [
+            client.get(url.format(post_id=post.id)).content
+            for url in self.urls
+        ]
+
+    def test_async_urls(self):
+        for url in ('/api/v1/posts/', '/api/v1/posts/1/',
+                    '/api/v1/posts/1/comments/', '/api/v1/groups/'):
+            view = resolve(url, urlconf=ASGI_URLCONF).func
+            assert asyncio.iscoroutinefunction(view), (
+                f'Проверьте, что под ASGI `{url}` обслуживает '
+                'асинхронное представление.'
+            )
+
+    @pytest.mark.parametrize('authenticated', (False, True))
+    def test_same_responses(self, client, user_client, data, settings,
+                            authenticated):
+        client = user_client if authenticated else client
+        expected = self.get_all(client, data)
+        settings.ROOT_URLCONF = ASGI_URLCONF
+        assert self.get_all(client, data) == expected, (
+            'Проверьте, что асинхронные представления отвечают так же, '
+            'как синхронные.'
+        )
+
+    def test_writes_through_async_urls(self, user_client, data, settings):
+        settings.ROOT_URLCONF = ASGI_URLCONF
+        response = user_client.post(
+            '/api/v1/posts/', data={'text': 'Новый пост'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.delete(f'/api/v1/posts/{data.id}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = user_client.get('/api/v1/posts/?limit=10')
+        assert response.json()['count'] == 5
+
+    def test_asgi_application(self, data):
+        from yatube_api.asgi import application
+
+        async def get(path, query=b''):
+            communicator = ApplicationCommunicator(application, {
+                'type': 'http', 'method': 'GET', 'path': path,
+                'query_string': query,
+                'headers': [(b'host', b'testserver')],
+            })
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(timeout=5)
+            body = await communicator.receive_output(timeout=5)
+            return start['status'], body['body']
+
+        status, body = async_to_sync(get)('/api/v1/posts/', b'limit=2')
+        assert status == HTTPStatus.OK
+        assert b'"count":5' in body
+        status, _ = async_to_sync(get)('/api/v1/posts/0/')
+        assert status == HTTPStatus.NOT_FOUND
+
+    def test_asgi_stream(self, client, data, another_user, monkeypatch):
+        from yatube_api.asgi import application
+
+        for number in range(4):
+            Comment.objects.create(text=f'Комментарий {number}',
+                                   author=another_user, post=data)
+        monkeypatch.setattr(CommentViewSet, 'stream_chunk_size', 2)
+        path = f'/api/v1/posts/{data.id}/comments/'
+
+        async def get():
+            communicator = ApplicationCommunicator(application, {
+                'type': 'http', 'method': 'GET', 'path': path,
+                'query_string': b'stream=1',
+                'headers': [(b'host', b'testserver')],
+            })
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(timeout=5)
+            parts = []
+            while True:
+                message = await communicator.receive_output(timeout=5)
+                parts.append(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            return start['status'], parts
+
+        status, parts = async_to_sync(get)()
+        assert status == HTTPStatus.OK, (
+            'Проверьте, что под ASGI комментарии отдаются потоком '
+            'с параметром `stream=1`.'
+        )
+        expected = client.get(f'{path}?stream=1')
+        assert b''.join(parts) == b''.join(expected.streaming_content), (
+            'Проверьте, что под ASGI потоковая выдача комментариев '
+            'совпадает с выдачей под WSGI.'
+        )
+        assert len([part for part in parts if part]) == 5, (
+            'Проверьте, что под ASGI комментарии отдаются по частям.'
+        )
+
+
+# Потоки пула общие для всех тестов и с постоянными соединениями
+# (DB_PROFILE=production) закрывают их после вызова
+@pytest.mark.django_db(transaction=True)
+class TestBlockingExecutor:
+
+    def test_pool_size_setting(self, settings, monkeypatch):
+        settings.ASYNC_VIEWS = {'MAX_WORKERS': 2}
+        monkeypatch.setattr(asynchronous, '_executor', None)
+        executor = asynchronous.get_executor()
+        try:
+            assert executor._max_workers == 2, (
+                'Проверьте, что размер пула задается '
+                "настройкой ASYNC_VIEWS['MAX_WORKERS']."
+            )
+        finally:
+            executor.shutdown()
+
+    def test_context_passed(self):
+        variable = contextvars.ContextVar('variable', default=None)
+
+        async def run():
+            variable.set('значение')
+            return await asynchronous.run_blocking(
+                lambda: (variable.get(), threading.current_thread().name)
+            )
+
+        value, thread = async_to_sync(run)()
+        assert value == 'значение'
+        assert thread.startswith('async-views')
+
+    def test_count_and_page_overlap(self):
+        fetched = threading.Event()
+
+        class Rows:
+            def __getitem__(self, item):
+                return self
+
+            def __iter__(self):
+                fetched.set()
+                return iter(['первый', 'второй'])
+
+        class WaitingCount:
+            def count(self, queryset):
+                # Подсчет дождется выборки страницы, только если они
+                # выполняются одновременно
+                assert fetched.wait(timeout=5), (
+                    'Проверьте, что подсчет и выборка страницы постов '
+                    'выполняются параллельно.'
+                )
+                return 10
+
+        class View:
+            count_strategy = WaitingCount()
+
+        request = Request(APIRequestFactory().get('/', {'limit': 2}))
+        paginator = PostPagination()
+        page = async_to_sync(paginator.paginate_queryset_async)(
+            Rows(), request, View()
+        )
+        assert page == ['первый', 'второй']
+        assert paginator.count == 10
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import CachedJWTAuthentication, token_cache
+
+
+def make_request(token):
+    return APIRequestFactory().get(
+        '/', HTTP_AUTHORIZATION=f'Bearer {token}'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCachedJWTAuthentication:
+
+    def test_second_request_without_queries(self, user, token):
+        authentication = CachedJWTAuthentication()
+        request = make_request(token['access'])
+        first, _ = authentication.authenticate(request)
+        with CaptureQueriesContext(connection) as queries:
+            second, validated = authentication.authenticate(request)
+        assert len(queries) == 0, (
+            'Проверьте, что повторная аутентификация тем же токеном '
+            'не обращается к базе.'
+        )
+        assert second == user and second is not first
+        assert validated['user_id'] == user.id
+
+    def test_deactivated_user(self, user, token):
+        authentication = CachedJWTAuthentication()
+        request = make_request(token['access'])
+        authentication.authenticate(request)
+        user.is_active = False
+        user.save()
+        with pytest.raises(AuthenticationFailed):
+            authentication.authenticate(request)
+
+    def test_deleted_user(self, user, token):
+        authentication = CachedJWTAuthentication()
+        request = make_request(token['access'])
+        authentication.authenticate(request)
+        user.delete()
+        with pytest.raises(AuthenticationFailed):
+            authentication.authenticate(request)
+
+    def test_user_not_in_shared_cache(self, user, token):
+        from django.core.cache import cache
+
+        from api.authentication import _user_key
+
+        CachedJWTAuthentication().authenticate(make_request(token['access']))
+        assert cache.get(_user_key(user.id)) is None, (
+            'Проверьте, что пользователи не попадают в общий кеш.'
+        )
+
+    def test_deactivated_without_signals(self, user, token, monkeypatch):
+        from django.contrib.auth import get_user_model
+
+        from api.authentication import user_cache
+
+        # Записи кеша процесса истекают сразу
+        monkeypatch.setattr(user_cache, 'ttl', 0)
+        authentication = CachedJWTAuthentication()
+        request = make_request(token['access'])
+        authentication.authenticate(request)
+        get_user_model().objects.filter(pk=user.pk).update(is_active=False)
+        # Деактивация без сигналов действует, как только истекает
+        # запись в кеше процесса
+        with pytest.raises(AuthenticationFailed):
+            authentication.authenticate(request)
+
+    def test_expired_token(self, user, monkeypatch):
+        from rest_framework_simplejwt import tokens
+
+        from api import authentication as module
+
+        access = AccessToken.for_user(user)
+        access.set_exp(lifetime=timedelta(seconds=60))
+        authentication = CachedJWTAuthentication()
+        request = make_request(str(access))
+        authentication.authenticate(request)
+        later = tokens.aware_utcnow() + timedelta(minutes=5)
+        monkeypatch.setattr(tokens, 'aware_utcnow', lambda: later)
+        monkeypatch.setattr(module.time, 'time', later.timestamp)
+        with pytest.raises(InvalidToken):
+            authentication.authenticate(request)
+
+    def test_invalid_token_not_cached(self, user, token):
+        authentication = CachedJWTAuthentication()
+        with pytest.raises(InvalidToken):
+            authentication.authenticate(make_request('broken'))
+        assert not token_cache._data, (
+            'Проверьте, что неверные токены не попадают в кеш.'
+        )
+
+    def test_api_uses_cached_authentication(self, user_client, user):
+        response = user_client.get('/api/v1/follow/')
+        assert response.status_code == HTTPStatus.OK
+        user.is_active = False
+        user.save()
+        response = user_client.get('/api/v1/follow/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что деактивированный пользователь не проходит '
+            'аутентификацию даже после кеширования.'
+        )
@@ -0,0 +1,159 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Follow, Post, TimelineEntry
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBulkCreate:
+
+    posts_url = '/api/v1/posts/'
+    posts_bulk_url = '/api/v1/posts/bulk/'
+    comments_bulk_url = '/api/v1/posts/{post_id}/comments/bulk/'
+
+    def count_inserts(self, context, model):
+        table = f'"{model._meta.db_table}"'
+        return len([
+            query for query in context.captured_queries
+            if query['sql'].startswith('INSERT')
+            and table in query['sql'].split('(')[0]
+        ])
+
+    def test_bulk_posts(self, user_client, user, group_1, monkeypatch):
+        from api.views import PostViewSet
+
+        monkeypatch.setattr(PostViewSet, 'bulk_batch_size', 2)
+        data = [
+            {'text': f'Пост {number}', 'group': group_1.id}
+            for number in range(5)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                self.posts_bulk_url, data=data, format='json'
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert self.count_inserts(context, Post) == 3, (
+            f'Проверьте, что POST-запрос к `{self.posts_bulk_url}` вставляет '
+            'посты пачками по `bulk_batch_size`.'
+        )
+        items = response.json()
+        assert [item['text'] for item in items] == [
+            item['text'] for item in data
+        ]
+        posts = Post.objects.filter(author=user).order_by('id')
+        assert [item['id'] for item in items] == [
+            post.id for post in posts
+        ], 'Проверьте, что в ответе переданы id созданных постов.'
+        assert all(
+            item['author'] == user.username and item['group'] == group_1.id
+            for item in items
+        )
+
+    def test_bulk_posts_errors(self, user_client, user):
+        data = [{'text': 'Пост'}, {}, {'text': 'Пост', 'group': 100500}]
+        response = user_client.post(
+            self.posts_bulk_url, data=data, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert len(errors) == 3 and errors[0] == {}, (
+            'Проверьте, что ошибки возвращаются по каждому элементу списка.'
+        )
+        assert 'text' in errors[1] and 'group' in errors[2]
+        assert not Post.objects.exists(), (
+            'Проверьте, что при ошибке в одном элементе не создается '
+            'ни один пост.'
+        )
+
+    @pytest.mark.parametrize('data', ([], {'text': 'Пост'}))
+    def test_bulk_invalid(self, user_client, data):
+        response = user_client.post(
+            self.posts_bulk_url, data=data, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_bulk_limit(self, user_client, monkeypatch):
+        from api.views import PostViewSet
+
+        monkeypatch.setattr(PostViewSet, 'bulk_limit', 2)
+        response = user_client.post(
+            self.posts_bulk_url, data=[{'text': 'Пост'}] * 3, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_bulk_not_auth(self, client, post):
+        response = client.post(
+            self.posts_bulk_url, data=[{'text': 'Пост'}],
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        response = client.post(
+            self.comments_bulk_url.format(post_id=post.id),
+            data=[{'text': 'Комментарий'}], content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_bulk_posts_invalidate_list(self, user_client, client, post):
+        assert len(client.get(self.posts_url).json()) == 1
+        user_client.post(
+            self.posts_bulk_url, data=[{'text': 'Пост'}], format='json'
+        )
+        assert len(client.get(self.posts_url).json()) == 2, (
+            'Проверьте, что массовое создание сбрасывает кеш списка постов.'
+        )
+
+    def test_bulk_posts_fan_out(self, user_client, user, user_2, settings):
+        settings.FEED_FANOUT = {'ENABLED': True, 'ASYNC': False}
+        Follow.objects.create(user=user_2, following=user)
+        response = user_client.post(
+            self.posts_bulk_url, data=[{'text': 'Один'}, {'text': 'Два'}],
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert TimelineEntry.objects.filter(user=user_2).count() == 2, (
+            'Проверьте, что посты, созданные массово, рассылаются '
+            'в ленты подписчиков.'
+        )
+
+    def test_bulk_comments(self, user_client, user, post):
+        url = self.comments_bulk_url.format(post_id=post.id)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                url, data=[{'text': f'Текст {number}'} for number in range(4)],
+                format='json'
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert self.count_inserts(context, Comment) == 1
+        items = response.json()
+        assert [item['id'] for item in items] == list(
+            Comment.objects.order_by('id').values_list('id', flat=True)
+        )
+        assert all(
+            item['post'] == post.id and item['author'] == user.username
+            for item in items
+        )
+        post.refresh_from_db(fields=['comments_count'])
+        assert post.comments_count == 4, (
+            f'Проверьте, что POST-запрос к `{self.comments_bulk_url}` '
+            'увеличивает `comments_count` поста.'
+        )
+
+    def test_bulk_comments_errors(self, user_client, post):
+        url = self.comments_bulk_url.format(post_id=post.id)
+        response = user_client.post(
+            url, data=[{'text': 'Текст'}, {'text': ''}], format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json()[0] == {} and 'text' in response.json()[1]
+        assert not Comment.objects.exists()
+        post.refresh_from_db(fields=['comments_count'])
+        assert post.comments_count == 0
+
+        response = user_client.post(
+            self.comments_bulk_url.format(post_id=100500),
+            data=[{'text': 'Текст'}], format='json'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+import pytest
+
+from posts.models import Comment, Post
+from tests.test_counts import insert_post_silently
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    post_list_url = '/api/v1/posts/'
+    post_detail_url = '/api/v1/posts/{post_id}/'
+    group_list_url = '/api/v1/groups/'
+
+    def test_anonymous_list_cached(self, client, user, post,
+                                   django_assert_num_queries):
+        response = client.get(self.post_list_url)
+        with django_assert_num_queries(0):
+            cached = client.get(self.post_list_url)
+        assert cached.status_code == HTTPStatus.OK
+        assert cached.json() == response.json(), (
+            'Проверьте, что повторный анонимный GET-запрос к '
+            f'`{self.post_list_url}` отдает ответ из кеша.'
+        )
+        assert cached['ETag'] == response['ETag']
+        assert 'Last-Modified' in cached
+
+    def test_query_params_normalized(self, client, post,
+                                     django_assert_num_queries):
+        client.get(f'{self.post_list_url}?limit=1&offset=0')
+        with django_assert_num_queries(0):
+            response = client.get(f'{self.post_list_url}?offset=0&limit=1')
+        assert response.status_code == HTTPStatus.OK
+
+    def test_authenticated_not_cached(self, client, user_client, user, post):
+        client.get(self.post_list_url)
+        insert_post_silently(user)
+        assert len(client.get(self.post_list_url).json()) == 1
+        assert len(user_client.get(self.post_list_url).json()) == 2, (
+            'Проверьте, что ответы авторизованным пользователям не '
+            'кешируются.'
+        )
+
+    def test_not_modified(self, client, post, django_assert_num_queries):
+        url = self.post_detail_url.format(post_id=post.id)
+        response = client.get(url)
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что на запрос с актуальным `If-None-Match` '
+            f'к `{self.post_detail_url}` возвращается ответ 304.'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_invalidated_on_create_and_delete(self, client, user, post):
+        client.get(self.post_list_url)
+        new_post = Post.objects.create(text='Новый пост', author=user)
+        assert len(client.get(self.post_list_url).json()) == 2, (
+            'Проверьте, что создание поста сбрасывает кеш списка постов.'
+        )
+        new_post.delete()
+        assert len(client.get(self.post_list_url).json()) == 1, (
+            'Проверьте, что удаление поста сбрасывает кеш списка постов.'
+        )
+
+    def test_detail_invalidation_is_precise(self, client, post, another_post):
+        url = self.post_detail_url.format(post_id=post.id)
+        other_url = self.post_detail_url.format(post_id=another_post.id)
+        etag = client.get(url)['ETag']
+        other_etag = client.get(other_url)['ETag']
+        list_etag = client.get(self.post_list_url)['ETag']
+
+        post.text = 'Измененный текст'
+        post.save()
+        response = client.get(url)
+        assert response.json()['text'] == 'Измененный текст', (
+            'Проверьте, что изменение поста сбрасывает кеш страницы поста.'
+        )
+        assert response['ETag'] != etag
+        assert client.get(other_url)['ETag'] == other_etag, (
+            'Проверьте, что изменение поста не сбрасывает кеш других постов.'
+        )
+        assert client.get(self.post_list_url)['ETag'] != list_etag
+
+        etag = response['ETag']
+        list_etag = client.get(self.post_list_url)['ETag']
+        Comment.objects.create(author=post.author, post=post, text='Текст')
+        assert client.get(url)['ETag'] != etag, (
+            'Проверьте, что новый комментарий сбрасывает кеш страницы поста.'
+        )
+        assert client.get(self.post_list_url)['ETag'] != list_etag, (
+            'Проверьте, что новый комментарий сбрасывает кеш списка постов: '
+            'в нем выводится счетчик комментариев.'
+        )
+        assert client.get(other_url)['ETag'] == other_etag
+
+    def test_group_delete_invalidates_posts(self, client, post, group_1):
+        url = self.post_detail_url.format(post_id=post.id)
+        assert client.get(url).json()['group'] == group_1.id
+        assert len(client.get(self.group_list_url).json()) == 1
+        group_1.delete()
+        assert client.get(url).json()['group'] is None, (
+            'Проверьте, что удаление группы сбрасывает кеш ее постов.'
+        )
+        assert client.get(self.group_list_url).json() == []
+
+    def test_file_based_cache(self, client, post, settings, tmp_path,
+                              django_assert_num_queries):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': str(tmp_path),
+            }
+        }
+        response = client.get(self.post_list_url)
+        with django_assert_num_queries(0):
+            cached = client.get(self.post_list_url)
+        assert cached.json() == response.json()
+        post.delete()
+        assert client.get(self.post_list_url).json() == []
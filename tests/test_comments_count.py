@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from posts.models import Comment, Post
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCommentsCount:
+
+    post_detail_url = '/api/v1/posts/{post_id}/'
+    comments_url = '/api/v1/posts/{post_id}/comments/'
+    comment_detail_url = '/api/v1/posts/{post_id}/comments/{comment_id}/'
+
+    def get_count(self, post):
+        post.refresh_from_db(fields=['comments_count'])
+        return post.comments_count
+
+    def test_count_in_serializer(self, client, post):
+        response = client.get(self.post_detail_url.format(post_id=post.id))
+        assert response.json().get('comments_count') == 0, (
+            f'Проверьте, что ответ на GET-запрос к `{self.post_detail_url}` '
+            'содержит поле `comments_count`.'
+        )
+
+    def test_create_and_destroy(self, user_client, post):
+        url = self.comments_url.format(post_id=post.id)
+        for number in range(3):
+            response = user_client.post(url, data={'text': f'Текст {number}'})
+            assert response.status_code == HTTPStatus.CREATED
+        assert self.get_count(post) == 3, (
+            f'Проверьте, что POST-запрос к `{self.comments_url}` '
+            'увеличивает `comments_count` поста.'
+        )
+
+        response = user_client.delete(self.comment_detail_url.format(
+            post_id=post.id, comment_id=response.json()['id']
+        ))
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_count(post) == 2, (
+            'Проверьте, что удаление комментария уменьшает `comments_count` '
+            'поста.'
+        )
+        response = user_client.get(self.post_detail_url.format(
+            post_id=post.id
+        ))
+        assert response.json()['comments_count'] == 2
+
+    def test_invalid_comment_does_not_count(self, user_client, post):
+        response = user_client.post(
+            self.comments_url.format(post_id=post.id), data={}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert self.get_count(post) == 0
+
+    def test_author_delete_cascade(self, user_client, another_user, post):
+        url = self.comments_url.format(post_id=post.id)
+        user_client.post(url, data={'text': 'Мой комментарий'})
+        Comment.objects.create(author=another_user, post=post, text='Чужой')
+        Post.objects.filter(pk=post.pk).update(comments_count=2)
+
+        another_user.delete()
+        assert self.get_count(post) == 1, (
+            'Проверьте, что при удалении пользователя уменьшаются счетчики '
+            'постов, с которых удалены его комментарии.'
+        )
+
+    def test_recount_command(self, post, another_post, comment_1_post,
+                             comment_2_post, comment_1_another_post):
+        Post.objects.filter(pk=post.pk).update(comments_count=10)
+        call_command('recount_comments', batch_size=1)
+        assert self.get_count(post) == 2, (
+            'Проверьте, что команда `recount_comments` исправляет '
+            'разошедшиеся счетчики.'
+        )
+        assert self.get_count(another_post) == 1
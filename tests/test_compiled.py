@@ -0,0 +1,116 @@
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+from rest_framework import serializers as drf_serializers
+from rest_framework.renderers import JSONRenderer
+
+from api import serializers
+from api.compiled import compile_serializer
+from posts.models import Comment, Follow, Group, Post
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCompiledSerializers:
+
+    post_list_url = '/api/v1/posts/'
+    comments_url = '/api/v1/posts/{post_id}/comments/'
+
+    @pytest.fixture
+    def data(self, user, user_2, group_1):
+        group = Group.objects.create(
+            title='Группа без описания', slug='empty', description=''
+        )
+        posts = [
+            Post.objects.create(text='Пост с картинкой', author=user,
+                                group=group_1, image='posts/pic.jpg'),
+            Post.objects.create(text='Пост без группы', author=user_2),
+            Post.objects.create(text='Пост 😊 "в кавычках"', author=user,
+                                group=group),
+        ]
+        Comment.objects.create(text='Комментарий', author=user_2,
+                               post=posts[0])
+        Comment.objects.create(text='Ответ', author=user, post=posts[0])
+        Follow.objects.create(user=user, following=user_2)
+        Follow.objects.create(user=user_2, following=user)
+        return posts
+
+    def render_both(self, serializer_class, queryset, **kwargs):
+        context = {'request': RequestFactory().get('/')}
+        serializer = serializer_class(
+            queryset, many=True, context=context, **kwargs
+        )
+        compiled = compile_serializer(serializer)
+        assert compiled is not None, (
+            f'Проверьте, что `{serializer_class.__name__}` компилируется.'
+        )
+        renderer = JSONRenderer()
+        return (
+            renderer.render(serializer.data),
+            renderer.render(compiled.many(compiled.values(queryset))),
+        )
+
+    @pytest.mark.parametrize('serializer_class, model', (
+        (serializers.PostSerializer, Post),
+        (serializers.CommentSerializer, Comment),
+        (serializers.GroupSerializer, Group),
+        (serializers.FollowSerializer, Follow),
+    ))
+    def test_parity(self, data, serializer_class, model):
+        expected, compiled = self.render_both(
+            serializer_class, model.objects.order_by('id')
+        )
+        assert compiled == expected, (
+            f'Проверьте, что скомпилированный `{serializer_class.__name__}` '
+            'выдает те же байты, что и обычный.'
+        )
+
+    def test_parity_sparse_fields(self, data):
+        expected, compiled = self.render_both(
+            serializers.PostSerializer, Post.objects.order_by('id'),
+            fields=['pub_date', 'image', 'author']
+        )
+        assert compiled == expected
+
+    def test_not_compiled(self):
+        class MethodSerializer(serializers.PostSerializer):
+            length = drf_serializers.SerializerMethodField()
+
+            class Meta(serializers.PostSerializer.Meta):
+                fields = ['id', 'length']
+
+            def get_length(self, post):
+                return len(post.text)
+
+        class OverrideSerializer(serializers.GroupSerializer):
+            def to_representation(self, instance):
+                return {'title': instance.title.upper()}
+
+        class NestedSerializer(serializers.PostSerializer):
+            group = serializers.GroupSerializer(read_only=True)
+
+        for serializer_class in (MethodSerializer, OverrideSerializer,
+                                 NestedSerializer):
+            assert compile_serializer(serializer_class()) is None, (
+                'Проверьте, что сериализаторы, которые нельзя собрать '
+                'из values(), не компилируются.'
+            )
+
+    def test_api_parity(self, client, data, monkeypatch):
+        from api.views import CommentViewSet, PostViewSet
+
+        urls = (
+            self.post_list_url,
+            f'{self.post_list_url}?limit=2',
+            f'{self.post_list_url}?cursor=&limit=2',
+            self.comments_url.format(post_id=data[0].id),
+        )
+        compiled = [client.get(url).content for url in urls]
+        for viewset in (CommentViewSet, PostViewSet):
+            monkeypatch.setattr(viewset, 'compiled_actions', ())
+        # Обходим кеш ответов, чтобы сравнить с настоящим выводом DRF
+        cache.clear()
+        expected = [client.get(url).content for url in urls]
+        assert compiled == expected, (
+            'Проверьте, что ответы API со скомпилированными '
+            'сериализаторами не отличаются от обычных.'
+        )
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+
+from posts.models import Comment
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalRequests:
+
+    post_detail_url = '/api/v1/posts/{post_id}/'
+    comments_url = '/api/v1/posts/{post_id}/comments/'
+    comment_detail_url = '/api/v1/posts/{post_id}/comments/{comment_id}/'
+
+    # Запрос пользователя по токену и запрос валидатора
+    NOT_MODIFIED_QUERIES = 2
+
+    def test_post_detail_not_modified(self, user_client, post,
+                                      django_assert_max_num_queries):
+        url = self.post_detail_url.format(post_id=post.id)
+        response = user_client.get(url)
+        assert response.has_header('ETag'), (
+            f'Проверьте, что ответ на GET-запрос к `{self.post_detail_url}` '
+            'содержит заголовок `ETag`.'
+        )
+        with django_assert_max_num_queries(self.NOT_MODIFIED_QUERIES):
+            response = user_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что на запрос с актуальным `If-None-Match` '
+            f'к `{self.post_detail_url}` возвращается ответ 304.'
+        )
+
+    def test_post_detail_etag_changes(self, user_client, post):
+        url = self.post_detail_url.format(post_id=post.id)
+        etag = user_client.get(url)['ETag']
+        user_client.patch(url, data={'text': 'Новый текст'})
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения поста ETag страницы '
+            'поста меняется.'
+        )
+        assert response.json()['text'] == 'Новый текст'
+
+    def test_post_detail_etag_changes_on_group_delete(self, user_client,
+                                                      post, group_1):
+        url = self.post_detail_url.format(post_id=post.id)
+        etag = user_client.get(url)['ETag']
+        group_1.delete()
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['group'] is None
+
+    def test_missing_post(self, user_client, post):
+        url = self.post_detail_url.format(post_id=post.id + 1)
+        response = user_client.get(url, HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_comments_not_modified(self, user_client, post, comment_1_post,
+                                   django_assert_max_num_queries):
+        url = self.comments_url.format(post_id=post.id)
+        response = user_client.get(url)
+        with django_assert_max_num_queries(self.NOT_MODIFIED_QUERIES):
+            response = user_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что на запрос с актуальным `If-None-Match` '
+            f'к `{self.comments_url}` возвращается ответ 304.'
+        )
+
+    def test_comments_etag_changes(self, user_client, user, post,
+                                   comment_1_post, comment_2_post):
+        url = self.comments_url.format(post_id=post.id)
+
+        def is_modified(etag):
+            response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            return response.status_code == HTTPStatus.OK
+
+        etag = user_client.get(url)['ETag']
+        Comment.objects.create(author=user, post=post, text='Новый')
+        assert is_modified(etag), (
+            'Проверьте, что новый комментарий меняет ETag списка '
+            'комментариев.'
+        )
+
+        etag = user_client.get(url)['ETag']
+        user_client.patch(
+            self.comment_detail_url.format(
+                post_id=post.id, comment_id=comment_1_post.id
+            ),
+            data={'text': 'Измененный'}
+        )
+        assert is_modified(etag), (
+            'Проверьте, что изменение комментария меняет ETag списка '
+            'комментариев.'
+        )
+
+        etag = user_client.get(url)['ETag']
+        comment_2_post.delete()
+        assert is_modified(etag), (
+            'Проверьте, что удаление комментария меняет ETag списка '
+            'комментариев.'
+        )
+
+    def test_comments_missing_post(self, user_client):
+        url = self.comments_url.format(post_id=1)
+        response = user_client.get(url, HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == HTTPStatus.NOT_FOUND
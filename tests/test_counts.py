@@ -0,0 +1,129 @@
+import pytest
+from django.db import connection, transaction
+
+from api.counts import (
+    CachedCount, EstimatedCount, ExactCount, estimate_table_rows,
+    invalidate_counts
+)
+from posts.models import Post
+
+
+def insert_post_silently(author):
+    """Вставляет пост в обход ORM, чтобы не сработали сигналы."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {Post._meta.db_table} '
+            '(text, pub_date, updated, author_id, image, image_variants, '
+            'fanned_out, comments_count) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s, %s)',
+            ['Тихий пост', '2020-01-01 00:00:00', '2020-01-01 00:00:00',
+             author.id, '', '{}', False, 0]
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCountStrategies:
+
+    post_list_url = '/api/v1/posts/?limit=1'
+
+    def test_exact_count(self, post, another_post):
+        assert ExactCount().count(Post.objects.all()) == 2
+
+    def test_cached_count_invalidated_by_signals(self, user, post):
+        strategy = CachedCount()
+        assert strategy.count(Post.objects.all()) == 1
+
+        insert_post_silently(user)
+        assert strategy.count(Post.objects.all()) == 1, (
+            'Проверьте, что `CachedCount` берет количество из кеша.'
+        )
+
+        Post.objects.create(text='Новый пост', author=user)
+        assert strategy.count(Post.objects.all()) == 3, (
+            'Проверьте, что создание поста сбрасывает кеш количества.'
+        )
+
+        Post.objects.filter(text='Новый пост').get().delete()
+        assert strategy.count(Post.objects.all()) == 2, (
+            'Проверьте, что удаление поста сбрасывает кеш количества.'
+        )
+
+    def test_cached_count_respects_filters(self, user, post, another_post):
+        strategy = CachedCount()
+        assert strategy.count(Post.objects.filter(author=user)) == 1
+        assert strategy.count(Post.objects.all()) == 2
+
+    def test_estimated_count_uses_statistics(self, user, post, another_post):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        strategy = EstimatedCount(threshold=1)
+        insert_post_silently(user)
+        assert strategy.count(Post.objects.all()) == 2, (
+            'Проверьте, что для больших таблиц `EstimatedCount` берет '
+            'оценку из статистики СУБД.'
+        )
+        assert strategy.count(Post.objects.filter(author=user)) == 2, (
+            'Проверьте, что для отфильтрованной выборки `EstimatedCount` '
+            'считает количество точно.'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='Статистика индексов хранится в sqlite_stat1 только в SQLite'
+    )
+    def test_estimate_ignores_partial_indexes(self, user):
+        for _ in range(10):
+            insert_post_silently(user)
+        pending = Post.objects.values_list('id', flat=True)[:3]
+        Post.objects.exclude(id__in=list(pending)).update(fanned_out=True)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            # Порядок строк sqlite_stat1 не определен: ставим строку
+            # частичного индекса первой
+            cursor.execute(
+                'SELECT tbl, idx, stat FROM sqlite_stat1 WHERE tbl = %s '
+                'ORDER BY idx = %s DESC',
+                [Post._meta.db_table, 'post_pending_fanout_idx']
+            )
+            rows = cursor.fetchall()
+            cursor.execute(
+                'DELETE FROM sqlite_stat1 WHERE tbl = %s',
+                [Post._meta.db_table]
+            )
+            cursor.executemany(
+                'INSERT INTO sqlite_stat1 (tbl, idx, stat) '
+                'VALUES (%s, %s, %s)',
+                rows
+            )
+        assert estimate_table_rows(Post) == 10, (
+            'Проверьте, что оценка числа строк не берется из статистики '
+            'частичного индекса.'
+        )
+
+    def test_invalidate_counts_after_commit(self, user, post):
+        strategy = CachedCount()
+        assert strategy.count(Post.objects.all()) == 1
+        with transaction.atomic():
+            insert_post_silently(user)
+            invalidate_counts(Post)
+            assert strategy.count(Post.objects.all()) == 1, (
+                'Проверьте, что кеш количества сбрасывается только после '
+                'фиксации транзакции.'
+            )
+        assert strategy.count(Post.objects.all()) == 2, (
+            'Проверьте, что после фиксации транзакции кеш количества '
+            'сброшен.'
+        )
+
+    def test_estimated_count_small_table(self, user, post):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        insert_post_silently(user)
+        assert EstimatedCount().count(Post.objects.all()) == 2, (
+            'Проверьте, что для небольших таблиц `EstimatedCount` считает '
+            'количество точно.'
+        )
+
+    def test_count_in_paginated_response(self, client, post, another_post):
+        response = client.get(self.post_list_url)
+        assert response.json()['count'] == Post.objects.count()
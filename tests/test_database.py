@@ -0,0 +1,97 @@
+import os
+
+import pytest
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from posts import database
+
+PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 1024 * 1024,
+    'busy_timeout': 1234,
+}
+
+
+@pytest.fixture
+def make_connection(tmp_path, django_db_blocker):
+    # Отдельные файлы базы вне тестовой БД
+    opened = []
+
+    def make(name='db.sqlite3'):
+        settings_dict = {
+            **connections['default'].settings_dict,
+            'NAME': str(tmp_path / name),
+        }
+        connection = DatabaseWrapper(settings_dict, alias='tuning')
+        connection.ensure_connection()
+        opened.append(connection)
+        return connection
+
+    with django_db_blocker.unblock():
+        yield make
+        for connection in opened:
+            connection.close()
+
+
+def pragma(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class TestSQLitePragmas:
+
+    def test_production_pragmas(self, settings, make_connection):
+        settings.DATABASE_TUNING = {'SQLITE_PRAGMAS': PRAGMAS}
+        connection = make_connection()
+        assert pragma(connection, 'journal_mode') == 'wal', (
+            'Проверьте, что при создании соединения включается режим WAL.'
+        )
+        assert pragma(connection, 'synchronous') == 1
+        assert pragma(connection, 'mmap_size') == 1024 * 1024
+        assert pragma(connection, 'busy_timeout') == 1234
+
+    def test_development_defaults(self, settings, make_connection):
+        settings.DATABASE_TUNING = {}
+        connection = make_connection()
+        assert pragma(connection, 'journal_mode') == 'delete', (
+            'Проверьте, что без профиля production настройки SQLite '
+            'не меняются.'
+        )
+
+
+class TestHealthChecks:
+
+    def test_replaced_file_detected(self, make_connection, tmp_path):
+        connection = make_connection()
+        assert database.check_connection(connection)
+        assert connection.connection is not None
+
+        os.remove(tmp_path / 'db.sqlite3')
+        (tmp_path / 'db.sqlite3').write_bytes(b'')
+        assert not database.check_connection(connection), (
+            'Проверьте, что соединение со старым файлом базы считается '
+            'устаревшим.'
+        )
+        assert connection.connection is None
+        connection.ensure_connection()
+        assert database.check_connection(connection)
+
+    def test_checks_on_request_start(self, settings, make_connection,
+                                     tmp_path, monkeypatch):
+        connection = make_connection()
+        monkeypatch.setattr(
+            database.connections, 'all', lambda: [connection]
+        )
+        os.remove(tmp_path / 'db.sqlite3')
+
+        settings.DATABASE_TUNING = {}
+        database.close_stale_connections()
+        assert connection.connection is not None, (
+            'Проверьте, что без HEALTH_CHECKS соединения не проверяются.'
+        )
+        settings.DATABASE_TUNING = {'HEALTH_CHECKS': True}
+        database.close_stale_connections()
+        assert connection.connection is None
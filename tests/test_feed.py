@@ -0,0 +1,160 @@
+from http import HTTPStatus
+
+import pytest
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedAPI:
+
+    url = '/api/v1/feed/'
+
+    def test_feed_not_auth(self, client):
+        response = client.get(self.url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{self.url}` возвращает ответ со статусом 401.'
+        )
+
+    def test_feed_contains_only_followed_authors(self, user_client, user,
+                                                 user_2, another_user,
+                                                 follow_1, post,
+                                                 another_post):
+        own_post = post
+        followed_post = another_post
+        Post.objects.create(text='Пост без подписки', author=user_2)
+
+        response = user_client.get(self.url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос авторизованного пользователя к '
+            f'`{self.url}` возвращает ответ со статусом 200.'
+        )
+        test_data = response.json()
+        for field in ('next', 'previous', 'results'):
+            assert field in test_data
+        ids = [item['id'] for item in test_data['results']]
+        assert ids == [followed_post.id], (
+            f'Проверьте, что ответ на GET-запрос к `{self.url}` содержит '
+            'только посты авторов, на которых подписан пользователь.'
+        )
+        assert own_post.id not in ids
+
+    def test_feed_ordering_and_pages(self, user_client, user, user_2,
+                                     another_user, follow_1, follow_5):
+        for number in range(5):
+            Post.objects.create(text=f'Пост {number}', author=another_user)
+            Post.objects.create(text=f'Пост {number}', author=user_2)
+        expected = list(
+            Post.objects.filter(author__in=(another_user, user_2))
+            .values_list('id', flat=True)
+        )
+
+        url = f'{self.url}?limit=3'
+        received = []
+        while url:
+            response = user_client.get(url)
+            received.extend(item['id'] for item in response.json()['results'])
+            url = response.json()['next']
+        assert received == expected, (
+            f'Проверьте, что лента `{self.url}` отсортирована по дате '
+            'публикации и листается по ссылкам `next` без пропусков.'
+        )
+
+    def test_feed_many_follows(self, user_client, user, user_2,
+                               another_user, follow_1, follow_5,
+                               monkeypatch):
+        from api.views import FeedViewSet
+
+        monkeypatch.setattr(FeedViewSet, 'scan_threshold', 1)
+        Post.objects.create(text='Пост', author=another_user)
+        Post.objects.create(text='Пост', author=user)
+        expected = list(
+            Post.objects.filter(author__in=(another_user, user_2))
+            .values_list('id', flat=True)
+        )
+        response = user_client.get(self.url)
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == expected, (
+            'Проверьте, что лента для пользователя с большим числом '
+            'подписок содержит те же посты.'
+        )
+
+    def test_feed_queries(self, user_client, user, another_user,
+                               follow_1, django_assert_num_queries):
+        for number in range(20):
+            Post.objects.create(text=f'Пост {number}', author=another_user)
+        # Аутентификация, число подписок и сама лента
+        with django_assert_num_queries(3):
+            response = user_client.get(f'{self.url}?limit=20')
+        assert len(response.json()['results']) == 20
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedFanOut:
+
+    url = '/api/v1/feed/'
+    post_list_url = '/api/v1/posts/'
+
+    @pytest.fixture(autouse=True)
+    def enable_fan_out(self, settings):
+        settings.FEED_FANOUT = {
+            'ENABLED': True, 'ASYNC': False, 'CELEBRITY_THRESHOLD': 2
+        }
+
+    def test_post_create_fans_out(self, user_client, user, user_2,
+                                  follow_2):
+        response = user_client.post(self.post_list_url, data={'text': 'Пост'})
+        assert response.status_code == HTTPStatus.CREATED
+        post = Post.objects.get(id=response.json()['id'])
+        assert post.fanned_out, (
+            'Проверьте, что при включенной рассылке созданный пост '
+            'раскладывается в ленты подписчиков.'
+        )
+        assert TimelineEntry.objects.filter(user=user_2, post=post).exists()
+        assert not TimelineEntry.objects.filter(user=user).exists()
+
+    def test_feed_reads_timeline(self, user_client, user, another_user,
+                                 follow_1):
+        post = Post.objects.create(text='Пост', author=another_user)
+        timeline.schedule_fan_out(post)
+        assert TimelineEntry.objects.filter(user=user, post=post).exists()
+
+        response = user_client.get(self.url)
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == [post.id], (
+            f'Проверьте, что при включенной рассылке лента `{self.url}` '
+            'содержит разосланные посты.'
+        )
+
+    def test_celebrity_posts_are_pulled(self, user_client, user, user_2,
+                                        another_user, follow_1, follow_3):
+        post = Post.objects.create(text='Пост', author=another_user)
+        timeline.schedule_fan_out(post)
+        post.refresh_from_db()
+        assert not post.fanned_out, (
+            'Проверьте, что посты авторов с числом подписчиков выше порога '
+            'не рассылаются по лентам.'
+        )
+        assert not TimelineEntry.objects.exists()
+
+        response = user_client.get(self.url)
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == [post.id], (
+            'Проверьте, что посты популярных авторов попадают в ленту '
+            'при чтении.'
+        )
+
+    def test_follow_backfill_and_purge(self, user, another_user):
+        post = Post.objects.create(text='Пост', author=another_user)
+        timeline.schedule_fan_out(post)
+        follow = Follow.objects.create(user=user, following=another_user)
+        assert TimelineEntry.objects.filter(user=user, post=post).exists(), (
+            'Проверьте, что при подписке в ленту добавляются уже '
+            'разосланные посты автора.'
+        )
+        follow.delete()
+        assert not TimelineEntry.objects.filter(user=user).exists(), (
+            'Проверьте, что при отписке посты автора убираются из ленты.'
+        )
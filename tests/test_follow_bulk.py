@@ -0,0 +1,252 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from posts import social_graph, timeline
+from posts.models import Follow, Post, TimelineEntry
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFollowBulk:
+
+    url = '/api/v1/follow/bulk/'
+
+    @pytest.fixture
+    def authors(self, django_user_model):
+        return [
+            django_user_model.objects.create(username=f'author{number}')
+            for number in range(5)
+        ]
+
+    def test_bulk_follow(self, user_client, user, user_2, authors):
+        Follow.objects.create(user=user, following=authors[0])
+        names = [author.username for author in authors]
+        response = user_client.post(self.url, data={
+            'follow': names + [user.username, 'nobody', names[1]]
+        }, format='json')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'follow': {
+            'author0': 'already_following',
+            'author1': 'followed',
+            'author2': 'followed',
+            'author3': 'followed',
+            'author4': 'followed',
+            user.username: 'self',
+            'nobody': 'not_found',
+        }}, (
+            f'Проверьте, что POST-запрос к `{self.url}` возвращает статус '
+            'подписки по каждому имени.'
+        )
+        assert set(
+            Follow.objects.filter(user=user).values_list(
+                'following__username', flat=True
+            )
+        ) == set(names)
+        assert social_graph.get_counts(user.id) == (0, 5), (
+            'Проверьте, что массовая подписка обновляет счетчики подписок.'
+        )
+        assert social_graph.get_followers_count(authors[1].id) == 1
+
+    def test_bulk_follow_queries(self, user_client, user_2, authors):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        other_client = APIClient()
+        token = RefreshToken.for_user(user_2).access_token
+        other_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        def count_queries(client, names):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(
+                    self.url, data={'follow': names}, format='json'
+                )
+            assert response.status_code == HTTPStatus.OK
+            return len(context.captured_queries)
+
+        one = count_queries(user_client, ['author0'])
+        many = count_queries(
+            other_client, [author.username for author in authors[1:]]
+        )
+        assert one == many, (
+            'Проверьте, что число запросов массовой подписки не зависит '
+            'от числа имен.'
+        )
+
+    def test_bulk_unfollow(self, user_client, user, user_2, authors):
+        for author in authors[:3]:
+            Follow.objects.create(user=user, following=author)
+        Follow.objects.create(user=user_2, following=authors[0])
+        social_graph.is_following(user.id, authors[0].id)
+
+        response = user_client.post(self.url, data={
+            'unfollow': ['author0', 'author1', 'author4', 'nobody'],
+            'follow': ['author3'],
+        }, format='json')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            'follow': {'author3': 'followed'},
+            'unfollow': {
+                'author0': 'unfollowed',
+                'author1': 'unfollowed',
+                'author4': 'not_following',
+                'nobody': 'not_found',
+            },
+        }
+        assert set(
+            Follow.objects.filter(user=user).values_list(
+                'following__username', flat=True
+            )
+        ) == {'author2', 'author3'}, (
+            'Проверьте, что массовая отписка удаляет подписки.'
+        )
+        assert Follow.objects.filter(user=user_2).count() == 1
+        assert social_graph.get_counts(user.id) == (0, 2)
+        assert social_graph.get_followers_count(authors[0].id) == 1
+        assert not social_graph.is_following(user.id, authors[0].id), (
+            'Проверьте, что массовая отписка сбрасывает кеш подписок.'
+        )
+
+    def test_bulk_updates_timeline(self, user_client, user, authors,
+                                   settings):
+        settings.FEED_FANOUT = {'ENABLED': True, 'ASYNC': False}
+        post = Post.objects.create(text='Пост', author=authors[0])
+        timeline.fan_out_posts([post.id])
+
+        user_client.post(
+            self.url, data={'follow': ['author0']}, format='json'
+        )
+        assert TimelineEntry.objects.filter(user=user, post=post).exists(), (
+            'Проверьте, что массовая подписка добавляет посты авторов '
+            'в материализованную ленту.'
+        )
+        user_client.post(
+            self.url, data={'unfollow': ['author0']}, format='json'
+        )
+        assert not TimelineEntry.objects.filter(user=user).exists(), (
+            'Проверьте, что массовая отписка убирает посты авторов из ленты.'
+        )
+
+    @pytest.fixture(params=(False, True), ids=('select', 'returning'))
+    def concurrently(self, request, monkeypatch):
+        """
+        Выполняет действие параллельного запроса до записи подписок.
+        Запись идет с RETURNING, как в PostgreSQL (SQLite понимает его
+        с версии 3.35), или без него, как в SQLite для Django 3.2.
+        """
+        def run(action):
+            resolve = social_graph._resolve
+
+            def resolve_and_act(usernames):
+                authors = resolve(usernames)
+                action()
+                # Вставки через ORM в Django 3.2 не умеют RETURNING
+                # в SQLite, поэтому включаем его только для записи подписок
+                monkeypatch.setattr(
+                    connection.features, 'can_return_columns_from_insert',
+                    request.param
+                )
+                return authors
+
+            monkeypatch.setattr(social_graph, '_resolve', resolve_and_act)
+        return run
+
+    def test_bulk_follow_race(self, user_client, user, authors,
+                              concurrently):
+        concurrently(
+            lambda: Follow.objects.create(user=user, following=authors[1])
+        )
+        response = user_client.post(
+            self.url, data={'follow': ['author0', 'author1']}, format='json'
+        )
+        assert response.json() == {'follow': {
+            'author0': 'followed', 'author1': 'already_following',
+        }}
+        assert Follow.objects.filter(user=user).count() == 2
+        assert social_graph.get_counts(user.id) == (0, 2), (
+            'Проверьте, что массовая подписка не считает подписку, '
+            'которую создал параллельный запрос.'
+        )
+        assert social_graph.get_followers_count(authors[1].id) == 1
+
+    def test_bulk_unfollow_race(self, user_client, user, authors,
+                                concurrently):
+        follows = [
+            Follow.objects.create(user=user, following=author)
+            for author in authors[:3]
+        ]
+        concurrently(follows[0].delete)
+        response = user_client.post(
+            self.url, data={'unfollow': ['author0', 'author1']}, format='json'
+        )
+        assert response.json() == {'unfollow': {
+            'author0': 'not_following', 'author1': 'unfollowed',
+        }}
+        assert social_graph.get_counts(user.id) == (0, 1), (
+            'Проверьте, что массовая отписка не считает подписку, '
+            'которую удалил параллельный запрос.'
+        )
+        assert social_graph.get_followers_count(authors[0].id) == 0
+        assert social_graph.get_followers_count(authors[2].id) == 1
+
+    def test_bulk_follow_concurrent(self, django_user_model, authors):
+        users = [
+            django_user_model.objects.create(username=f'reader{number}')
+            for number in range(8)
+        ]
+        names = [author.username for author in authors]
+        start = threading.Barrier(len(users))
+        errors = []
+
+        def client(user):
+            start.wait()
+            try:
+                social_graph.bulk_follow(user.id, names)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=client, args=(user,)) for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, (
+            'Проверьте, что одновременные массовые подписки не падают '
+            'с ошибкой блокировки базы.'
+        )
+        assert Follow.objects.count() == len(users) * len(authors)
+        assert social_graph.get_followers_count(authors[0].id) == len(users)
+
+    @pytest.mark.parametrize('data', (
+        {},
+        {'follow': []},
+        {'follow': ['author0'], 'unfollow': ['author0']},
+        {'follow': 'author0'},
+    ))
+    def test_bulk_invalid(self, user_client, authors, data):
+        response = user_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_bulk_limit(self, user_client, monkeypatch):
+        from api.views import FollowViewSet
+
+        monkeypatch.setattr(FollowViewSet, 'bulk_limit', 2)
+        response = user_client.post(
+            self.url, data={'follow': ['a', 'b', 'c']}, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{self.url}` ограничивает число имен '
+            'в одном запросе.'
+        )
+
+    def test_bulk_not_auth(self, client):
+        response = client.post(
+            self.url, data={'follow': ['a']}, content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts import social_graph
+from posts.models import Follow
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFollowCreate:
+
+    url = '/api/v1/follow/'
+
+    def make_client(self, user):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        client = APIClient()
+        token = RefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_single_statement(self, user_client, user_2):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                self.url, data={'following': user_2.username}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json() == {
+            'user': 'TestUser', 'following': user_2.username
+        }
+        queries = [query['sql'] for query in context.captured_queries]
+        table = f'"{Follow._meta.db_table}"'
+        inserts = [
+            sql for sql in queries
+            if sql.startswith('INSERT') and table in sql.split('(')[0]
+        ]
+        assert len(inserts) == 1, (
+            'Проверьте, что подписка создается одним запросом.'
+        )
+        assert not [
+            sql for sql in queries
+            if '"username" =' in sql and not sql.startswith('INSERT')
+        ], (
+            'Проверьте, что при создании подписки автор и существующая '
+            'подписка не читаются отдельными запросами.'
+        )
+
+    def test_create_errors(self, user_client, user, user_2):
+        response = user_client.post(self.url, data={'following': 'nobody'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        user_client.post(self.url, data={'following': user_2.username})
+        response = user_client.post(
+            self.url, data={'following': user_2.username}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert Follow.objects.filter(user=user).count() == 1
+
+    def test_stale_cache_does_not_block_follow(self, user_client, user,
+                                               user_2):
+        # Кеш другого процесса еще помнит подписку, которой уже нет
+        social_graph.local_cache.set(
+            social_graph._follow_key(user.id, user_2.id), True
+        )
+        response = user_client.post(
+            self.url, data={'following': user_2.username}
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что решение о повторной подписке принимает БД, '
+            'а не кеш.'
+        )
+
+    def test_parallel_follow_requests(self, user_2, django_user_model):
+        followers = [
+            django_user_model.objects.create(username=f'reader{number}')
+            for number in range(50)
+        ]
+        clients = [self.make_client(follower) for follower in followers]
+        # Каждый пользователь подписывается по четыре раза одновременно
+        requests = clients * 4
+
+        def follow(client):
+            try:
+                return client.post(
+                    self.url, data={'following': user_2.username}
+                ).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            statuses = list(executor.map(follow, requests))
+
+        assert statuses.count(HTTPStatus.CREATED) == len(followers), (
+            'Проверьте, что из параллельных запросов на одну подписку '
+            'успешен ровно один.'
+        )
+        assert statuses.count(HTTPStatus.BAD_REQUEST) == (
+            len(requests) - len(followers)
+        ), 'Проверьте, что параллельные повторные подписки дают ответ 400.'
+        assert Follow.objects.filter(following=user_2).count() == len(
+            followers
+        )
+        assert social_graph.get_followers_count(user_2.id) == len(followers)
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+
+from posts.models import Follow
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFollowList:
+
+    url = '/api/v1/follow/'
+
+    # Запрос пользователя по токену и запрос подписок
+    LIST_QUERIES = 2
+    # Повторный запрос: пользователь уже в кеше аутентификации
+    CACHED_LIST_QUERIES = 1
+
+    @pytest.fixture
+    def follows(self, user, django_user_model):
+        authors = [
+            django_user_model.objects.create(username=name)
+            for name in ('alice', 'alina', 'Alex', 'bob', 'albert')
+        ]
+        return Follow.objects.bulk_create(
+            Follow(user=user, following=author) for author in authors
+        )
+
+    def get_names(self, response):
+        data = response.json()
+        if isinstance(data, dict):
+            data = data['results']
+        return [item['following'] for item in data]
+
+    def test_list_queries(self, user_client, user, follows,
+                          django_assert_num_queries):
+        with django_assert_num_queries(self.LIST_QUERIES):
+            response = user_client.get(self.url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()[0] == {
+            'user': user.username, 'following': 'alice'
+        }
+        assert self.get_names(response) == [
+            'alice', 'alina', 'Alex', 'bob', 'albert'
+        ]
+
+    def test_list_serializer_fallback(self, user_client, follows,
+                                      monkeypatch, django_assert_num_queries):
+        from api.serializers import FollowSerializer
+        from api.views import FollowViewSet
+
+        class CustomFollowSerializer(FollowSerializer):
+            pass
+
+        expected = user_client.get(self.url).json()
+        monkeypatch.setattr(
+            FollowViewSet, 'serializer_class', CustomFollowSerializer
+        )
+        with django_assert_num_queries(self.CACHED_LIST_QUERIES):
+            response = user_client.get(self.url)
+        assert response.json() == expected, (
+            'Проверьте, что подписки сериализуются одинаково с быстрым '
+            'путем и без него.'
+        )
+
+    def test_search_modes(self, user_client, follows):
+        response = user_client.get(self.url, {'search': 'al'})
+        assert self.get_names(response) == [
+            'alice', 'alina', 'Alex', 'albert'
+        ]
+        response = user_client.get(
+            self.url, {'search': 'ali', 'search_mode': 'prefix'}
+        )
+        assert self.get_names(response) == ['alice', 'alina'], (
+            'Проверьте, что режим `search_mode=prefix` ищет подписки '
+            'по началу имени автора.'
+        )
+        response = user_client.get(
+            self.url, {'search': 'A', 'search_mode': 'prefix'}
+        )
+        assert self.get_names(response) == ['Alex']
+        response = user_client.get(
+            self.url, {'search': 'al', 'search_mode': 'regex'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_pagination(self, user_client, follows):
+        url = f'{self.url}?limit=2'
+        received = []
+        while url:
+            response = user_client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            received.extend(self.get_names(response))
+            url = response.json()['next']
+        assert received == ['alice', 'alina', 'Alex', 'bob', 'albert'], (
+            f'Проверьте, что при переходе по ссылкам `next` `{self.url}` '
+            'возвращает все подписки.'
+        )
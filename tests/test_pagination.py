@@ -0,0 +1,141 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from posts.models import Comment, Post
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPostKeysetPagination:
+
+    post_list_url = '/api/v1/posts/'
+
+    @pytest.fixture
+    def posts(self, user, group_1):
+        return [
+            Post.objects.create(text=f'Пост {number}', author=user,
+                                group=group_1)
+            for number in range(7)
+        ]
+
+    def get_ids(self, response):
+        return [item['id'] for item in response.json()['results']]
+
+    def test_keyset_envelope(self, client, posts):
+        response = client.get(f'{self.post_list_url}?cursor=&limit=3')
+        assert response.status_code == HTTPStatus.OK
+        test_data = response.json()
+        for field in ('count', 'next', 'previous', 'results'):
+            assert field in test_data, (
+                'Проверьте, что при пагинации по курсору ответ на GET-запрос '
+                f'к `{self.post_list_url}` содержит поле `{field}`.'
+            )
+        assert test_data['previous'] is None
+        assert len(test_data['results']) == 3
+
+    def test_keyset_walks_all_posts(self, client, posts):
+        expected = list(Post.objects.values_list('id', flat=True))
+        url = f'{self.post_list_url}?cursor=&limit=3'
+        received = []
+        while url:
+            response = client.get(url)
+            received.extend(self.get_ids(response))
+            url = response.json()['next']
+        assert received == expected, (
+            'Проверьте, что при переходе по ссылкам `next` пагинация по '
+            'курсору возвращает все посты в порядке `Post.Meta.ordering`.'
+        )
+
+    def test_keyset_stable_under_inserts(self, client, user, posts):
+        response = client.get(f'{self.post_list_url}?cursor=&limit=3')
+        first_page = self.get_ids(response)
+        next_url = response.json()['next']
+        expected = list(
+            Post.objects.values_list('id', flat=True)[3:6]
+        )
+
+        Post.objects.create(text='Новый пост', author=user)
+        response = client.get(next_url)
+        second_page = self.get_ids(response)
+        assert second_page == expected, (
+            'Проверьте, что новые посты не сдвигают страницы при '
+            'пагинации по курсору.'
+        )
+        assert not set(first_page) & set(second_page)
+
+        response = client.get(response.json()['previous'])
+        assert self.get_ids(response) == first_page, (
+            'Проверьте, что ссылка `previous` возвращает предыдущую '
+            'страницу при пагинации по курсору.'
+        )
+
+    def test_keyset_invalid_cursor(self, client, posts):
+        response = client.get(f'{self.post_list_url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что при некорректном курсоре GET-запрос к '
+            f'`{self.post_list_url}` возвращает ответ со статусом 404.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCommentPagination:
+
+    comments_url = '/api/v1/posts/{post_id}/comments/'
+
+    @pytest.fixture
+    def comments(self, post, user):
+        return Comment.objects.bulk_create(
+            Comment(author=user, post=post, text=f'Коммент {number}')
+            for number in range(7)
+        )
+
+    def test_comments_without_params_is_list(self, client, post, comments):
+        response = client.get(self.comments_url.format(post_id=post.id))
+        assert isinstance(response.json(), list), (
+            'Проверьте, что без параметров `limit` и `cursor` GET-запрос к '
+            f'`{self.comments_url}` возвращает список комментариев.'
+        )
+
+    def test_comments_keyset_pages(self, client, post, comments,
+                                   comment_1_another_post):
+        expected = list(
+            Comment.objects.filter(post=post)
+            .order_by('created', 'id').values_list('id', flat=True)
+        )
+        url = self.comments_url.format(post_id=post.id) + '?limit=3'
+        received = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            received.extend(item['id'] for item in response.json()['results'])
+            url = response.json()['next']
+        assert received == expected, (
+            'Проверьте, что при переходе по ссылкам `next` пагинация '
+            f'комментариев к `{self.comments_url}` возвращает все '
+            'комментарии поста в порядке создания.'
+        )
+
+    def test_comments_stream(self, client, post, comments, monkeypatch):
+        from api.views import CommentViewSet
+
+        monkeypatch.setattr(CommentViewSet, 'stream_chunk_size', 3)
+        url = self.comments_url.format(post_id=post.id)
+        expected = client.get(url).json()
+
+        response = client.get(f'{url}?stream=1')
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `stream=1` '
+            'отдает ответ потоком.'
+        )
+        data = json.loads(b''.join(response.streaming_content))
+        assert data == expected, (
+            'Проверьте, что потоковая выдача комментариев совпадает с '
+            'обычной.'
+        )
+
+    def test_comments_stream_empty(self, client, post):
+        url = self.comments_url.format(post_id=post.id)
+        response = client.get(f'{url}?stream=1')
+        assert json.loads(b''.join(response.streaming_content)) == []
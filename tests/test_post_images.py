@@ -0,0 +1,164 @@
+from http import HTTPStatus
+from io import BytesIO
+
+import pytest
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from posts.models import Post
+
+ORIENTATION = 0x0112
+GPS_INFO = 0x8825
+
+
+def make_image(size=(2000, 1000), image_format='JPEG', orientation=None):
+    image = Image.new('RGB', size, (200, 30, 30))
+    exif = Image.Exif()
+    exif[GPS_INFO] = {1: 'N'}
+    if orientation:
+        exif[ORIENTATION] = orientation
+    buffer = BytesIO()
+    image.save(buffer, image_format, exif=exif.tobytes())
+    extension = 'jpg' if image_format == 'JPEG' else image_format.lower()
+    return SimpleUploadedFile(
+        f'photo.{extension}', buffer.getvalue(),
+        content_type=f'image/{image_format.lower()}'
+    )
+
+
+def open_stored(name):
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+        return image
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPostImages:
+
+    post_list_url = '/api/v1/posts/'
+    post_detail_url = '/api/v1/posts/{post_id}/'
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+
+    def create(self, client, image):
+        response = client.post(
+            self.post_list_url, data={'text': 'Пост', 'image': image},
+            format='multipart'
+        )
+        assert response.status_code == HTTPStatus.CREATED, response.json()
+        return Post.objects.get(pk=response.json()['id'])
+
+    def test_variants_created(self, user_client):
+        post = self.create(user_client, make_image())
+        sizes = post.image_variants['sizes']
+        assert post.image_variants['format'] == 'jpeg'
+        assert set(sizes) == {'original', 'small', 'medium', 'large'}, (
+            'Проверьте, что при загрузке картинки создаются ее копии '
+            'всех размеров.'
+        )
+        for size, pixels in (('small', 320), ('medium', 800),
+                             ('large', 1600)):
+            assert set(sizes[size]) == {'jpeg', 'webp'}
+            thumbnail = open_stored(sizes[size]['jpeg'])
+            assert thumbnail.size == (pixels, pixels // 2)
+            assert open_stored(sizes[size]['webp']).format == 'WEBP'
+        assert open_stored(sizes['original']['webp']).size == (2000, 1000)
+        assert sizes['original']['jpeg'] == post.image.name
+
+    def test_metadata_stripped(self, user_client):
+        post = self.create(user_client, make_image(orientation=6))
+        original = open_stored(post.image.name)
+        assert not original.getexif(), (
+            'Проверьте, что из картинки удаляются метаданные EXIF.'
+        )
+        assert original.size == (1000, 2000), (
+            'Проверьте, что поворот из EXIF применяется к самой картинке.'
+        )
+        small = post.image_variants['sizes']['small']['jpeg']
+        assert open_stored(small).size == (160, 320)
+
+    def test_small_image(self, user_client):
+        post = self.create(
+            user_client, make_image(size=(500, 300), image_format='PNG')
+        )
+        assert set(post.image_variants['sizes']) == {'original', 'small'}, (
+            'Проверьте, что копии крупнее оригинала не создаются.'
+        )
+        response = user_client.get(
+            self.post_detail_url.format(post_id=post.id),
+            {'image_size': 'large'}
+        )
+        assert response.json()['image'].endswith(post.image.name)
+
+    def test_size_selected_by_query(self, client, user_client):
+        post = self.create(user_client, make_image())
+        url = self.post_detail_url.format(post_id=post.id)
+        variants = post.image_variants['sizes']
+        cases = (
+            ({}, post.image.name),
+            ({'image_size': 'small'}, variants['small']['jpeg']),
+            ({'image_size': 'small', 'image_format': 'webp'},
+             variants['small']['webp']),
+            ({'image_format': 'webp'}, variants['original']['webp']),
+            ({'image_size': 'huge'}, post.image.name),
+        )
+        for params, name in cases:
+            response = client.get(url, params)
+            assert response.json()['image'] == (
+                f'http://testserver/media/{name}'
+            ), (
+                'Проверьте, что параметры `image_size` и `image_format` '
+                'выбирают копию картинки.'
+            )
+        response = client.get(
+            self.post_list_url, {'image_size': 'medium', 'fields': 'image'}
+        )
+        assert response.json() == [
+            {'image': f'http://testserver/media/{variants["medium"]["jpeg"]}'}
+        ]
+
+    def test_list_parity(self, client, user_client, user, monkeypatch):
+        from api.views import PostViewSet
+
+        self.create(user_client, make_image())
+        Post.objects.create(text='Без картинки', author=user)
+        url = f'{self.post_list_url}?image_size=small&image_format=webp'
+        compiled = client.get(url).content
+        monkeypatch.setattr(PostViewSet, 'compiled_actions', ())
+        cache.clear()
+        assert client.get(url).content == compiled
+
+    def test_dimensions_limit(self, user_client, settings):
+        settings.POST_IMAGES = {'MAX_WIDTH': 1000, 'MAX_HEIGHT': 1000}
+        response = user_client.post(
+            self.post_list_url,
+            data={'text': 'Пост', 'image': make_image()}, format='multipart'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что слишком большие картинки не принимаются.'
+        )
+        assert 'image' in response.json()
+        assert not Post.objects.exists()
+
+    def test_image_replaced(self, user_client):
+        post = self.create(user_client, make_image())
+        response = user_client.patch(
+            self.post_detail_url.format(post_id=post.id),
+            data={'image': make_image(size=(400, 400))}, format='multipart'
+        )
+        assert response.status_code == HTTPStatus.OK
+        post.refresh_from_db()
+        assert set(post.image_variants['sizes']) == {'original', 'small'}
+        response = user_client.patch(
+            self.post_detail_url.format(post_id=post.id),
+            data={'text': 'Новый текст'}, format='json'
+        )
+        post.refresh_from_db()
+        assert set(post.image_variants['sizes']) == {'original', 'small'}, (
+            'Проверьте, что изменение поста без картинки не трогает копии.'
+        )
@@ -0,0 +1,146 @@
+from http import HTTPStatus
+
+import pytest
+
+from posts.models import Post
+
+
+def create_posts(author, group, count):
+    return Post.objects.bulk_create(
+        Post(text=f'Пост номер {number}', author=author, group=group)
+        for number in range(count)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPostQueries:
+
+    post_list_url = '/api/v1/posts/'
+    post_detail_url = '/api/v1/posts/{post_id}/'
+
+    # Количество запросов к БД не должно зависеть от размера страницы
+    LIST_QUERIES = 1
+    LIST_PAGINATED_QUERIES = 1
+    # Запрос ETag по времени изменения и запрос самого поста
+    DETAIL_QUERIES = 2
+
+    @pytest.mark.parametrize('posts_count', (1, 10, 50))
+    def test_post_list_queries(self, client, user, group_1, posts_count,
+                               django_assert_num_queries):
+        create_posts(user, group_1, posts_count)
+        with django_assert_num_queries(self.LIST_QUERIES):
+            response = client.get(self.post_list_url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()) == posts_count, (
+            f'Проверьте, что GET-запрос к `{self.post_list_url}` '
+            'возвращает все посты.'
+        )
+
+    @pytest.mark.parametrize('limit', (1, 10, 50))
+    def test_post_list_paginated_queries(self, client, user, group_1, limit,
+                                         django_assert_num_queries):
+        create_posts(user, group_1, 50)
+        # Первый запрос прогревает кеш количества постов, второй
+        # отличается параметрами, чтобы не попасть в кеш ответов
+        client.get(f'{self.post_list_url}?limit={limit}')
+        with django_assert_num_queries(self.LIST_PAGINATED_QUERIES):
+            response = client.get(
+                f'{self.post_list_url}?limit={limit}&offset=0'
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['results']) == limit
+
+    def test_post_detail_queries(self, client, post,
+                                 django_assert_num_queries):
+        with django_assert_num_queries(self.DETAIL_QUERIES):
+            response = client.get(self.post_detail_url.format(post_id=post.id))
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['author'] == post.author.username
+        assert response.json()['group'] == post.group_id
+
+    def test_post_list_without_group(self, client, user):
+        create_posts(user, None, 3)
+        response = client.get(self.post_list_url)
+        assert all(item['group'] is None for item in response.json()), (
+            'Проверьте, что для поста без группы поле `group` равно `None`.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCommentQueries:
+
+    comments_url = '/api/v1/posts/{post_id}/comments/'
+    comment_detail_url = '/api/v1/posts/{post_id}/comments/{comment_id}/'
+
+    # Запрос ETag и запрос комментариев вместе с авторами
+    LIST_QUERIES = 2
+    # Для пустого списка добавляется проверка, что пост существует
+    EMPTY_LIST_QUERIES = 3
+    RETRIEVE_QUERIES = 1
+    # Запрос пользователя по токену, BEGIN, счетчик комментариев
+    # и вставка: поста отдельным запросом не читаем
+    CREATE_QUERIES = 4
+    # Запрос пользователя, комментарий с автором и изменение
+    UPDATE_QUERIES = 3
+    # Запрос пользователя, комментарий с автором, BEGIN, удаление и счетчик
+    DESTROY_QUERIES = 5
+
+    def test_list_queries(self, client, post, comment_1_post,
+                          comment_2_post, django_assert_num_queries):
+        with django_assert_num_queries(self.LIST_QUERIES):
+            response = client.get(self.comments_url.format(post_id=post.id))
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()) == 2
+
+    def test_empty_list_queries(self, client, post,
+                                django_assert_num_queries):
+        with django_assert_num_queries(self.EMPTY_LIST_QUERIES):
+            response = client.get(self.comments_url.format(post_id=post.id))
+        assert response.json() == []
+        response = client.get(self.comments_url.format(post_id=100500))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_retrieve_queries(self, client, post, comment_1_post,
+                              django_assert_num_queries):
+        with django_assert_num_queries(self.RETRIEVE_QUERIES):
+            response = client.get(self.comment_detail_url.format(
+                post_id=post.id, comment_id=comment_1_post.id
+            ))
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['author'] == comment_1_post.author.username
+
+    def test_create_queries(self, user_client, user, post,
+                            django_assert_num_queries):
+        with django_assert_num_queries(self.CREATE_QUERIES):
+            response = user_client.post(
+                self.comments_url.format(post_id=post.id),
+                data={'text': 'Комментарий'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['post'] == post.id
+        assert response.json()['author'] == user.username
+
+        response = user_client.post(
+            self.comments_url.format(post_id=100500),
+            data={'text': 'Комментарий'}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_update_queries(self, user_client, post, comment_1_post,
+                            django_assert_num_queries):
+        with django_assert_num_queries(self.UPDATE_QUERIES):
+            response = user_client.patch(
+                self.comment_detail_url.format(
+                    post_id=post.id, comment_id=comment_1_post.id
+                ),
+                data={'text': 'Новый текст'}
+            )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_destroy_queries(self, user_client, post, comment_1_post,
+                             django_assert_num_queries):
+        with django_assert_num_queries(self.DESTROY_QUERIES):
+            response = user_client.delete(self.comment_detail_url.format(
+                post_id=post.id, comment_id=comment_1_post.id
+            ))
+        assert response.status_code == HTTPStatus.NO_CONTENT
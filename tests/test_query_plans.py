@@ -0,0 +1,169 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.conditional import comments_etag
+from posts.models import Comment, Follow, Group, Post
+
+# Полный проход по таблице допустим только для таблиц меньше этого размера
+SEQ_SCAN_ROW_THRESHOLD = 50
+
+SEQ_SCAN_PATTERNS = {
+    # В SQLite полный проход без индекса выглядит как `SCAN <таблица>`
+    'sqlite': re.compile(r'^SCAN (?:TABLE )?(\w+)(?:\s+AS \w+)?$'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+# Запросы к служебным таблицам СУБД (статистика для оценки количества)
+CATALOG_MARKERS = ('sqlite_stat1', 'pg_class', 'information_schema')
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(EXPLAIN_PREFIXES[connection.vendor] + sql, params)
+        # Текст шага плана: в SQLite в последней колонке, в PostgreSQL в первой
+        column = -1 if connection.vendor == 'sqlite' else 0
+        return [row[column] for row in cursor.fetchall()]
+
+
+def table_size(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+        )
+        return cursor.fetchone()[0]
+
+
+def find_seq_scans(queries):
+    """Возвращает полные проходы по большим таблицам в планах запросов."""
+    pattern = SEQ_SCAN_PATTERNS[connection.vendor]
+    tables = set(connection.introspection.table_names())
+    scans = []
+    for query in queries:
+        sql = query['sql']
+        if not sql.startswith('SELECT') or any(
+            marker in sql for marker in CATALOG_MARKERS
+        ):
+            continue
+        # В журнале запросов параметры уже подставлены в текст
+        for step in explain(sql, ()):
+            match = pattern.search(step.strip())
+            if not match:
+                continue
+            table = match.group(1)
+            if table not in tables:
+                # Псевдоним подзапроса, реальную таблицу не узнать
+                continue
+            if table_size(table) > SEQ_SCAN_ROW_THRESHOLD:
+                scans.append((table, step, sql))
+    return scans
+
+
+@pytest.mark.skipif(
+    connection.vendor not in SEQ_SCAN_PATTERNS,
+    reason='Разбор планов запросов реализован только для SQLite и PostgreSQL'
+)
+@pytest.mark.django_db(transaction=True)
+class TestQueryPlans:
+
+    @pytest.fixture
+    def dataset(self, user, user_2, another_user, group_1, group_2):
+        size = SEQ_SCAN_ROW_THRESHOLD + 10
+        authors = (user, user_2, another_user)
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=authors[number % 3],
+                 group=(group_1, group_2, None)[number % 3])
+            for number in range(size)
+        )
+        post = Post.objects.filter(author=user).first()
+        Comment.objects.bulk_create(
+            Comment(text=f'Коммент {number}', author=authors[number % 3],
+                    post=post)
+            for number in range(size)
+        )
+        follows = [
+            Follow(user=user, following=user_2),
+            Follow(user=user, following=another_user),
+        ]
+        for number in range(size):
+            follower = type(user).objects.create(username=f'follower{number}')
+            follows.append(Follow(user=follower, following=user))
+        Follow.objects.bulk_create(follows)
+        # Статистика могла остаться от других тестов, обновляем ее,
+        # чтобы планировщик видел реальные размеры таблиц
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return post
+
+    def check_endpoint(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, url
+        scans = find_seq_scans(context.captured_queries)
+        assert not scans, (
+            f'Проверьте индексы: запросы эндпоинта `{url}` читают большие '
+            'таблицы целиком:\n' + '\n'.join(
+                f'{table}: {step}\n  {sql}' for table, step, sql in scans
+            )
+        )
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/posts/',
+        '/api/v1/posts/?limit=10&offset=20',
+        '/api/v1/posts/?cursor=&limit=10',
+        '/api/v1/groups/',
+    ))
+    def test_public_endpoints(self, client, dataset, url):
+        self.check_endpoint(client, url)
+
+    def test_post_detail(self, client, dataset):
+        self.check_endpoint(client, f'/api/v1/posts/{dataset.id}/')
+
+    @pytest.mark.parametrize('suffix', ('', '?limit=10', '?stream=1'))
+    def test_comments(self, client, dataset, suffix):
+        self.check_endpoint(
+            client, f'/api/v1/posts/{dataset.id}/comments/{suffix}'
+        )
+
+    def test_comments_next_page(self, client, dataset):
+        url = f'/api/v1/posts/{dataset.id}/comments/?limit=10'
+        next_url = client.get(url).json()['next']
+        self.check_endpoint(client, next_url)
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/follow/',
+        '/api/v1/follow/?search=Another',
+        '/api/v1/follow/?search=Another&search_mode=prefix',
+        '/api/v1/feed/',
+    ))
+    def test_user_endpoints(self, user_client, dataset, url):
+        self.check_endpoint(user_client, url)
+
+    def test_feed_next_page(self, user_client, dataset):
+        next_url = user_client.get('/api/v1/feed/?limit=5').json()['next']
+        self.check_endpoint(user_client, next_url)
+
+    def test_groups_are_small(self, dataset):
+        assert Group.objects.count() <= SEQ_SCAN_ROW_THRESHOLD
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='Покрывающие индексы в плане проверяются только для SQLite'
+    )
+    def test_comments_etag_reads_only_indexes(self, dataset):
+        with CaptureQueriesContext(connection) as context:
+            comments_etag(None, post_id=dataset.id)
+        steps = [
+            step for query in context.captured_queries
+            for step in explain(query['sql'], ())
+            if Comment._meta.db_table in step or ' U0 ' in step
+        ]
+        assert steps and all('COVERING INDEX' in step for step in steps), (
+            'Проверьте, что ETag списка комментариев считается по индексам '
+            'без чтения таблицы комментариев:\n' + '\n'.join(steps)
+        )
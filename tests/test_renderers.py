@@ -0,0 +1,106 @@
+import io
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import parsers, renderers
+from posts.models import Post
+
+DATA = {
+    'text': 'Текст поста с “кавычками” и эмодзи 😊',
+    'separators': 'строка\u2028абзац\u2029',
+    'pub_date': datetime(2022, 5, 1, 12, 30, 15, 123456,
+                         tzinfo=timezone.utc),
+    'naive': datetime(2022, 5, 1, 12, 30),
+    'day': date(2022, 5, 1),
+    'price': Decimal('10.50'),
+    'lazy': gettext_lazy('Публикация'),
+    'items': [1, None, True, {'вложенный': [2.5]}],
+    1: 'числовой ключ',
+}
+
+
+class TestORJSONRenderer:
+
+    def test_same_bytes_as_drf(self):
+        assert renderers.orjson is not None
+        assert renderers.ORJSONRenderer().render(DATA) == (
+            JSONRenderer().render(DATA)
+        ), 'Проверьте, что ORJSONRenderer выдает те же байты, что и DRF.'
+
+    def test_fallback_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert renderers.ORJSONRenderer().render(DATA) == (
+            JSONRenderer().render(DATA)
+        ), 'Проверьте, что без orjson рендерер работает через json.'
+
+    def test_indent_and_empty(self):
+        renderer = renderers.ORJSONRenderer()
+        media_type = 'application/json; indent=4'
+        assert renderer.render({'a': [1]}, media_type) == (
+            JSONRenderer().render({'a': [1]}, media_type)
+        )
+        assert renderer.render(None) == b''
+
+
+@pytest.mark.django_db(transaction=True)
+class TestORJSONApi:
+
+    post_list_url = '/api/v1/posts/'
+
+    def test_response(self, client, post):
+        Post.objects.filter(pk=post.pk).update(image='posts/pic.jpg')
+        response = client.get(self.post_list_url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'application/json'
+        assert isinstance(
+            response.accepted_renderer, renderers.ORJSONRenderer
+        ), 'Проверьте, что API по умолчанию отдает JSON через orjson.'
+        assert response.content == JSONRenderer().render(response.data)
+        item = response.json()[0]
+        assert item['image'] == 'http://testserver/media/posts/pic.jpg'
+        assert item['pub_date'].endswith('Z')
+
+    def test_request_parsing(self, user_client):
+        response = user_client.post(
+            self.post_list_url, data={'text': 'Пост на кириллице 😊'},
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert Post.objects.get().text == 'Пост на кириллице 😊'
+
+        response = user_client.post(
+            self.post_list_url, data='{"text": ',
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'JSON parse error' in response.json()['detail']
+
+
+class TestORJSONParser:
+
+    @pytest.mark.parametrize('body', (
+        '{"text": "Кириллица", "items": [1, 2.5, null]}'.encode(),
+        b'{"value": NaN}',
+        b'{"broken": ',
+    ))
+    @pytest.mark.parametrize('accelerated', (True, False))
+    def test_same_result_as_drf(self, body, accelerated, monkeypatch):
+        if not accelerated:
+            monkeypatch.setattr(parsers, 'orjson', None)
+
+        def parse(parser):
+            try:
+                return parser.parse(io.BytesIO(body))
+            except ParseError:
+                return ParseError
+
+        assert parse(parsers.ORJSONParser()) == parse(JSONParser()), (
+            'Проверьте, что ORJSONParser разбирает тела так же, как DRF.'
+        )
@@ -0,0 +1,201 @@
+import itertools
+import json
+import sqlite3
+from http import HTTPStatus
+
+import pytest
+from django.db import connections, transaction
+
+from posts import replicas
+from posts.models import Comment, Post
+
+# Потоки пула асинхронных представлений хранят свои соединения
+# с репликами, поэтому псевдонимы не повторяются между тестами
+replica_numbers = itertools.count(1)
+
+
+@pytest.fixture
+def make_replica(tmp_path, settings):
+    """
+    Реплики - копии тестовой базы в отдельных файлах SQLite.
+    Изменения основной базы после копирования в них не попадают,
+    как при отставании реплики.
+    """
+    aliases = []
+
+    def make():
+        alias = f'test_replica{next(replica_numbers)}'
+        path = str(tmp_path / f'{alias}.sqlite3')
+        primary = connections['default']
+        primary.ensure_connection()
+        with sqlite3.connect(path) as target:
+            primary.connection.backup(target)
+        connections.settings[alias] = {
+            **primary.settings_dict, 'NAME': path, 'TEST': {}
+        }
+        aliases.append(alias)
+        settings.DATABASE_REPLICAS = {
+            'ALIASES': list(aliases), 'PIN_SECONDS': 60
+        }
+        return alias
+
+    yield make
+    for alias in aliases:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+
+
+def count_posts(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {Post._meta.db_table}')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRouting:
+
+    post_list_url = '/api/v1/posts/'
+
+    def texts(self, client):
+        return {post['text'] for post in client.get(self.post_list_url).json()}
+
+    def test_reads_from_replica(self, client, user, make_replica):
+        Post.objects.create(text='На реплике', author=user)
+        make_replica()
+        Post.objects.create(text='Только в основной', author=user)
+        assert self.texts(client) == {'На реплике'}, (
+            'Проверьте, что список постов читается с реплики.'
+        )
+        assert Post.objects.count() == 2, (
+            'Проверьте, что вне запросов к API чтение идет '
+            'в основную базу.'
+        )
+
+    def test_read_your_writes(self, user_client, user, another_user,
+                              make_replica):
+        from rest_framework.test import APIClient
+
+        Post.objects.create(text='На реплике', author=user)
+        alias = make_replica()
+        other_client = APIClient()
+        other_client.force_authenticate(another_user)
+
+        assert self.texts(user_client) == {'На реплике'}
+        response = user_client.post(
+            self.post_list_url, data={'text': 'Свой пост'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert count_posts(alias) == 1, (
+            'Проверьте, что запись идет только в основную базу.'
+        )
+        assert self.texts(user_client) == {'На реплике', 'Свой пост'}, (
+            'Проверьте, что после изменения пользователь читает '
+            'из основной базы и видит свой пост.'
+        )
+        post_id = response.json()['id']
+        response = user_client.get(f'{self.post_list_url}{post_id}/')
+        assert response.status_code == HTTPStatus.OK
+        assert self.texts(other_client) == {'На реплике'}, (
+            'Проверьте, что закрепление за основной базой действует '
+            'только для пользователя, который изменял данные.'
+        )
+
+    def test_pin_expires(self, user_client, user, make_replica, settings):
+        make_replica()
+        user_client.post(
+            self.post_list_url, data={'text': 'Свой пост'}, format='json'
+        )
+        assert self.texts(user_client) == {'Свой пост'}
+        replicas.cache.delete(replicas._pin_key(user.id))
+        assert self.texts(user_client) == set()
+
+    def test_several_replicas(self, user_client, user, make_replica,
+                              monkeypatch):
+        Post.objects.create(text='Первый', author=user)
+        make_replica()
+        Post.objects.create(text='Второй', author=user)
+        make_replica()
+        # Авторизованные ответы не кешируются
+        monkeypatch.setattr(replicas.random, 'choice', lambda items: items[0])
+        assert self.texts(user_client) == {'Первый'}
+        monkeypatch.setattr(
+            replicas.random, 'choice', lambda items: items[-1]
+        )
+        assert self.texts(user_client) == {'Первый', 'Второй'}
+
+    def test_async_views(self, user_client, user, make_replica, settings):
+        Post.objects.create(text='На реплике', author=user)
+        make_replica()
+        Post.objects.create(text='Только в основной', author=user)
+        settings.ROOT_URLCONF = 'yatube_api.asgi_urls'
+        assert self.texts(user_client) == {'На реплике'}, (
+            'Проверьте, что асинхронные представления тоже читают '
+            'с реплики.'
+        )
+
+    @pytest.mark.parametrize('urlconf', (None, 'yatube_api.asgi_urls'))
+    def test_stream_from_replica(self, client, user, make_replica, settings,
+                                 urlconf):
+        post = Post.objects.create(text='Пост', author=user)
+        Comment.objects.create(text='На реплике', author=user, post=post)
+        make_replica()
+        Comment.objects.create(text='Только в основной', author=user,
+                               post=post)
+        if urlconf:
+            settings.ROOT_URLCONF = urlconf
+        response = client.get(f'/api/v1/posts/{post.id}/comments/?stream=1')
+        comments = json.loads(b''.join(response.streaming_content))
+        assert [comment['text'] for comment in comments] == [
+            'На реплике'
+        ], (
+            'Проверьте, что потоковая выдача комментариев читает '
+            'с реплики, выбранной для запроса.'
+        )
+
+
+class TestReplicaRouter:
+
+    def test_primary_outside_routing(self, settings):
+        settings.DATABASE_REPLICAS = {'ALIASES': ['replica1']}
+        router = replicas.ReplicaRouter()
+        replicas.read_from_replica()
+        assert router.db_for_read(Post) is None
+        with replicas.routing():
+            assert router.db_for_read(Post) is None
+            replicas.read_from_replica()
+            assert router.db_for_read(Post) == 'replica1'
+            assert router.db_for_write(Post) == 'default'
+        assert router.db_for_read(Post) is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_primary_in_transaction(self, settings):
+        settings.DATABASE_REPLICAS = {'ALIASES': ['replica1']}
+        router = replicas.ReplicaRouter()
+        with replicas.routing():
+            replicas.read_from_replica()
+            with transaction.atomic():
+                assert router.db_for_read(Post) is None, (
+                    'Проверьте, что внутри транзакции чтение идет '
+                    'в основную базу.'
+                )
+
+    @pytest.mark.parametrize('backend, warning', (
+        ('django.core.cache.backends.locmem.LocMemCache', 'posts.W001'),
+        ('django.core.cache.backends.dummy.DummyCache', 'posts.W002'),
+        ('django.core.cache.backends.db.DatabaseCache', None),
+    ))
+    def test_pin_cache_check(self, settings, backend, warning):
+        settings.CACHES = {
+            'default': {'BACKEND': backend, 'LOCATION': 'pin_cache'}
+        }
+        settings.DATABASE_REPLICAS = {'ALIASES': []}
+        assert replicas.check_pin_cache(None) == [], (
+            'Проверьте, что без реплик кеш не проверяется.'
+        )
+        settings.DATABASE_REPLICAS = {'ALIASES': ['replica1']}
+        ids = [message.id for message in replicas.check_pin_cache(None)]
+        assert ids == ([warning] if warning else []), (
+            'Проверьте, что при подключенных репликах проверка '
+            'предупреждает о кеше, который не общий для процессов.'
+        )
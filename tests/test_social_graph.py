@@ -0,0 +1,130 @@
+from http import HTTPStatus
+
+import pytest
+
+from posts import social_graph
+from posts.models import Follow, FollowCounts
+
+
+class TestLRUCache:
+
+    def test_evicts_least_recently_used(self):
+        lru = social_graph.LRUCache(maxsize=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        assert lru.get('a') == 1
+        lru.set('c', 3)
+        assert lru.get('b') is None, (
+            'Проверьте, что LRU-кеш вытесняет давно не читанные записи.'
+        )
+        assert lru.get('a') == 1
+        assert lru.get('c') == 3
+
+    def test_expires(self, monkeypatch):
+        lru = social_graph.LRUCache(maxsize=2, ttl=5)
+        now = 1000.0
+        monkeypatch.setattr(social_graph.time, 'monotonic', lambda: now)
+        lru.set('a', False)
+        assert lru.get('a', 'missing') is False
+        now += 10
+        assert lru.get('a', 'missing') == 'missing', (
+            'Проверьте, что записи LRU-кеша устаревают через `ttl` секунд.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSocialGraph:
+
+    follow_url = '/api/v1/follow/'
+    stats_url = '/api/v1/follow/stats/'
+
+    def test_counts_follow_create_and_delete(self, user, user_2,
+                                             another_user):
+        Follow.objects.create(user=user, following=user_2)
+        Follow.objects.create(user=another_user, following=user_2)
+        assert social_graph.get_counts(user_2.id) == (2, 0), (
+            'Проверьте, что создание подписки увеличивает счетчик '
+            'подписчиков автора.'
+        )
+        assert social_graph.get_counts(user.id) == (0, 1)
+
+        Follow.objects.get(user=user, following=user_2).delete()
+        assert social_graph.get_counts(user_2.id) == (1, 0), (
+            'Проверьте, что удаление подписки сбрасывает кеш счетчиков.'
+        )
+        assert social_graph.get_counts(user.id) == (0, 0)
+
+    def test_counts_user_delete(self, user, user_2, another_user):
+        Follow.objects.create(user=user, following=user_2)
+        Follow.objects.create(user=user_2, following=user)
+        Follow.objects.create(user=another_user, following=user_2)
+        user.delete()
+        assert social_graph.get_counts(user_2.id) == (1, 0), (
+            'Проверьте, что удаление пользователя уменьшает счетчики '
+            'тех, с кем он был связан подписками.'
+        )
+        assert not FollowCounts.objects.filter(user_id=user.id).exists()
+
+    def test_is_following_cached(self, user, user_2,
+                                 django_assert_num_queries):
+        assert not social_graph.is_following(user.id, user_2.id)
+        with django_assert_num_queries(0):
+            assert not social_graph.is_following(user.id, user_2.id)
+
+        follow = Follow.objects.create(user=user, following=user_2)
+        assert social_graph.is_following(user.id, user_2.id), (
+            'Проверьте, что создание подписки сбрасывает кеш проверки '
+            'подписки.'
+        )
+        with django_assert_num_queries(0):
+            assert social_graph.is_following(user.id, user_2.id)
+
+        follow.delete()
+        assert not social_graph.is_following(user.id, user_2.id)
+
+    def test_shared_cache_used(self, user, user_2,
+                               django_assert_num_queries):
+        social_graph.get_counts(user_2.id)
+        social_graph.local_cache.clear()
+        with django_assert_num_queries(0):
+            social_graph.get_counts(user_2.id)
+
+    def test_api_follow_updates_counts(self, user_client, user, user_2):
+        response = user_client.post(
+            self.follow_url, data={'following': user_2.username}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert social_graph.get_followers_count(user_2.id) == 1
+        response = user_client.post(
+            self.follow_url, data={'following': user_2.username}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert Follow.objects.filter(user=user).count() == 1
+
+    def test_stats(self, user_client, user, user_2, another_user):
+        Follow.objects.create(user=user, following=user_2)
+        Follow.objects.create(user=another_user, following=user_2)
+
+        response = user_client.get(
+            self.stats_url, {'username': user_2.username}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            'username': user_2.username,
+            'followers': 2,
+            'following': 0,
+            'is_following': True,
+        }, (
+            f'Проверьте, что GET-запрос к `{self.stats_url}` возвращает '
+            'счетчики подписок пользователя.'
+        )
+        response = user_client.get(self.stats_url)
+        assert response.json() == {
+            'username': user.username, 'followers': 0, 'following': 1
+        }
+        response = user_client.get(self.stats_url, {'username': 'nobody'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_stats_not_auth(self, client):
+        response = client.get(self.stats_url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,103 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Follow
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSparseFields:
+
+    post_list_url = '/api/v1/posts/'
+    post_detail_url = '/api/v1/posts/{post_id}/'
+    comments_url = '/api/v1/posts/{post_id}/comments/'
+    group_list_url = '/api/v1/groups/'
+    feed_url = '/api/v1/feed/'
+    follow_url = '/api/v1/follow/'
+
+    def get_selects(self, context):
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+
+    def test_post_list_fields(self, client, post, post_2):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                self.post_list_url, {'fields': 'id,author,pub_date'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert [set(item) for item in response.json()] == [
+            {'id', 'author', 'pub_date'}
+        ] * 2, (
+            f'Проверьте, что параметр `fields` в `{self.post_list_url}` '
+            'оставляет в ответе только перечисленные поля.'
+        )
+        selects = self.get_selects(context)
+        assert len(selects) == 1
+        assert '"posts_post"."text"' not in selects[0], (
+            'Проверьте, что колонки незапрошенных полей не читаются из БД.'
+        )
+
+    def test_post_detail_exclude(self, client, post):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                self.post_detail_url.format(post_id=post.id),
+                {'exclude': 'text,image'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert set(response.json()) == {
+            'id', 'author', 'pub_date', 'group', 'comments_count'
+        }, (
+            'Проверьте, что параметр `exclude` убирает перечисленные поля.'
+        )
+        assert not any(
+            '"posts_post"."text"' in sql for sql in self.get_selects(context)
+        )
+
+    def test_unknown_field(self, client, post):
+        response = client.get(self.post_list_url, {'fields': 'id,secret'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что запрос неизвестного поля возвращает ответ 400.'
+        )
+
+    def test_keyset_page_without_ordering_fields(
+        self, client, post, post_2, another_post, django_assert_num_queries
+    ):
+        with django_assert_num_queries(1):
+            response = client.get(
+                self.post_list_url, {'cursor': '', 'limit': 2, 'fields': 'id'}
+            )
+        data = response.json()
+        assert [set(item) for item in data['results']] == [{'id'}] * 2
+        response = client.get(data['next'])
+        assert len(response.json()['results']) == 1, (
+            'Проверьте, что курсоры строятся и без полей сортировки в ответе.'
+        )
+
+    def test_comments_group_feed_follow(self, client, user_client, user,
+                                        another_user, post, comment_1_post,
+                                        another_post, group_1):
+        response = client.get(
+            self.comments_url.format(post_id=post.id), {'fields': 'id,text'}
+        )
+        assert response.json() == [
+            {'id': comment_1_post.id, 'text': comment_1_post.text}
+        ]
+        response = client.get(self.group_list_url, {'exclude': 'description'})
+        assert set(response.json()[0]) == {'id', 'title', 'slug'}
+
+        Follow.objects.create(user=user, following=another_user)
+        response = user_client.get(self.feed_url, {'fields': 'id'})
+        assert response.json()['results'] == [{'id': another_post.id}]
+        response = user_client.get(self.follow_url, {'fields': 'following'})
+        assert response.json() == [{'following': another_user.username}]
+
+    def test_write_ignores_fields(self, user_client, user):
+        response = user_client.post(
+            f'{self.post_list_url}?fields=id', data={'text': 'Новый пост'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['text'] == 'Новый пост'
@@ -0,0 +1,234 @@
+import threading
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections, router
+
+from api.throttling import (CacheCounters, DatabaseCounters,
+                            SlidingWindowThrottle)
+from posts.models import ThrottleCounter
+
+RATES = {'posts.create': '2/min', 'jwt.create': '2/min'}
+
+
+@pytest.fixture
+def rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES
+    }
+
+
+class Clock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.usefixtures('rates')
+class TestSlidingWindow:
+
+    request = SimpleNamespace(
+        user=SimpleNamespace(is_authenticated=True, pk=1)
+    )
+    view = SimpleNamespace(throttle_scope='posts', action='create')
+
+    def allow(self, clock):
+        throttle = SlidingWindowThrottle()
+        throttle.timer = clock
+        return throttle.allow_request(self.request, self.view), throttle
+
+    def test_window_slides(self):
+        clock = Clock(600.0)
+        assert self.allow(clock)[0] and self.allow(clock)[0]
+        allowed, throttle = self.allow(clock)
+        assert not allowed
+        assert throttle.wait() == pytest.approx(90), (
+            'Проверьте, что Retry-After учитывает и текущее, '
+            'и следующее окно.'
+        )
+        # Половина прошлого окна еще в интервале: 2 * 0.5 + 1 <= 2
+        clock.now = 690.0
+        assert self.allow(clock)[0], (
+            'Проверьте, что запросы прошлого окна учитываются '
+            'пропорционально.'
+        )
+        allowed, throttle = self.allow(clock)
+        assert not allowed
+        assert throttle.wait() == pytest.approx(30)
+        clock.now = 719.0
+        assert not self.allow(clock)[0]
+        clock.now = 720.0
+        assert self.allow(clock)[0]
+
+    def test_rejected_not_counted(self):
+        clock = Clock(600.0)
+        for _ in range(2):
+            self.allow(clock)
+        for _ in range(5):
+            assert not self.allow(clock)[0]
+        clock.now = 720.0
+        assert self.allow(clock)[0], (
+            'Проверьте, что отклоненные запросы не продлевают блокировку.'
+        )
+
+    def test_action_without_rate(self):
+        view = SimpleNamespace(throttle_scope='posts', action='list')
+        throttle = SlidingWindowThrottle()
+        for _ in range(10):
+            assert throttle.allow_request(self.request, view)
+
+
+class ToAlias:
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def db_for_read(self, model, **hints):
+        return self.alias
+
+    def db_for_write(self, model, **hints):
+        return self.alias
+
+
+@pytest.fixture
+def database_cache(tmp_path, settings, monkeypatch, django_db_blocker):
+    """
+    DatabaseCache и счетчики в отдельном файле SQLite: в тестовую базу
+    в памяти нельзя писать из нескольких потоков одновременно.
+    """
+    alias = 'throttle'
+    connections.settings[alias] = {
+        **connections['default'].settings_dict,
+        'NAME': str(tmp_path / 'throttle.sqlite3'),
+        'OPTIONS': {'timeout': 30},
+        'TEST': {},
+    }
+    monkeypatch.setattr(router, 'routers', [ToAlias(alias)])
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'throttle_cache',
+    }}
+    with django_db_blocker.unblock():
+        call_command('createcachetable', database=alias, verbosity=0)
+        with connections[alias].schema_editor() as editor:
+            editor.create_model(ThrottleCounter)
+        yield caches['default']
+        connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+@pytest.mark.usefixtures('rates')
+class TestDatabaseCache:
+
+    request = TestSlidingWindow.request
+    view = TestSlidingWindow.view
+
+    def test_counters_in_database(self, database_cache):
+        throttle = SlidingWindowThrottle()
+        assert isinstance(throttle.get_counters(), DatabaseCounters), (
+            'Проверьте, что с DatabaseCache счетчики хранятся '
+            'в таблице ThrottleCounter.'
+        )
+        throttle.timer = Clock(600.0)
+        assert throttle.allow_request(self.request, self.view)
+        assert throttle.allow_request(self.request, self.view)
+        assert not throttle.allow_request(self.request, self.view)
+        assert throttle.wait() == pytest.approx(90)
+        assert ThrottleCounter.objects.get().count == 2
+
+    def test_concurrent_requests(self, database_cache, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'posts.create': '100/min'},
+        }
+        clock = Clock(600.0)
+        allowed = []
+        start = threading.Barrier(8)
+
+        def client():
+            start.wait()
+            try:
+                for _ in range(20):
+                    throttle = SlidingWindowThrottle()
+                    throttle.timer = clock
+                    allowed.append(
+                        throttle.allow_request(self.request, self.view)
+                    )
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert allowed.count(True) == 100, (
+            'Проверьте, что одновременные запросы с DatabaseCache '
+            'не превышают лимит.'
+        )
+        assert ThrottleCounter.objects.get().count == 100
+
+    def test_cache_counters_without_database_cache(self):
+        assert isinstance(
+            SlidingWindowThrottle().get_counters(), CacheCounters
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('rates')
+class TestThrottledEndpoints:
+
+    post_list_url = '/api/v1/posts/'
+    jwt_url = '/api/v1/jwt/create/'
+
+    def test_post_create(self, user_client, user, another_user):
+        from rest_framework.test import APIClient
+
+        for _ in range(2):
+            response = user_client.post(
+                self.post_list_url, data={'text': 'Пост'}, format='json'
+            )
+            assert response.status_code == HTTPStatus.CREATED
+        response = user_client.post(
+            self.post_list_url, data={'text': 'Пост'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что создание постов ограничено по частоте.'
+        )
+        assert 0 < int(response['Retry-After']) <= 120
+        assert user_client.get(self.post_list_url).status_code == (
+            HTTPStatus.OK
+        ), 'Проверьте, что лимит действует только на создание.'
+
+        client = APIClient()
+        client.force_authenticate(another_user)
+        response = client.post(
+            self.post_list_url, data={'text': 'Пост'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что лимит считается для каждого пользователя.'
+        )
+
+    def test_jwt_create_per_ip(self, client, user):
+        data = {'username': user.username, 'password': '1234567'}
+        for _ in range(2):
+            response = client.post(self.jwt_url, data=data)
+            assert response.status_code == HTTPStatus.OK
+        response = client.post(self.jwt_url, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что получение токена ограничено по частоте.'
+        )
+        assert 'Retry-After' in response
+        response = client.post(
+            self.jwt_url, data=data, REMOTE_ADDR='10.0.0.2'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что лимит на токены считается для каждого IP.'
+        )
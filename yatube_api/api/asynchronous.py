@@ -0,0 +1,184 @@
+"""
+Асинхронные варианты представлений для ASGI.
+
+Под ASGI Django выполняет синхронные представления через один общий
+поток (sync_to_async с thread_sensitive=True), поэтому запросы
+к API обрабатываются по одному. Асинхронное представление
+само работает в цикле событий, а блокирующие вызовы (запросы к БД
+и кешу) отправляет через run_blocking() в отдельный пул потоков
+ограниченного размера (ASYNC_VIEWS['MAX_WORKERS']). Размер пула
+ограничивает и число одновременных соединений с БД. Независимые
+запросы можно выполнять параллельно через asyncio.gather(), например
+подсчет и выборку страницы в PostPagination.
+
+Асинхронный вариант действия - метод вьюсета '<действие>_async',
+представление для URL-схемы строит AsyncViewSetMixin.as_async_view().
+Действия без такого метода выполняются обычным синхронным кодом
+в том же пуле. Под ASGI эти представления подключает
+yatube_api/asgi_urls.py, под WSGI все работает как раньше.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+
+from posts.database import close_stale_connections
+
+DEFAULTS = {
+    # Сколько потоков выполняют блокирующие вызовы одновременно
+    'MAX_WORKERS': 8,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_setting(name):
+    return getattr(settings, 'ASYNC_VIEWS', {}).get(name, DEFAULTS[name])
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_setting('MAX_WORKERS'),
+                    thread_name_prefix='async-views',
+                )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    # Сигнал request_started в потоки пула не приходит
+    close_stale_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Как в конце обычного запроса: соединения потока пула
+        # закрываются по тем же правилам CONN_MAX_AGE
+        close_old_connections()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Выполняет блокирующую функцию в пуле потоков. Переменные
+    контекста (contextvars) вызывающей корутины видны и в потоке.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(), context.run, _call, func, args, kwargs
+    )
+
+
+class AsyncViewSetMixin:
+    """
+    Миксин вьюсета с асинхронной диспетчеризацией: аутентификация,
+    права и лимиты частоты проверяются в пуле потоков, затем
+    вызывается корутина '<действие>_async'.
+    """
+
+    @classmethod
+    def as_async_view(cls, actions, **initkwargs):
+        sync_view = cls.as_view(actions, **initkwargs)
+        # Как в ViewSetMixin.as_view()
+        if 'get' in actions and 'head' not in actions:
+            actions = {**actions, 'head': actions['get']}
+
+        async def view(request, *args, **kwargs):
+            action = actions.get(request.method.lower())
+            if not hasattr(cls, f'{action}_async'):
+                return await run_blocking(sync_view, request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, name in actions.items():
+                if hasattr(self, f'{name}_async'):
+                    setattr(self, method, getattr(self, f'{name}_async'))
+            self.request = request
+            return await self.dispatch_async(request, *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.actions = actions
+        # Как у APIView.as_view(): CSRF проверяет аутентификация DRF.
+        # csrf_exempt() здесь не подходит, он делает обертку синхронной
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch_async(self, request, *args, **kwargs):
+        """То же, что APIView.dispatch(), но с асинхронным обработчиком."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await run_blocking(self.initial, request, *args, **kwargs)
+            handler = getattr(self, request.method.lower())
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+    async def list_response_async(self, queryset):
+        """Асинхронный вариант CompiledSerializerMixin.list_response()."""
+        queryset = self.read_queryset(queryset)
+        paginator = self.paginator
+        if paginator is None:
+            page = None
+        elif hasattr(paginator, 'paginate_queryset_async'):
+            page = await paginator.paginate_queryset_async(
+                queryset, self.request, view=self
+            )
+        else:
+            page = await run_blocking(self.paginate_queryset, queryset)
+        if page is None:
+            data = self.serialize_many(await run_blocking(list, queryset))
+            return Response(data)
+        return self.get_paginated_response(self.serialize_many(page))
+
+
+class AsyncStreamingHttpResponse(StreamingHttpResponse):
+    """
+    Потоковый ответ, части которого отдает асинхронный итератор.
+    ASGIHandler в Django 3.2 перебирает части синхронно прямо в цикле
+    событий, поэтому такие ответы отправляет AsyncViewsHandler
+    (yatube_api/asgi.py). При синхронной отправке, например
+    в тестовом клиенте, части собираются целиком через async_to_sync().
+    """
+
+    def __init__(self, streaming_content=(), *args, **kwargs):
+        self.async_streaming_content = streaming_content
+        super().__init__(self._iterate_sync(), *args, **kwargs)
+
+    def _iterate_sync(self):
+        # Все части в одном вызове: при завершении цикла событий asyncio
+        # закрывает начатые в нем асинхронные генераторы
+        async def collect():
+            return [part async for part in self.async_streaming_content]
+
+        yield from async_to_sync(collect)()
+
+
+def blocking_action(name):
+    """
+    Асинхронный вариант действия, целиком выполняющий синхронный
+    метод `name` в пуле потоков: для действий, где запросы к БД
+    зависят друг от друга и параллелить нечего.
+    """
+    async def action(self, request, *args, **kwargs):
+        return await run_blocking(
+            getattr(self, name), request, *args, **kwargs
+        )
+    action.__name__ = f'{name}_async'
+    return action
@@ -0,0 +1,105 @@
+"""
+JWT-аутентификация с кешированием.
+
+JWTAuthentication из simplejwt на каждый запрос проверяет подпись
+токена и читает пользователя из БД. Здесь проверенный токен
+хранится в LRU-кеше процесса по хешу строки токена до истечения
+его срока (exp), а пользователь - в LRU-кеше процесса не дольше
+LOCAL_CACHE_TTL секунд.
+В общий кеш Django пользователи не попадают: там их видели бы все
+процессы вместе с хешами паролей, а деактивация через
+QuerySet.update() без сигналов действовала бы только после
+истечения записи. Короткое время жизни ограничивает и то, и другое.
+При сохранении или удалении пользователя (в том числе при
+деактивации) его запись сбрасывается в текущем процессе сразу
+(см. api/signals.py), в других процессах - по истечении
+LOCAL_CACHE_TTL.
+"""
+import copy
+import hashlib
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+
+from posts.social_graph import LRUCache
+
+DEFAULTS = {
+    # Сколько проверенных токенов хранить и как долго
+    'TOKEN_CACHE_SIZE': 10_000,
+    'TOKEN_CACHE_TTL': 300,
+    # Размер и время жизни LRU-кеша пользователей процесса
+    'LOCAL_CACHE_SIZE': 10_000,
+    'LOCAL_CACHE_TTL': 5,
+}
+
+CACHE_PREFIX = 'auth'
+
+
+def get_setting(name):
+    return getattr(settings, 'JWT_AUTH_CACHE', {}).get(name, DEFAULTS[name])
+
+
+token_cache = LRUCache(
+    get_setting('TOKEN_CACHE_SIZE'), get_setting('TOKEN_CACHE_TTL')
+)
+user_cache = LRUCache(
+    get_setting('LOCAL_CACHE_SIZE'), get_setting('LOCAL_CACHE_TTL')
+)
+
+
+def _user_key(user_id):
+    return f'{CACHE_PREFIX}:user:{user_id}'
+
+
+def forget_user(user_id):
+    """Сбрасывает закешированного пользователя сейчас и после коммита."""
+    key = _user_key(user_id)
+    user_cache.delete(key)
+    transaction.on_commit(lambda: user_cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_validated_token(self, raw_token):
+        key = hashlib.sha256(raw_token).hexdigest()
+        token = token_cache.get(key)
+        if token is not None and token['exp'] > time.time():
+            return token
+        token = super().get_validated_token(raw_token)
+        token_cache.set(key, token)
+        return token
+
+    def load_user(self, user_id):
+        try:
+            return self.user_model.objects.get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        key = _user_key(user_id)
+        user = user_cache.get(key)
+        if user is None:
+            user = self.load_user(user_id)
+            user_cache.set(key, user)
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        # Один объект из кеша не должен делиться между запросами
+        return copy.copy(user)
@@ -0,0 +1,174 @@
+"""
+Кеширование ответов на анонимные GET-запросы.
+
+Ответ кешируется под ключом из нормализованного URL и версий данных,
+от которых он зависит: списки зависят от версии модели,
+страница объекта - от версии самого объекта.
+Сигналы (api/signals.py) поднимают версии при изменении данных,
+поэтому старые ответы просто перестают находиться в кеше.
+По тем же версиям строятся ETag и Last-Modified, и на условные
+запросы ответ 304 отдается без обращения к БД.
+"""
+import asyncio
+import functools
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .asynchronous import run_blocking
+
+RESPONSE_CACHE_PREFIX = 'api:response'
+
+
+def get_versions(keys):
+    """
+    Возвращает версии по ключам кеша.
+    Версия - метка времени, а не счетчик: если ключ вытеснен из кеша,
+    новое значение не совпадет ни с одним из старых.
+    """
+    versions = cache.get_many(keys)
+    now = time.time_ns()
+    for key in keys:
+        if key not in versions:
+            # add не перезапишет версию, поднятую параллельным запросом
+            cache.add(key, now, None)
+            versions[key] = cache.get(key, now)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(keys):
+    now = time.time_ns()
+    cache.set_many({key: now for key in keys}, None)
+
+
+def version_key(model, pk=None):
+    label = model._meta.label_lower
+    if pk is None:
+        return f'{RESPONSE_CACHE_PREFIX}:{label}:version'
+    return f'{RESPONSE_CACHE_PREFIX}:{label}:{pk}:version'
+
+
+def invalidate_responses(model, *pks, lists=True):
+    """
+    Сбрасывает закешированные ответы со списками объектов модели
+    и со страницами объектов `pks`.
+    Версии поднимаются после коммита: иначе параллельный запрос успел бы
+    закешировать старые данные уже под новой версией.
+    """
+    keys = [version_key(model, pk) for pk in pks]
+    if lists:
+        keys.append(version_key(model))
+    transaction.on_commit(lambda: bump_versions(keys))
+
+
+def normalize_url(request):
+    """Путь и отсортированные параметры запроса."""
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    return f'{request.path}?{urlencode(params)}'
+
+
+def is_cacheable(request):
+    return request.method == 'GET' and not request.user.is_authenticated
+
+
+def lookup_response(model, detail, view, request, kwargs):
+    """
+    Валидаторы ответа и сам ответ, если его можно отдать без
+    вызова метода: 304 на условный запрос или данные из кеша.
+    """
+    if detail:
+        lookup = view.lookup_url_kwarg or view.lookup_field
+        keys = [version_key(model, kwargs[lookup])]
+    else:
+        keys = [version_key(model)]
+    # Версии читаются до данных: данные в кеше никогда
+    # не старше версии, под которой они лежат
+    versions = get_versions(keys)
+    digest = hashlib.md5(
+        f'{normalize_url(request)}:{versions}'.encode()
+    ).hexdigest()
+    etag = f'"{digest}"'
+    last_modified = max(versions) // 10 ** 9
+
+    response = get_conditional_response(
+        request._request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        data = cache.get(f'{RESPONSE_CACHE_PREFIX}:{digest}')
+        if data is not None:
+            response = Response(data)
+    return digest, etag, last_modified, response
+
+
+def set_validators(response, etag, last_modified):
+    # Валидаторы метода (если есть) заменяются своими:
+    # анонимный клиент пришлет в If-None-Match именно этот ETag
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def cache_response(model, detail=False, timeout=60):
+    """
+    Кеширует ответ метода вьюсета на анонимный GET-запрос.
+    detail=True - ответ зависит только от объекта из URL,
+    иначе от всех объектов модели.
+    Кешируются данные ответа, а не отрисованный ответ,
+    поэтому формат ответа выбирается как обычно.
+    Метод может быть и корутиной (см. api/asynchronous.py),
+    тогда обращения к кешу идут через пул потоков.
+    """
+    def decorator(method):
+        if asyncio.iscoroutinefunction(method):
+            return cache_async_response(method, model, detail, timeout)
+
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if not is_cacheable(request):
+                return method(view, request, *args, **kwargs)
+            digest, etag, last_modified, response = lookup_response(
+                model, detail, view, request, kwargs
+            )
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(
+                    f'{RESPONSE_CACHE_PREFIX}:{digest}', response.data,
+                    timeout
+                )
+            return set_validators(response, etag, last_modified)
+
+        return wrapper
+    return decorator
+
+
+def cache_async_response(method, model, detail, timeout):
+    """cache_response() для метода-корутины."""
+    @functools.wraps(method)
+    async def async_wrapper(view, request, *args, **kwargs):
+        if not is_cacheable(request):
+            return await method(view, request, *args, **kwargs)
+        digest, etag, last_modified, response = await run_blocking(
+            lookup_response, model, detail, view, request, kwargs
+        )
+        if response is None:
+            response = await method(view, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            await run_blocking(
+                cache.set, f'{RESPONSE_CACHE_PREFIX}:{digest}',
+                response.data, timeout
+            )
+        return set_validators(response, etag, last_modified)
+    return async_wrapper
@@ -0,0 +1,147 @@
+"""
+Скомпилированные сериализаторы для чтения.
+
+DRF на каждый объект обходит поля сериализатора, достает значения
+через цепочки атрибутов (author.username) и создает объекты моделей.
+Для списков это основная часть времени ответа. Здесь сериализатор
+один раз разбирается в список пар (колонка values(), преобразование),
+и ответ собирается из строк values() без создания объектов моделей.
+Вывод совпадает с выводом исходного сериализатора до байта:
+преобразование значений выполняют те же поля DRF.
+Поле может собирать значение из нескольких колонок: для этого
+у него задаются `source_columns` и метод from_columns(*значения).
+Поля, которые так не выразить (методы, вложенные сериализаторы,
+необязательные связи в пути), отключают компиляцию, и тогда
+используется обычный сериализатор.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField
+from rest_framework import serializers
+
+
+class CompiledSerializer:
+    """Собирает словари ответа из строк queryset.values()."""
+
+    def __init__(self, columns):
+        # Список троек (имя поля в ответе, колонка values(), преобразование)
+        self.columns = columns
+
+    def values(self, queryset):
+        names = []
+        for _, column, _ in self.columns:
+            for name in column if isinstance(column, tuple) else (column,):
+                if name not in names:
+                    names.append(name)
+        return queryset.values(*names)
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, convert in self.columns:
+            if isinstance(column, tuple):
+                # Поле из нескольких колонок само разбирается с None
+                data[name] = convert(*(row[item] for item in column))
+                continue
+            value = row[column]
+            data[name] = None if value is None else convert(value)
+        return data
+
+    def many(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+def _identity(value):
+    return value
+
+
+def _file_converter(field, model_field):
+    def convert(value):
+        # В values() лежит имя файла, полю DRF нужен объект файла
+        return field.to_representation(
+            model_field.attr_class(None, model_field, value)
+        )
+    return convert
+
+
+def _resolve_path(model, path):
+    """
+    Возвращает поле модели в конце пути `path` или None, если путь
+    не выражается колонкой values() с тем же результатом, что у DRF.
+    """
+    model_field = None
+    for index, attr in enumerate(path):
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if model_field.many_to_many or model_field.one_to_many:
+            return None
+        if index == len(path) - 1:
+            break
+        # Для пустой связи DRF пропускает поле, values() дал бы None
+        if not model_field.is_relation or model_field.null:
+            return None
+        model = model_field.related_model
+    return model_field
+
+
+def _compile_relation(field, path):
+    if (isinstance(field, serializers.PrimaryKeyRelatedField)
+            and field.pk_field is None):
+        return '__'.join(path), _identity
+    if isinstance(field, serializers.SlugRelatedField):
+        return '__'.join(path + [field.slug_field]), _identity
+    return None
+
+
+def _compile_field(model, field):
+    """Возвращает пару (колонка, преобразование) или None."""
+    if getattr(field, 'source_columns', None):
+        # Поле само собирает значение из нескольких колонок модели
+        return tuple(field.source_columns), field.from_columns
+    path = list(field.source_attrs)
+    if field.source == '*' or not path:
+        return None
+    model_field = _resolve_path(model, path)
+    if model_field is None:
+        return None
+    if isinstance(field, serializers.RelatedField):
+        if not model_field.is_relation:
+            return None
+        return _compile_relation(field, path)
+    if model_field.is_relation or isinstance(field, (
+        serializers.ManyRelatedField,
+        serializers.BaseSerializer,
+        serializers.SerializerMethodField,
+    )):
+        return None
+    if isinstance(model_field, FileField):
+        if not isinstance(field, serializers.FileField):
+            return None
+        return '__'.join(path), _file_converter(field, model_field)
+    return '__'.join(path), field.to_representation
+
+
+def compile_serializer(serializer):
+    """
+    Компилирует экземпляр ModelSerializer (с учетом урезанных полей
+    и контекста запроса) или возвращает None, если это невозможно.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    cls = type(serializer)
+    if (not isinstance(serializer, serializers.ModelSerializer)
+            or cls.to_representation
+            is not serializers.Serializer.to_representation):
+        return None
+    model = serializer.Meta.model
+    columns = []
+    for field in serializer._readable_fields:
+        if (type(field).get_attribute
+                is not serializers.Field.get_attribute
+                and not isinstance(field, serializers.RelatedField)):
+            return None
+        compiled = _compile_field(model, field)
+        if compiled is None:
+            return None
+        columns.append((field.field_name, *compiled))
+    return CompiledSerializer(columns)
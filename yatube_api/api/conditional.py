@@ -0,0 +1,58 @@
+"""
+Валидаторы для условных GET-запросов (If-None-Match).
+
+ETag считается по времени изменения данных одним легким запросом,
+без чтения и сериализации самих объектов, поэтому на запрос
+с актуальным ETag ответ 304 отдается дешево.
+Функции подключаются к методам вьюсетов декоратором
+django.views.decorators.http.condition.
+"""
+from django.db.models import Count, OuterRef, Subquery
+
+from posts.models import Comment, Post
+
+
+def _make_etag(*parts):
+    return '"{}"'.format('-'.join(str(part) for part in parts))
+
+
+def _timestamp(value):
+    return value.timestamp() if value is not None else 0
+
+
+def post_etag(request, pk=None, **kwargs):
+    """
+    ETag страницы поста по времени его последнего изменения
+    и счетчику комментариев (счетчик меняется без обновления поста).
+    """
+    try:
+        row = Post.objects.filter(pk=pk).values_list(
+            'updated', 'comments_count'
+        ).first()
+    except (TypeError, ValueError):
+        return None
+    if row is None:
+        return None
+    updated, comments_count = row
+    return _make_etag(pk, _timestamp(updated), comments_count)
+
+
+def comments_etag(request, post_id=None, **kwargs):
+    """
+    ETag списка комментариев поста: количество комментариев
+    и время последнего изменения. Количество учитывает удаления,
+    время - добавления и правки.
+    Оба значения читаются из индексов комментариев, без чтения
+    строк таблицы и сортировки.
+    """
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by()
+    total = comments.values('post').annotate(total=Count('pk'))
+    latest = comments.order_by('-updated').values('updated')[:1]
+    row = Post.objects.filter(pk=post_id).annotate(
+        comments_total=Subquery(total.values('total')),
+        comments_updated=Subquery(latest)
+    ).values_list('comments_total', 'comments_updated').first()
+    if row is None:
+        return None
+    total, updated = row
+    return _make_etag(post_id, total or 0, _timestamp(updated))
@@ -0,0 +1,137 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import DatabaseError, connections, router, transaction
+
+from .caching import bump_versions, get_versions
+
+COUNT_CACHE_PREFIX = 'api:count'
+
+
+def _generation_key(model):
+    return f'{COUNT_CACHE_PREFIX}:{model._meta.label_lower}:generation'
+
+
+def get_generation(model):
+    """Возвращает текущее поколение счетчиков модели."""
+    return get_versions([_generation_key(model)])[0]
+
+
+def invalidate_counts(model):
+    """
+    Сбрасывает все закешированные количества объектов модели
+    после фиксации текущей транзакции.
+    """
+    keys = [_generation_key(model)]
+    transaction.on_commit(lambda: bump_versions(keys))
+
+
+def estimate_table_rows(model, using=None):
+    """
+    Оценивает число строк таблицы по статистике СУБД.
+    Возвращает None, если статистики нет или СУБД не поддерживается.
+    """
+    using = using or router.db_for_read(model)
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        'postgresql': (
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(table)]
+        ),
+        'mysql': (
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s',
+            [table]
+        ),
+        # Статистика появляется после выполнения ANALYZE. Строки
+        # sqlite_stat1 заведены на каждый индекс, а у частичных индексов
+        # первое число меньше размера таблицы, поэтому берем максимум
+        'sqlite': (
+            'SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 '
+            'WHERE tbl = %s',
+            [table]
+        ),
+    }
+    if connection.vendor not in queries:
+        return None
+    sql, params = queries[connection.vendor]
+    # Ошибка возможна только в SQLite без ANALYZE (нет sqlite_stat1),
+    # а там она не прерывает текущую транзакцию
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(row[0])
+    return estimate if estimate >= 0 else None
+
+
+class ExactCount:
+    """Точный подсчет через COUNT(*), подходит для небольших таблиц."""
+
+    def count(self, queryset):
+        return queryset.count()
+
+
+class CachedCount:
+    """
+    Количество из кеша с ограниченным временем жизни.
+    Кеш сбрасывается сигналами при создании и удалении объектов модели.
+    """
+
+    def __init__(self, timeout=60):
+        self.timeout = timeout
+
+    def get_cache_key(self, queryset):
+        sql = str(queryset.query).encode()
+        return '{prefix}:{model}:{generation}:{digest}'.format(
+            prefix=COUNT_CACHE_PREFIX,
+            model=queryset.model._meta.label_lower,
+            generation=get_generation(queryset.model),
+            digest=hashlib.md5(sql).hexdigest()
+        )
+
+    def count(self, queryset):
+        key = self.get_cache_key(queryset)
+        value = cache.get(key)
+        if value is None:
+            value = queryset.count()
+            cache.set(key, value, self.timeout)
+        return value
+
+
+class EstimatedCount:
+    """
+    Оценка количества по статистике СУБД для больших таблиц.
+    Если оценка меньше порога, выборка отфильтрована или статистики нет,
+    используется запасная стратегия.
+    Сама оценка кешируется на `timeout` секунд.
+    """
+
+    def __init__(self, threshold=100_000, fallback=None, timeout=60):
+        self.threshold = threshold
+        self.fallback = fallback or ExactCount()
+        self.timeout = timeout
+
+    def get_estimate(self, queryset):
+        key = (
+            f'{COUNT_CACHE_PREFIX}:{queryset.model._meta.label_lower}'
+            f':{queryset.db}:estimate'
+        )
+        estimate = cache.get(key)
+        if estimate is None:
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            # -1 означает, что статистики нет
+            cache.set(key, -1 if estimate is None else estimate, self.timeout)
+        return None if estimate == -1 else estimate
+
+    def count(self, queryset):
+        if not queryset.query.where:
+            estimate = self.get_estimate(queryset)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+        return self.fallback.count(queryset)
@@ -0,0 +1,235 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.utils.functional import cached_property
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from posts import replicas
+from .compiled import compile_serializer
+
+
+def build_query_plan(serializer):
+    """
+    Строит план загрузки queryset по полям сериализатора.
+    Возвращает пару (select_related, only) или None,
+    если какое-то поле нельзя однозначно сопоставить с колонками модели.
+    """
+    model = serializer.Meta.model
+    select_related = set()
+    only = set()
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if getattr(field, 'source_columns', None):
+            only.update(field.source_columns)
+            continue
+        if field.source == '*' or isinstance(
+            field, serializers.ManyRelatedField
+        ):
+            return None
+        path = list(field.source_attrs)
+        try:
+            model_field = model._meta.get_field(path[0])
+        except FieldDoesNotExist:
+            return None
+        if isinstance(field, serializers.SlugRelatedField):
+            # Для slug-поля нужна колонка связанной модели
+            path.append(field.slug_field)
+        if len(path) > 1:
+            if not model_field.is_relation:
+                return None
+            select_related.add('__'.join(path[:-1]))
+        only.add('__'.join(path))
+    return select_related, only
+
+
+class SparseFieldsetMixin:
+    """
+    Параметры `fields` и `exclude` для чтения: списки полей через запятую,
+    которые нужно оставить в ответе или убрать из него, например
+    ?fields=id,author,pub_date. Урезанный сериализатор попадает и в план
+    запроса QueryPlanMixin, поэтому колонки ненужных полей не читаются.
+    Сериализатор должен поддерживать аргументы fields/exclude
+    (см. SparseFieldsMixin в serializers.py).
+    """
+    sparse_params = ('fields', 'exclude')
+
+    def get_sparse_fields(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return {}
+        sparse = {}
+        for param in self.sparse_params:
+            names = [
+                name.strip()
+                for name in request.query_params.get(param, '').split(',')
+                if name.strip()
+            ]
+            if names:
+                sparse[param] = names
+        return sparse
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class QueryPlanMixin:
+    """
+    Миксин для вьюсетов, подбирающий select_related/only по действию.
+    Для действий из `query_plan_actions` загружаются только колонки,
+    нужные сериализатору, а связанные объекты подтягиваются одним JOIN.
+    Для остальных действий выполняется только select_related.
+    """
+    query_plan_actions = ('list', 'retrieve')
+
+    def get_query_plan(self):
+        return build_query_plan(self.get_serializer())
+
+    def get_queryset(self):
+        return self.apply_query_plan(super().get_queryset())
+
+    def apply_query_plan(self, queryset):
+        plan = self.get_query_plan()
+        if plan is None:
+            return queryset
+        select_related, only = plan
+        if select_related:
+            queryset = queryset.select_related(*sorted(select_related))
+        if self.action in self.query_plan_actions:
+            queryset = queryset.only(*sorted(only))
+        return queryset
+
+
+class ReplicaReadMixin:
+    """
+    Миксин чтения с реплик БД (posts/replicas.py): безопасные запросы
+    к действиям из `replica_actions` читают с реплики, если пользователь
+    недавно ничего не менял. Успешный изменяющий запрос закрепляет
+    пользователя за основной БД.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        with replicas.routing():
+            return super().dispatch(request, *args, **kwargs)
+
+    async def dispatch_async(self, request, *args, **kwargs):
+        with replicas.routing():
+            return await super().dispatch_async(request, *args, **kwargs)
+
+    def use_replica(self, request):
+        if (request.method not in SAFE_METHODS
+                or self.action not in self.replica_actions):
+            return False
+        user = request.user
+        return not (user.is_authenticated and replicas.is_pinned(user.id))
+
+    def initial(self, request, *args, **kwargs):
+        # Пользователь нужен для проверки отметки, поэтому аутентификация
+        # (и чтение пользователя, если он не в кеше) идет в основную БД
+        super().initial(request, *args, **kwargs)
+        if self.use_replica(request):
+            replicas.read_from_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (request.method not in SAFE_METHODS
+                and response.status_code < 400
+                and request.user.is_authenticated):
+            replicas.pin_to_primary(request.user.id)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class BulkCreateMixin:
+    """
+    Миксин массового создания: список объектов проверяется сериализатором
+    с many=True и вставляется через bulk_create пачками по
+    `bulk_batch_size` в одной транзакции. Если хотя бы один объект
+    не прошел проверку, не создается ни один, а в ответе возвращаются
+    ошибки по каждому элементу списка (пустой словарь для корректных).
+    bulk_create не вызывает save() и сигналы, поэтому все, что при обычном
+    создании делают сигналы, выполняется в perform_bulk_create().
+    """
+    bulk_limit = 1000
+    bulk_batch_size = 500
+
+    def bulk_create(self, request, **fields):
+        """Создает объекты из списка в теле запроса с полями `fields`."""
+        data = request.data
+        if isinstance(data, list):
+            if not data:
+                raise ValidationError(
+                    {'non_field_errors': ['Передайте непустой список.']}
+                )
+            if len(data) > self.bulk_limit:
+                raise ValidationError({'non_field_errors': [
+                    f'Не больше {self.bulk_limit} объектов за один запрос.'
+                ]})
+        serializer = self.get_serializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+        model = serializer.child.Meta.model
+        objs = [
+            model(**item, **fields) for item in serializer.validated_data
+        ]
+        with transaction.atomic():
+            model.objects.bulk_create(objs, batch_size=self.bulk_batch_size)
+            if objs[0].pk is None:
+                self._assign_pks(objs, model.objects.filter(**fields))
+            self.perform_bulk_create(objs)
+        return Response(
+            self.get_serializer(objs, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    def _assign_pks(self, objs, queryset):
+        """
+        Проставляет ключи, если СУБД не вернула их из массовой вставки
+        (SQLite в Django 3.2). Транзакция SQLite держит блокировку на запись
+        с первой вставки до коммита, а ключи растут монотонно, поэтому
+        последние len(objs) строк `queryset` - только что вставленные.
+        """
+        pks = list(
+            queryset.order_by('-pk').values_list('pk', flat=True)[:len(objs)]
+        )
+        for obj, pk in zip(objs, reversed(pks)):
+            obj.pk = pk
+
+    def perform_bulk_create(self, objs):
+        """Действия после вставки, выполняются в той же транзакции."""
+
+
+class CompiledSerializerMixin:
+    """
+    Миксин выдачи через скомпилированный сериализатор (api/compiled.py):
+    в действиях из `compiled_actions` объекты читаются строками values()
+    и превращаются в словари без создания объектов моделей.
+    Если сериализатор не компилируется, работает обычный путь.
+    """
+    compiled_actions = ('list',)
+
+    @cached_property
+    def compiled_serializer(self):
+        if self.action not in self.compiled_actions:
+            return None
+        return compile_serializer(self.get_serializer())
+
+    def read_queryset(self, queryset):
+        """Выборка, строки которой понимает serialize_many()."""
+        if self.compiled_serializer is None:
+            return queryset
+        return self.compiled_serializer.values(queryset)
+
+    def serialize_many(self, items):
+        if self.compiled_serializer is None:
+            return self.get_serializer(items, many=True).data
+        return self.compiled_serializer.many(items)
+
+    def list_response(self, queryset):
+        queryset = self.read_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        data = self.serialize_many(queryset if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
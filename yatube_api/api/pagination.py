@@ -1,12 +1,324 @@
-from rest_framework.pagination import LimitOffsetPagination
+import asyncio
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       _positive_int)
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from posts import timeline
+from posts.models import Post, TimelineEntry
+from .asynchronous import run_blocking
+from .counts import ExactCount
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (keyset) для больших таблиц.
+    Вместо OFFSET страница выбирается условием по полям сортировки,
+    поэтому время выборки не зависит от глубины страницы,
+    а вставка новых записей не сдвигает уже просмотренные страницы.
+    Курсор непрозрачен для клиента: это base64 от позиции записи.
+    """
+    # Поля сортировки; последнее поле должно быть уникальным.
+    # None - взять сортировку из Meta модели.
+    ordering = None
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 10
+    max_limit = 100
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def get_ordering(self, queryset):
+        return tuple(self.ordering or queryset.model._meta.ordering)
+
+    def get_limit(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.limit_query_param],
+                strict=True,
+                cutoff=self.max_limit
+            )
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def encode_cursor(self, position, reverse=False):
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in position
+        ]
+        data = json.dumps({'p': values, 'r': int(reverse)})
+        return urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, queryset):
+        """
+        Возвращает пару (позиция, обратное направление) из запроса.
+        Для первой страницы позиция равна None.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padding = '=' * (-len(encoded) % 4)
+            data = json.loads(urlsafe_b64decode(encoded + padding))
+            values = data['p']
+            reverse = bool(data['r'])
+            if len(values) != len(self.ordering_fields):
+                raise ValueError
+            position = tuple(
+                queryset.model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.ordering_fields, values)
+            )
+        except (binascii.Error, KeyError, TypeError, ValueError,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return tuple(item[name] for name in self.ordering_fields)
+        return tuple(getattr(item, name) for name in self.ordering_fields)
+
+    def load_ordering_fields(self, queryset):
+        """
+        Добавляет поля сортировки к колонкам из only() или values():
+        по ним строятся курсоры, и отложенная загрузка дала бы
+        по запросу на запись.
+        """
+        if queryset._fields:
+            missing = [
+                name for name in self.ordering_fields
+                if name not in queryset._fields
+            ]
+            if not missing:
+                return queryset
+            return queryset.values(*queryset._fields, *missing)
+        names, deferred = queryset.query.deferred_loading
+        if deferred or not names:
+            return queryset
+        return queryset.only(*names, *self.ordering_fields)
+
+    def build_filter(self, position, reverse, fields=None):
+        """
+        Строит условие "запись идет после позиции" для составного ключа:
+        (a < a0) OR (a = a0 AND b < b0) OR ...
+        Имена полей можно заменить через `fields`, например для таблицы,
+        которая хранит копию ключа сортировки.
+        """
+        fields = fields or self.ordering_fields
+        condition = Q()
+        lookups = []
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-')
+            if reverse:
+                descending = not descending
+            lookups.append('lt' if descending else 'gt')
+            step = Q(**{f'{fields[index]}__{lookups[-1]}': position[index]})
+            for name, value in zip(fields[:index], position):
+                step &= Q(**{name: value})
+            condition |= step
+        # Дублируем нестрогую границу по первому полю: без нее СУБД
+        # не может начать чтение индекса с позиции курсора из-за OR
+        first_bound = Q(**{f'{fields[0]}__{lookups[0]}e': position[0]})
+        return first_bound & condition
+
+    def get_page_queryset(self, queryset, position, reverse, ordering):
+        """Возвращает отсортированную выборку записей после курсора."""
+        if position is not None:
+            queryset = queryset.filter(self.build_filter(position, reverse))
+        return queryset.order_by(*ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_ordering(queryset)
+        self.ordering_fields = tuple(
+            field.lstrip('-') for field in self.ordering
+        )
+        position, reverse = self.decode_cursor(request, queryset)
+        queryset = self.load_ordering_fields(queryset)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            )
+        queryset = self.get_page_queryset(
+            queryset, position, reverse, ordering
+        )
+
+        # Берем на одну запись больше, чтобы узнать, есть ли еще страница
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        self.page = results[:self.limit]
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._get_link(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._get_link(self.get_position(self.page[0]), True)
+
+    def _get_link(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param,
+            self.encode_cursor(position, reverse)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+
+class OptionalKeysetPagination(KeysetPagination):
+    """
+    Пагинация по ключу, которая включается параметром `cursor` или `limit`.
+    Без них список отдается целиком, как раньше.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if (self.cursor_query_param not in params
+                and self.limit_query_param not in params):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CommentPagination(OptionalKeysetPagination):
+    """Пагинация комментариев по ключу (created, id)."""
+    ordering = ('created', 'id')
+
+
+class FollowPagination(OptionalKeysetPagination):
+    """Пагинация подписок в порядке их создания."""
+    ordering = ('id',)
+
+
+class FeedPagination(KeysetPagination):
+    """
+    Пагинация ленты подписок.
+    При включенной рассылке сначала выбирает не больше страницы записей
+    из материализованной ленты и не больше страницы постов, читаемых
+    запросом, каждую часть по своему индексу, и уже их сортирует вместе.
+    """
+
+    def get_page_queryset(self, queryset, position, reverse, ordering):
+        queryset = super().get_page_queryset(
+            queryset, position, reverse, ordering
+        )
+        if not timeline.is_enabled():
+            return queryset
+        user = self.request.user
+        # В ленте ключ сортировки хранится как (pub_date, post_id)
+        rename = {'id': 'post_id'}
+        entry_fields = tuple(
+            rename.get(name, name) for name in self.ordering_fields
+        )
+        entry_ordering = tuple(
+            field.replace(name, rename.get(name, name))
+            for field, name in zip(ordering, self.ordering_fields)
+        )
+        entries = TimelineEntry.objects.filter(user=user)
+        pulled = Post.objects.filter(timeline.pull_condition(user))
+        if position is not None:
+            entries = entries.filter(
+                self.build_filter(position, reverse, entry_fields)
+            )
+            pulled = pulled.filter(self.build_filter(position, reverse))
+        size = self.limit + 1
+        return queryset.filter(
+            Q(id__in=entries.order_by(*entry_ordering)
+              .values('post_id')[:size])
+            | Q(id__in=pulled.order_by(*ordering).values('id')[:size])
+        )
 
 
 class PostPagination(LimitOffsetPagination):
     """
     Класс для пагинации постов с использованием лимита и смещения.
     Наследуется от LimitOffsetPagination для настройки ответа.
+    Если в запросе передан параметр `cursor`, включается пагинация
+    по ключу (pub_date, id) с тем же форматом ответа, но без подсчета
+    общего количества постов.
+    Способ подсчета `count` задается атрибутом `count_strategy`
+    вьюсета (см. api/counts.py), по умолчанию - точный COUNT(*).
     """
+    keyset_class = KeysetPagination
+    count_strategy = ExactCount()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            self.count = None
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def paginate_queryset_async(self, queryset, request, view=None):
+        """
+        Асинхронный вариант paginate_queryset(): подсчет и выборка
+        страницы не зависят друг от друга и идут параллельно.
+        """
+        if self.keyset_class.cursor_query_param in request.query_params:
+            return await run_blocking(
+                self.paginate_queryset, queryset, request, view
+            )
+        self.view = view
+        self.keyset = None
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        self.count, page = await asyncio.gather(
+            run_blocking(self.get_count, queryset),
+            run_blocking(
+                list, queryset[self.offset:self.offset + self.limit]
+            ),
+        )
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return page
+
+    def get_count(self, queryset):
+        strategy = getattr(self.view, 'count_strategy', None)
+        return (strategy or self.count_strategy).count(queryset)
+
+    def get_next_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_previous_link()
+        return super().get_previous_link()
+
     def get_paginated_response(self, data):
         return Response({
             # Общее количество объектов
@@ -1,26 +1,76 @@
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator  # Импортируем валидатор
+from posts.images import validate_image_dimensions, variant_name
 from posts.models import Comment, Post, Follow, Group
 
 
-class PostSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Сериализатор с урезанным набором полей: `fields` оставляет только
+    перечисленные поля, `exclude` убирает перечисленные.
+    """
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = set(fields or ()) | set(exclude or ())
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': [f'Неизвестные поля: {", ".join(sorted(unknown))}.']
+            })
+        for name in list(self.fields):
+            if (fields and name not in fields) or name in (exclude or ()):
+                self.fields.pop(name)
+
+
+class PostImageField(serializers.ImageField):
+    """
+    Картинка поста. Параметры запроса `image_size` (small, medium, large)
+    и `image_format` (webp) выбирают копию картинки, см. posts/images.py.
+    """
+    # Колонки модели, из которых собирается значение (см. api/compiled.py)
+    source_columns = ('image', 'image_variants')
+
+    def get_variant(self):
+        request = self.context.get('request')
+        params = getattr(request, 'query_params', None) or {}
+        return params.get('image_size'), params.get('image_format')
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return self.from_columns(value.name, value.instance.image_variants)
+
+    def from_columns(self, name, variants):
+        if not name:
+            return None
+        model_field = Post._meta.get_field('image')
+        name = variant_name(name, variants, *self.get_variant())
+        return super().to_representation(
+            model_field.attr_class(None, model_field, name)
+        )
+
+
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.CharField(source='author.username', read_only=True)
+    image = PostImageField(
+        required=False, allow_null=True,
+        validators=[validate_image_dimensions]
+    )
     group = serializers.PrimaryKeyRelatedField(
         queryset=Group.objects.all(), allow_null=True, required=False
     )
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'text', 'pub_date', 'image', 'group']
-        read_only_fields = ['id', 'pub_date', 'author']
-
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        representation['group'] = instance.group.id if hasattr(instance, 'group') and instance.group else None
-        return representation
+        fields = [
+            'id', 'author', 'text', 'pub_date', 'image', 'group',
+            'comments_count'
+        ]
+        read_only_fields = ['id', 'pub_date', 'author', 'comments_count']
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(read_only=True, slug_field='username')
 
     class Meta:
@@ -29,13 +79,13 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Group
         fields = ['id', 'title', 'slug', 'description']
 
 
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = serializers.CharField(source='user.username', read_only=True)
     following = serializers.CharField(source='following.username', read_only=True)
 
@@ -56,3 +106,31 @@ class FollowSerializer(serializers.ModelSerializer):
         if self.context['request'].user == value:
             raise serializers.ValidationError("Вы не можете подписаться на себя.")
         return value
+
+
+class FollowBulkSerializer(serializers.Serializer):
+    """Списки имен авторов для массовой подписки и отписки."""
+    follow = serializers.ListField(
+        child=serializers.CharField(max_length=150), required=False
+    )
+    unfollow = serializers.ListField(
+        child=serializers.CharField(max_length=150), required=False
+    )
+
+    def validate(self, attrs):
+        follow = attrs.get('follow', [])
+        unfollow = attrs.get('unfollow', [])
+        if not follow and not unfollow:
+            raise serializers.ValidationError(
+                "Передайте список имен в поле follow или unfollow."
+            )
+        limit = self.context['bulk_limit']
+        if len(follow) + len(unfollow) > limit:
+            raise serializers.ValidationError(
+                f"Не больше {limit} имен за один запрос."
+            )
+        if set(follow) & set(unfollow):
+            raise serializers.ValidationError(
+                "Одно имя не может быть одновременно в follow и unfollow."
+            )
+        return attrs
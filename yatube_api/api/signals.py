@@ -0,0 +1,52 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from posts.models import Comment, Group, Post, User
+from .authentication import forget_user
+from .caching import invalidate_responses
+from .counts import invalidate_counts
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_counts_on_create(sender, instance, created, **kwargs):
+    # Изменение поста не влияет на количество, сбрасываем только при создании
+    if created:
+        invalidate_counts(Post)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_post_counts_on_delete(sender, instance, **kwargs):
+    invalidate_counts(Post)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_responses(sender, instance, **kwargs):
+    invalidate_responses(Post, instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_responses(sender, instance, **kwargs):
+    invalidate_responses(Group, instance.pk)
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_group_posts_responses(sender, instance, **kwargs):
+    # Посты группы отвязываются UPDATE-запросом без сигналов
+    post_ids = instance.post_set.values_list('id', flat=True)
+    invalidate_responses(Post, *post_ids)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post_response(sender, instance, **kwargs):
+    # В постах выводится счетчик комментариев
+    invalidate_responses(Post, instance.post_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_authenticated_user(sender, instance, **kwargs):
+    # В том числе при деактивации: is_active проверяется по кешу
+    forget_user(instance.pk)
@@ -0,0 +1,172 @@
+"""
+Ограничение частоты запросов по скользящему окну.
+
+Лимиты задаются в REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] по ключу
+'<throttle_scope>.<action>' (для обычных представлений - просто
+'<throttle_scope>'), например 'posts.create': '30/min'. Действия
+без лимита не ограничиваются и не обращаются к кешу.
+
+Вместо истории запросов, как в SimpleRateThrottle из DRF, для
+каждого клиента хранятся только два счетчика: текущего и прошлого
+окна. Число запросов за последнее окно оценивается как
+    прошлое * (доля прошлого окна, еще попадающая в интервал) + текущее.
+Счетчик увеличивается атомарно, поэтому одновременные запросы
+не теряют друг друга, а проверка - это три операции со счетчиками
+независимо от лимита:
+  * в кеше (CacheCounters) - cache.add() и cache.incr(), атомарные
+    в LocMemCache, Memcached и Redis;
+  * в БД (DatabaseCounters), если кеш проекта - DatabaseCache:
+    его incr() - это get() и set(), и одновременные увеличения
+    затирали бы друг друга. Счетчики хранятся в таблице
+    ThrottleCounter и увеличиваются запросом UPDATE с F().
+При превышении лимита DRF отвечает 429 с заголовком Retry-After.
+"""
+import time
+from datetime import timedelta
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from posts.models import ThrottleCounter
+
+
+class CacheCounters:
+    """Счетчики в кеше Django."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def incr(self, key, timeout):
+        self.cache.add(key, 0, timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Ключ истек между add() и incr()
+            self.cache.set(key, 1, timeout)
+            return 1
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+    def decr(self, key):
+        self.cache.decr(key)
+
+
+class DatabaseCounters:
+    """
+    Счетчики в таблице ThrottleCounter. Строка счетчика блокируется
+    запросом UPDATE до конца транзакции, поэтому каждый запрос
+    читает свое значение. Истекшие счетчики удаляются при создании
+    счетчика нового окна.
+    """
+
+    def __init__(self):
+        self.using = router.db_for_write(ThrottleCounter)
+        self.counters = ThrottleCounter.objects.using(self.using)
+
+    def incr(self, key, timeout):
+        now = timezone.now()
+        with transaction.atomic(using=self.using):
+            self.counters.bulk_create([ThrottleCounter(
+                key=key, expires=now + timedelta(seconds=timeout)
+            )], ignore_conflicts=True)
+            self.counters.filter(key=key).update(count=F('count') + 1)
+            count = self.counters.filter(key=key).values_list(
+                'count', flat=True
+            ).get()
+        if count == 1:
+            self.counters.filter(expires__lte=now).delete()
+        return count
+
+    def get(self, key):
+        return self.counters.filter(
+            key=key, expires__gt=timezone.now()
+        ).values_list('count', flat=True).first() or 0
+
+    def decr(self, key):
+        self.counters.filter(key=key).update(count=F('count') - 1)
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Лимит по скользящему окну на пользователя, а для анонимных
+    запросов - на IP-адрес.
+    """
+    cache_alias = DEFAULT_CACHE_ALIAS
+    timer = time.time
+    cache_format = 'throttle:%(scope)s:%(ident)s:%(window)d'
+
+    def __init__(self):
+        # Лимит зависит от действия, поэтому выбирается в allow_request
+        self.rate = None
+
+    def get_scope(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        action = getattr(view, 'action', None)
+        if scope and action:
+            return f'{scope}.{action}'
+        return scope
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user{request.user.pk}'
+        return f'ip{super().get_ident(request)}'
+
+    def get_window_key(self, window):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.ident, 'window': window
+        }
+
+    def get_counters(self):
+        cache = caches[self.cache_alias]
+        if isinstance(cache, DatabaseCache):
+            return DatabaseCounters()
+        return CacheCounters(cache)
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        self.rate = self.get_rate() if self.scope else None
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.ident = self.get_ident(request)
+
+        now = self.timer()
+        window, elapsed = divmod(now, self.duration)
+        window = int(window)
+        key = self.get_window_key(window)
+        counters = self.get_counters()
+        # Счетчик живет два окна: в следующем он нужен как прошлое окно
+        self.current = counters.incr(key, self.duration * 2)
+        self.previous = counters.get(self.get_window_key(window - 1))
+        self.elapsed = elapsed
+        if self.estimate(self.previous, self.current, elapsed) <= (
+            self.num_requests
+        ):
+            return True
+        # Отклоненный запрос не должен отодвигать момент разблокировки
+        counters.decr(key)
+        self.current -= 1
+        return False
+
+    def estimate(self, previous, current, elapsed):
+        return previous * (1 - elapsed / self.duration) + current
+
+    def wait(self):
+        """Через сколько секунд следующий запрос уложится в лимит."""
+        free = self.num_requests - 1
+        if self.current <= free:
+            # Хватит того, что прошлое окно уйдет из интервала
+            share = 1 - (free - self.current) / self.previous
+            return max(share * self.duration - self.elapsed, 0)
+        # Ждем конца окна, а затем, пока из интервала уйдет текущее
+        share = max(1 - free / self.current, 0)
+        return self.duration - self.elapsed + share * self.duration
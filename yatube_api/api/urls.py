@@ -1,7 +1,7 @@
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from .views import (PostViewSet, FollowViewSet,
-                    CommentViewSet, GroupViewSet)
+from .views import (PostViewSet, FeedViewSet, FollowViewSet,
+                    CommentViewSet, GroupViewSet, TokenObtainPairView)
 from rest_framework_simplejwt import views
 
 router = DefaultRouter()
@@ -13,12 +13,13 @@ router.register(
 )
 router.register(r'groups', GroupViewSet, basename='group')
 router.register(r'follow', FollowViewSet, basename='follow')
+router.register(r'feed', FeedViewSet, basename='feed')
 
 urlpatterns = [
     path('', include(router.urls)),
     path(
         'jwt/create/',
-        views.TokenObtainPairView.as_view(),
+        TokenObtainPairView.as_view(),
         name='token_obtain_pair'
     ),
     path(
@@ -30,3 +31,31 @@ urlpatterns = [
          name='token_verify'),
     path('djoser/', include('djoser.urls')),  # Добавляем URL для Djoser
 ]
+
+# Под ASGI чтение постов, групп и комментариев обслуживают асинхронные
+# варианты представлений, см. api/asynchronous.py и yatube_api/asgi.py
+async_urlpatterns = [
+    path(
+        'posts/',
+        PostViewSet.as_async_view({'get': 'list', 'post': 'create'}),
+        name='post-list'
+    ),
+    re_path(
+        r'^posts/(?P<pk>[^/.]+)/$',
+        PostViewSet.as_async_view({
+            'get': 'retrieve', 'put': 'update',
+            'patch': 'partial_update', 'delete': 'destroy',
+        }),
+        name='post-detail'
+    ),
+    re_path(
+        r'^posts/(?P<post_id>\d+)/comments/$',
+        CommentViewSet.as_async_view({'get': 'list', 'post': 'create'}),
+        name='comment-list'
+    ),
+    path(
+        'groups/',
+        GroupViewSet.as_async_view({'get': 'list'}),
+        name='group-list'
+    ),
+] + urlpatterns
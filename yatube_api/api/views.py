@@ -1,31 +1,65 @@
+import contextvars
+import sys
+
 from rest_framework import viewsets, permissions, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from .pagination import PostPagination
+from .asynchronous import (AsyncStreamingHttpResponse, AsyncViewSetMixin,
+                           blocking_action, run_blocking)
+from .caching import cache_response, invalidate_responses
+from .conditional import comments_etag, post_etag
+from .counts import CachedCount, EstimatedCount, invalidate_counts
+from .mixins import (BulkCreateMixin, CompiledSerializerMixin,
+                     QueryPlanMixin, ReplicaReadMixin, SparseFieldsetMixin)
+from .pagination import (CommentPagination, FeedPagination,
+                         FollowPagination, PostPagination)
+from posts import social_graph, timeline
+from posts.counters import change_comments_count
 from posts.models import Post, Follow, Comment, Group
 from . import serializers
 from django.contrib.auth.models import User
-from rest_framework.exceptions import NotFound
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework_simplejwt import views as jwt_views
 from .permissions import IsAuthorOrReadOnly, IsFollowing
 
 
-class GroupViewSet(viewsets.ReadOnlyModelViewSet):
+class GroupViewSet(ReplicaReadMixin, SparseFieldsetMixin, QueryPlanMixin,
+                   CompiledSerializerMixin, AsyncViewSetMixin,
+                   viewsets.ReadOnlyModelViewSet):
     queryset = Group.objects.all()
     serializer_class = serializers.GroupSerializer
     permission_classes = [permissions.AllowAny]
 
+    @cache_response(Group)
     def list(self, request, *args, **kwargs):
         self.pagination_class = None
-        return super().list(request, *args, **kwargs)
+        return self.list_response(self.get_queryset())
+
+    @cache_response(Group)
+    async def list_async(self, request, *args, **kwargs):
+        self.pagination_class = None
+        return await self.list_response_async(self.get_queryset())
 
+    @cache_response(Group, detail=True)
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ReplicaReadMixin, SparseFieldsetMixin, QueryPlanMixin,
+                  CompiledSerializerMixin, AsyncViewSetMixin, BulkCreateMixin,
+                  viewsets.ModelViewSet):
     queryset = Post.objects.all()
     serializer_class = serializers.PostSerializer
     pagination_class = PostPagination
+    count_strategy = EstimatedCount(fallback=CachedCount(timeout=60))
     permission_classes = [IsAuthorOrReadOnly]
+    throttle_scope = 'posts'
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -34,27 +68,41 @@ class PostViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    @cache_response(Post)
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        return self.list_response(self.get_queryset())
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+    @cache_response(Post)
+    async def list_async(self, request, *args, **kwargs):
+        return await self.list_response_async(self.get_queryset())
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(author=request.user)
+        post = serializer.save(author=request.user)
+        timeline.schedule_fan_out(post)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Массовое создание постов текущего пользователя."""
+        return self.bulk_create(request, author=request.user)
+
+    def perform_bulk_create(self, posts):
+        invalidate_counts(Post)
+        invalidate_responses(Post)
+        timeline.schedule_fan_out(*posts)
+
+    @cache_response(Post, detail=True)
+    @method_decorator(condition(etag_func=post_etag))
     def retrieve(self, request, *args, **kwargs):
         post = self.get_object()
         serializer = self.get_serializer(post)
         return Response(serializer.data)
 
+    # ETag зависит от поста, а пост читается после проверки ETag
+    retrieve_async = blocking_action('retrieve')
+
     def partial_update(self, request, pk=None):
         post = self.get_object()
         if post.author != request.user:
@@ -90,10 +138,54 @@ class PostViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class FeedViewSet(SparseFieldsetMixin, QueryPlanMixin,
+                  CompiledSerializerMixin, viewsets.GenericViewSet):
+    """
+    Лента подписок: посты всех авторов, на которых подписан пользователь.
+    Строится одним запросом с подзапросом по подпискам
+    и листается только по ключу (pub_date, id).
+    При включенной рассылке (FEED_FANOUT) читается из материализованной
+    ленты, см. posts/timeline.py.
+    """
+    serializer_class = serializers.PostSerializer
+    pagination_class = FeedPagination
+    permission_classes = [permissions.IsAuthenticated]
+    # Начиная с этого числа подписок выгоднее идти по индексу даты
+    # и проверять подписку для каждого поста, чем собирать все посты
+    # авторов по индексу автора и сортировать их
+    scan_threshold = 500
+
+    def get_queryset(self):
+        if timeline.is_enabled():
+            condition = timeline.feed_condition(self.request.user)
+            return self.apply_query_plan(Post.objects.filter(condition))
+        follows = Follow.objects.filter(user=self.request.user)
+        following_count = social_graph.get_following_count(
+            self.request.user.id
+        )
+        if following_count >= self.scan_threshold:
+            condition = Exists(follows.filter(following=OuterRef('author')))
+        else:
+            condition = Q(author__in=follows.values('following'))
+        return self.apply_query_plan(Post.objects.filter(condition))
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.get_queryset())
+
+
+class CommentViewSet(ReplicaReadMixin, SparseFieldsetMixin,
+                     QueryPlanMixin, CompiledSerializerMixin,
+                     AsyncViewSetMixin, BulkCreateMixin,
+                     viewsets.ModelViewSet):
     serializer_class = serializers.CommentSerializer
+    pagination_class = CommentPagination
     permission_classes = [permissions.IsAuthenticated]
     permission_classes = [IsAuthorOrReadOnly]
+    throttle_scope = 'comments'
+    # Сколько комментариев читать и сериализовать за раз при потоковой выдаче
+    stream_chunk_size = 500
+    # Потоковая выдача для асинхронного представления (list_async)
+    stream_async = False
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -104,24 +196,128 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         post_id = self.kwargs['post_id']
-        return Comment.objects.filter(post_id=post_id)
+        return self.apply_query_plan(Comment.objects.filter(post_id=post_id))
 
-    def list(self, request, post_id=None):
-        try:
-            Post.objects.get(id=post_id)
-        except Post.DoesNotExist:
+    def check_post_exists(self):
+        if not Post.objects.filter(pk=self.kwargs['post_id']).exists():
             raise NotFound("Публикация не найдена.")
 
-        comments = self.get_queryset()
-        serializer = self.get_serializer(comments, many=True)
-        return Response(serializer.data)
+    @method_decorator(condition(etag_func=comments_etag))
+    def list(self, request, post_id=None):
+        comments = self.get_queryset().order_by('created', 'id')
+        if request.query_params.get('stream') in ('1', 'true'):
+            self.check_post_exists()
+            return self.stream_list(comments)
+
+        comments = self.read_queryset(comments)
+        page = self.paginate_queryset(comments)
+        items = list(comments) if page is None else page
+        # Если комментарии нашлись, пост точно есть: существование
+        # проверяем отдельным запросом только для пустого списка
+        if not items:
+            self.check_post_exists()
+
+        data = self.serialize_many(items)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    async def list_async(self, request, post_id=None):
+        # Существование поста проверяется только по результату выборки,
+        # поэтому действие целиком выполняется в пуле потоков
+        self.stream_async = True
+        return await run_blocking(self.list, request, post_id=post_id)
+
+    def stream_list(self, queryset):
+        """
+        Отдает JSON-массив комментариев по частям, не собирая весь ответ
+        в памяти: комментарии читаются итератором и сериализуются пачками.
+        Части читаются уже после выхода из представления, поэтому
+        запросы к БД выполняются в контексте запроса: с той же
+        репликой, что выбрана для него (posts/replicas.py).
+        """
+        # Тот же JSON-рендерер, что и у обычных ответов
+        renderer = next(
+            (renderer for renderer in self.get_renderers()
+             if isinstance(renderer, JSONRenderer)),
+            JSONRenderer()
+        )
+        context = contextvars.copy_context()
+        if self.stream_async:
+            return AsyncStreamingHttpResponse(
+                self.generate_async(queryset, renderer, context),
+                content_type='application/json'
+            )
 
-    def create(self, request, post_id=None):
-        try:
-            post = Post.objects.get(id=post_id)
-        except Post.DoesNotExist:
-            raise NotFound("Публикация не найдена.")
+        def generate():
+            yield b'['
+            chunk = []
+            separator = b''
+            for comment in queryset.iterator(
+                chunk_size=self.stream_chunk_size
+            ):
+                chunk.append(comment)
+                if len(chunk) < self.stream_chunk_size:
+                    continue
+                yield separator + self._render_chunk(renderer, chunk)
+                separator = b','
+                chunk = []
+            if chunk:
+                yield separator + self._render_chunk(renderer, chunk)
+            yield b']'
+
+        parts = generate()
+        return StreamingHttpResponse(
+            iter(lambda: context.run(next, parts, None), None),
+            content_type='application/json'
+        )
 
+    async def generate_async(self, queryset, renderer, context):
+        """
+        Части потоковой выдачи под ASGI. Курсор итератора нельзя
+        читать из цикла событий и из разных потоков пула, поэтому каждая
+        пачка - отдельный запрос по ключу (created, id) в run_blocking().
+        """
+        yield b'['
+        separator = b''
+        last = None
+        while True:
+            part, last = await run_blocking(
+                context.run, self._read_chunk, queryset, renderer, last
+            )
+            if part is None:
+                break
+            yield separator + part
+            separator = b','
+            if last is None:
+                break
+        yield b']'
+
+    def _read_chunk(self, queryset, renderer, last):
+        """
+        Возвращает пару (часть ответа, последний комментарий пачки)
+        для комментариев после `last`. Вместо последнего комментария
+        None, если комментариев больше нет.
+        """
+        if last is not None:
+            queryset = queryset.filter(
+                Q(created__gte=last.created)
+                & (Q(created__gt=last.created)
+                   | Q(created=last.created, pk__gt=last.pk))
+            )
+        chunk = list(queryset[:self.stream_chunk_size])
+        if not chunk:
+            return None, None
+        if len(chunk) < self.stream_chunk_size:
+            return self._render_chunk(renderer, chunk), None
+        return self._render_chunk(renderer, chunk), chunk[-1]
+
+    def _render_chunk(self, renderer, comments):
+        data = self.get_serializer(comments, many=True).data
+        # Убираем квадратные скобки, массив собирается в generate()
+        return renderer.render(data)[1:-1]
+
+    def create(self, request, post_id=None):
         if not request.user.is_authenticated:
             return Response(
                 {"detail": "Учетные данные не были предоставлены."},
@@ -130,9 +326,27 @@ class CommentViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(author=request.user, post=post)
+        with transaction.atomic():
+            # Счетчик обновляется до вставки: ноль измененных строк
+            # значит, что поста нет, и отдельный запрос к нему не нужен
+            if not change_comments_count(post_id, 1):
+                raise NotFound("Публикация не найдена.")
+            serializer.save(author=request.user, post_id=int(post_id))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, post_id=None):
+        """Массовое добавление комментариев к посту, например при импорте."""
+        self.check_post_exists()
+        return self.bulk_create(
+            request, author=request.user, post_id=int(post_id)
+        )
+
+    def perform_bulk_create(self, comments):
+        post_id = comments[0].post_id
+        change_comments_count(post_id, len(comments))
+        invalidate_responses(Post, post_id)
+
     def retrieve(self, request, post_id=None, pk=None):
         try:
             comment = self.get_object()
@@ -177,25 +391,135 @@ class CommentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
+            change_comments_count(comment.post_id, -1)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class FollowViewSet(viewsets.GenericViewSet):
+def _prefix_upper_bound(prefix):
+    """
+    Наименьшая строка больше всех строк с префиксом `prefix`:
+    условие prefix <= x < bound читается по обычному индексу.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class FollowViewSet(ReplicaReadMixin, SparseFieldsetMixin, QueryPlanMixin,
+                    CompiledSerializerMixin, viewsets.GenericViewSet):
     serializer_class = serializers.FollowSerializer
+    pagination_class = FollowPagination
     # Объединяем permission_classes в один список
     permission_classes = [permissions.IsAuthenticated, IsFollowing]  # Изменено
+    search_modes = ('contains', 'prefix')
+    throttle_scope = 'follow'
+    # Сколько имен можно передать в bulk за один запрос
+    bulk_limit = 500
 
     def get_queryset(self):
         return Follow.objects.filter(user=self.request.user)
 
+    def filter_search(self, queryset):
+        """
+        Поиск по имени автора. Режим `contains` (по умолчанию) ищет
+        подстроку без учета регистра, режим `prefix` - начало имени
+        с учетом регистра диапазоном, который читается по индексу username.
+        """
+        search = self.request.query_params.get('search')
+        mode = self.request.query_params.get('search_mode', 'contains')
+        if mode not in self.search_modes:
+            raise ValidationError({
+                'search_mode': [
+                    f'Допустимые значения: {", ".join(self.search_modes)}.'
+                ]
+            })
+        if not search:
+            return queryset
+        if mode == 'prefix':
+            queryset = queryset.filter(following__username__gte=search)
+            upper_bound = _prefix_upper_bound(search)
+            if upper_bound is not None:
+                queryset = queryset.filter(
+                    following__username__lt=upper_bound
+                )
+            return queryset
+        return queryset.filter(following__username__icontains=search)
+
     def list(self, request, *args, **kwargs):
-        search = request.query_params.get('search', None)
-        queryset = self.get_queryset()
-        if search:
-            queryset = queryset.filter(following__username__icontains=search)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.filter_search(self.get_queryset()).order_by('id')
+        if (self.get_serializer_class() is serializers.FollowSerializer
+                and not self.get_sparse_fields()):
+            # Быстрый путь: имя подписчика известно, имя автора читаем
+            # одним запросом без создания объектов моделей
+            rows = queryset.values('id', 'following__username')
+            page = self.paginate_queryset(rows)
+            data = [
+                {
+                    'user': request.user.username,
+                    'following': row['following__username'],
+                }
+                for row in (rows if page is None else page)
+            ]
+        else:
+            queryset = self.read_queryset(self.apply_query_plan(queryset))
+            page = self.paginate_queryset(queryset)
+            data = self.serialize_many(queryset if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Счетчики подписок пользователя из параметра `username`
+        (по умолчанию текущего) и подписан ли на него текущий пользователь.
+        """
+        username = request.query_params.get('username')
+        if not username or username == request.user.username:
+            user = request.user
+        else:
+            try:
+                user = User.objects.only('id', 'username').get(
+                    username=username
+                )
+            except User.DoesNotExist:
+                raise NotFound("Пользователь не найден.")
+        followers, following = social_graph.get_counts(user.id)
+        data = {
+            'username': user.username,
+            'followers': followers,
+            'following': following,
+        }
+        if user != request.user:
+            data['is_following'] = social_graph.is_following(
+                request.user.id, user.id
+            )
+        return Response(data)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Массовая подписка и отписка, например при импорте контактов:
+        {"follow": [имена], "unfollow": [имена]}.
+        Возвращает статус по каждому имени.
+        """
+        serializer = serializers.FollowBulkSerializer(
+            data=request.data, context={'bulk_limit': self.bulk_limit}
+        )
+        serializer.is_valid(raise_exception=True)
+        data = {}
+        if serializer.validated_data.get('follow'):
+            data['follow'] = social_graph.bulk_follow(
+                request.user.id, serializer.validated_data['follow']
+            )
+        if serializer.validated_data.get('unfollow'):
+            data['unfollow'] = social_graph.bulk_unfollow(
+                request.user.id, serializer.validated_data['unfollow']
+            )
+        return Response(data)
 
     def create(self, request, *args, **kwargs):
         following_username = request.data.get('following')
@@ -211,31 +535,30 @@ class FollowViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            following_user = User.objects.get(username=following_username)
-        except User.DoesNotExist:
-            return Response(
-                {"error": "Пользователь не найден."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        if Follow.objects.filter(
-            user=request.user, following=following_user
-        ).exists():
+        following_id = social_graph.follow(
+            request.user.id, following_username
+        )
+        if following_id is None:
+            if not User.objects.filter(username=following_username).exists():
+                return Response(
+                    {"error": "Пользователь не найден."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
             return Response(
                 {"error": "Вы уже подписаны на этого пользователя."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        Follow.objects.create(
-            user=request.user, following=following_user
-        )
-
         return Response(
             {
                 "user": request.user.username,
-                "following": following_user.username
+                "following": following_username
             },
             status=status.HTTP_201_CREATED
         )
 # Удалены ненужные методы (retrieve, partial_update, destroy) для соответствия требованиям
+
+
+class TokenObtainPairView(jwt_views.TokenObtainPairView):
+    # Каждый вызов хеширует пароль, поэтому частота ограничена
+    throttle_scope = 'jwt.create'
@@ -16,4 +16,6 @@ class CommentAdmin(admin.ModelAdmin):
 
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
-    list_display = ('user', 'following')  # Отображаем поля в админке
\ No newline at end of file
+    list_display = ('user', 'following')  # Отображаем поля в админке
+    # Имена пользователей читаем тем же запросом, а не запросом на строку
+    list_select_related = ('user', 'following')
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""
+Денормализованные счетчики комментариев у постов.
+
+Счетчик меняется атомарным UPDATE ... SET comments_count = comments_count + n
+в той же транзакции, что и сам комментарий, поэтому параллельные запросы
+не теряют изменений. Если счетчики все же разошлись с данными
+(удаление в обход API, ручные правки БД), их пересчитывает
+команда `python manage.py recount_comments`.
+"""
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Post
+
+
+def change_comments_count(post_id, delta):
+    """
+    Меняет счетчик комментариев поста на `delta`.
+    Возвращает число измененных строк: 0 значит, что поста нет.
+    """
+    # Разошедшийся счетчик не уводим ниже нуля, его исправит пересчет
+    return Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, Value(0))
+    )
+
+
+def forget_author_comments(user):
+    """
+    Уменьшает счетчики постов, с которых каскадом удаляются
+    комментарии пользователя. Посты самого пользователя удаляются
+    вместе с ним, их счетчики не трогаем.
+    """
+    totals = Comment.objects.filter(author=user).exclude(
+        post__author=user
+    ).values('post').annotate(total=Count('id')).values_list('post', 'total')
+    for post_id, total in totals:
+        change_comments_count(post_id, -total)
+
+
+def actual_comments_count():
+    """Выражение с настоящим числом комментариев поста."""
+    totals = Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+        'post'
+    ).annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(totals), Value(0))
+
+
+def recount_comments(batch_size=1000):
+    """
+    Пересчитывает разошедшиеся счетчики пачками по диапазонам id,
+    каждая пачка - один UPDATE в своей транзакции.
+    Возвращает число исправленных постов.
+    """
+    fixed = 0
+    last_id = Post.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+    for start in range(0, last_id + 1, batch_size):
+        actual = actual_comments_count()
+        fixed += Post.objects.filter(
+            pk__gte=start, pk__lt=start + batch_size
+        ).exclude(comments_count=actual).update(comments_count=actual)
+    return fixed
@@ -0,0 +1,84 @@
+"""
+Настройка соединений с БД для профиля production (см. DB_PROFILE
+в settings.py).
+
+При создании соединения с SQLite выполняются PRAGMA из
+DATABASE_TUNING['SQLITE_PRAGMAS']: журнал WAL, в котором читатели
+не блокируют писателя, synchronous=NORMAL (в режиме WAL безопасно
+при сбое процесса), отображение файла в память и время ожидания
+блокировки вместо немедленной ошибки "database is locked".
+
+Постоянные соединения (CONN_MAX_AGE > 0) могут устареть: сервер БД
+закрыл соединение, а у SQLite файл базы заменили или удалили
+(соединение продолжит работать со старым файлом). При включенном
+DATABASE_TUNING['HEALTH_CHECKS'] перед каждым запросом, а в потоках
+асинхронных представлений - перед каждым вызовом, соединения
+проверяются и устаревшие закрываются; следующий запрос к БД
+откроет новое.
+"""
+import os
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULTS = {
+    'SQLITE_PRAGMAS': {},
+    'HEALTH_CHECKS': False,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'DATABASE_TUNING', {}).get(name, DEFAULTS[name])
+
+
+def _database_file(connection):
+    """(устройство, inode) файла базы SQLite или None."""
+    if connection.is_in_memory_db():
+        return None
+    try:
+        stat = os.stat(connection.settings_dict['NAME'])
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    connection.database_file = _database_file(connection)
+    pragmas = get_setting('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_healthy(connection):
+    if connection.vendor == 'sqlite':
+        # Для SQLite is_usable() всегда истинно, проверяем сам файл
+        file = getattr(connection, 'database_file', None)
+        return file is None or file == _database_file(connection)
+    return connection.is_usable()
+
+
+def check_connection(connection):
+    """Закрывает устаревшее соединение. Возвращает, было ли оно живым."""
+    if connection.connection is None or connection.in_atomic_block:
+        return True
+    if is_healthy(connection):
+        return True
+    connection.close()
+    return False
+
+
+@receiver(request_started)
+def close_stale_connections(**kwargs):
+    if not get_setting('HEALTH_CHECKS'):
+        return
+    for connection in connections.all():
+        check_connection(connection)
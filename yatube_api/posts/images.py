@@ -0,0 +1,143 @@
+"""
+Обработка картинок постов.
+
+При загрузке картинка проверяется на размеры, пересохраняется без
+метаданных (EXIF с геотегами и т.п.; поворот из EXIF применяется
+к самим пикселям), и рядом с ней сохраняются уменьшенные копии
+размеров из POST_IMAGES['SIZES'] в исходном формате и в WebP.
+Имена копий хранятся в Post.image_variants:
+
+    {'format': 'jpeg',
+     'sizes': {'original': {'jpeg': 'posts/a.jpg', 'webp': 'posts/a.webp'},
+               'small': {'jpeg': 'posts/a_small.jpg',
+                         'webp': 'posts/a_small.webp'}}}
+
+Копии крупнее оригинала не создаются: для них отдается оригинал,
+см. variant_name(). Анимированные картинки сохраняются как есть.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+DEFAULTS = {
+    'MAX_WIDTH': 8000,
+    'MAX_HEIGHT': 8000,
+    # Размер копии - длина большей стороны в пикселях
+    'SIZES': {'small': 320, 'medium': 800, 'large': 1600},
+    'WEBP': True,
+    'QUALITY': 85,
+}
+ORIGINAL = 'original'
+# Форматы, в которых картинка хранится; остальные пересохраняются в PNG
+FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def get_setting(name):
+    return getattr(settings, 'POST_IMAGES', {}).get(name, DEFAULTS[name])
+
+
+def validate_image_dimensions(image):
+    """Проверяет, что ширина и высота картинки не больше допустимых."""
+    max_width = get_setting('MAX_WIDTH')
+    max_height = get_setting('MAX_HEIGHT')
+    position = image.tell() if hasattr(image, 'tell') else None
+    try:
+        with Image.open(image) as source:
+            width, height = source.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Не удалось прочитать изображение.')
+    finally:
+        if position is not None:
+            image.seek(position)
+    if width > max_width or height > max_height:
+        raise ValidationError(
+            f'Размер изображения {width}x{height}, допустимо не больше '
+            f'{max_width}x{max_height} пикселей.'
+        )
+
+
+def _encode(image, image_format, icc_profile=None):
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGBA')
+    options = {'quality': get_setting('QUALITY')}
+    if image_format == 'JPEG':
+        options['optimize'] = True
+    if icc_profile:
+        # Цветовой профиль не метаданные: без него искажаются цвета
+        options['icc_profile'] = icc_profile
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _formats(image_format):
+    formats = [image_format]
+    if get_setting('WEBP') and image_format != 'WEBP':
+        formats.append('WEBP')
+    return formats
+
+
+def process_post_image(post):
+    """
+    Обрабатывает только что загруженную картинку поста: сохраняет
+    очищенный оригинал и копии в хранилище и заполняет image_variants.
+    Вызывается до сохранения поста (сигнал pre_save).
+    """
+    field_file = post.image
+    with Image.open(field_file) as source:
+        if getattr(source, 'is_animated', False):
+            post.image_variants = {}
+            return
+        image_format = source.format if source.format in FORMATS else 'PNG'
+        icc_profile = source.info.get('icc_profile')
+        image = ImageOps.exif_transpose(source)
+    # PNG пишет EXIF и текстовые блоки из info, сохраняем только пиксели
+    image.info = {}
+
+    stem = os.path.splitext(os.path.basename(field_file.name))[0]
+    extension = FORMATS[image_format]
+    field_file.save(
+        f'{stem}.{extension}', _encode(image, image_format, icc_profile),
+        save=False
+    )
+    storage = field_file.storage
+    base = os.path.splitext(field_file.name)[0]
+
+    sizes = {ORIGINAL: {image_format.lower(): field_file.name}}
+    if get_setting('WEBP') and image_format != 'WEBP':
+        sizes[ORIGINAL]['webp'] = storage.save(
+            f'{base}.webp', _encode(image, 'WEBP', icc_profile)
+        )
+    for size, pixels in get_setting('SIZES').items():
+        if max(image.size) <= pixels:
+            continue
+        thumbnail = image.copy()
+        thumbnail.thumbnail((pixels, pixels), Image.Resampling.LANCZOS)
+        sizes[size] = {
+            thumbnail_format.lower(): storage.save(
+                f'{base}_{size}.{FORMATS[thumbnail_format]}',
+                _encode(thumbnail, thumbnail_format, icc_profile)
+            )
+            for thumbnail_format in _formats(image_format)
+        }
+    post.image_variants = {'format': image_format.lower(), 'sizes': sizes}
+
+
+def variant_name(name, variants, size=None, image_format=None):
+    """
+    Имя файла копии нужного размера и формата. Если такой копии нет
+    (картинка меньше размера, формат не создавался или картинка
+    загружена до появления обработки), берется ближайшая замена
+    вплоть до самого оригинала `name`.
+    """
+    if not variants:
+        return name
+    sizes = variants['sizes']
+    files = sizes.get(size) or sizes[ORIGINAL]
+    return files.get(image_format) or files[variants['format']]
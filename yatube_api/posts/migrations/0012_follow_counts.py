@@ -0,0 +1,42 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:38
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_follow_counts(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    FollowCounts = apps.get_model('posts', 'FollowCounts')
+    counts = {}
+    for user_id, total in Follow.objects.values('following').annotate(
+        total=Count('id')
+    ).values_list('following', 'total'):
+        counts.setdefault(user_id, FollowCounts(user_id=user_id))
+        counts[user_id].followers = total
+    for user_id, total in Follow.objects.values('user').annotate(
+        total=Count('id')
+    ).values_list('user', 'total'):
+        counts.setdefault(user_id, FollowCounts(user_id=user_id))
+        counts[user_id].following = total
+    FollowCounts.objects.bulk_create(counts.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('posts', '0011_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowCounts',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='follow_counts', serialize=False, to='auth.user')),
+                ('followers', models.PositiveIntegerField(default=0)),
+                ('following', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_follow_counts, migrations.RunPython.noop),
+    ]
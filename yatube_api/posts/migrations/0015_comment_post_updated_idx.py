@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_throttle_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'updated'], name='comment_post_updated_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .images import validate_image_dimensions
+
 User = get_user_model()
 
 
@@ -29,11 +31,45 @@ class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
-    image = models.ImageField(upload_to='posts/', null=True, blank=True)
+    image = models.ImageField(
+        upload_to='posts/', null=True, blank=True,
+        validators=[validate_image_dimensions]
+    )
+    # Уменьшенные копии и WebP-версии картинки (см. posts/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     group = models.ForeignKey(Group, on_delete=models.SET_NULL, blank=True, null=True)
+    # Время последнего изменения, по нему строится ETag страницы поста
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+    # Число комментариев, поддерживается F()-обновлениями
+    # (см. posts/counters.py)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # Пост разослан в ленты подписчиков (см. posts/timeline.py)
+    fanned_out = models.BooleanField(default=False, editable=False)
 
     class Meta:
-        ordering = ('-pub_date',)  # Сортировка по дате публикации по убыванию
+        # Сортировка по дате публикации по убыванию,
+        # id делает порядок однозначным для пагинации по ключу
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            # Индекс под сортировку ленты и пагинацию по ключу
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_id_idx'
+            ),
+            # Посты автора и группы, от новых к старым
+            models.Index(
+                fields=['author', '-pub_date'], name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date'], name='post_group_pub_date_idx'
+            ),
+            # Частичный индекс по еще не разосланным постам:
+            # лента читает их запросом, см. posts/timeline.py
+            models.Index(
+                fields=['author', '-pub_date'],
+                condition=models.Q(fanned_out=False),
+                name='post_pending_fanout_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -47,6 +83,19 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField(
         'Дата добавления', auto_now_add=True, db_index=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Комментарии поста в порядке добавления
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+            # Последнее изменение комментариев поста для ETag списка
+            models.Index(
+                fields=['post', 'updated'], name='comment_post_updated_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -78,3 +127,50 @@ class Follow(models.Model):
         """
         # Форматируем строку для удобства чтения
         return f"{self.user.username} follows {self.following.username}"
+
+
+class FollowCounts(models.Model):
+    """
+    Модель счетчиков подписок пользователя.
+    Хранит число подписчиков и подписок, чтобы не считать строки Follow.
+    Поддерживается сервисом posts/social_graph.py.
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name='follow_counts'
+    )
+    followers = models.PositiveIntegerField(default=0)
+    following = models.PositiveIntegerField(default=0)
+
+
+class ThrottleCounter(models.Model):
+    """
+    Модель счетчика запросов для ограничения частоты.
+    Используется api/throttling.py вместо кеша, если кеш проекта -
+    DatabaseCache: его incr() не атомарен.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+    expires = models.DateTimeField(db_index=True)
+
+
+class TimelineEntry(models.Model):
+    """
+    Модель материализованной ленты подписок.
+    Хранит пост, доставленный подписчику при публикации,
+    и копию даты публикации для сортировки ленты без JOIN.
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='timeline')
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
@@ -0,0 +1,135 @@
+"""
+Чтение с реплик БД.
+
+Реплики - псевдонимы из DATABASES, перечисленные
+в DATABASE_REPLICAS['ALIASES']. ReplicaRouter направляет на реплику
+чтение только внутри routing(), и только если для текущего запроса
+вызван read_from_replica(): так делают вьюсеты для безопасных
+запросов к list/retrieve (api.mixins.ReplicaReadMixin). Все прочие
+запросы, запись и чтение внутри транзакции идут в основную БД.
+
+Реплика может отставать, поэтому пользователь, который только что
+что-то изменил, на DATABASE_REPLICAS['PIN_SECONDS'] секунд читает
+из основной БД и сразу видит свой пост или комментарий. Отметка
+хранится в кеше по умолчанию, и чтобы она действовала во всех
+процессах, кеш должен быть общим (Memcached, Redis, DatabaseCache).
+С LocMemCache отметку видит только процесс, принявший запись,
+с DummyCache ее не видит никто; об этом предупреждает
+проверка check_pin_cache (`manage.py check`, запуск runserver).
+
+Состояние хранится в переменной контекста, поэтому оно свое у
+каждого запроса и передается в потоки асинхронных представлений
+(api/asynchronous.py копирует контекст).
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULTS = {
+    'ALIASES': [],
+    'PIN_SECONDS': 15,
+}
+
+CACHE_PREFIX = 'replicas:pinned'
+
+_routing = contextvars.ContextVar('replica_routing', default=None)
+
+
+def get_setting(name):
+    return getattr(settings, 'DATABASE_REPLICAS', {}).get(
+        name, DEFAULTS[name]
+    )
+
+
+class Routing:
+    """Куда направлять чтение в текущем запросе."""
+    __slots__ = ('alias',)
+
+    def __init__(self):
+        self.alias = None
+
+
+@contextmanager
+def routing():
+    """Область одного запроса: внутри нее можно включить чтение с реплики."""
+    token = _routing.set(Routing())
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+def read_from_replica():
+    """Направляет чтение до конца routing() на одну из реплик."""
+    state = _routing.get()
+    aliases = get_setting('ALIASES')
+    if state is not None and aliases:
+        # Одна реплика на весь запрос: данные из одного снимка
+        state.alias = random.choice(aliases)
+
+
+def _pin_key(user_id):
+    return f'{CACHE_PREFIX}:{user_id}'
+
+
+def pin_to_primary(user_id):
+    if get_setting('ALIASES'):
+        cache.set(_pin_key(user_id), True, get_setting('PIN_SECONDS'))
+
+
+def is_pinned(user_id):
+    return cache.get(_pin_key(user_id), False)
+
+
+@checks.register(checks.Tags.caches)
+def check_pin_cache(app_configs, **kwargs):
+    """Отметки о чтении из основной БД требуют общего кеша."""
+    if not get_setting('ALIASES'):
+        return []
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(backend, DummyCache):
+        return [checks.Warning(
+            'DummyCache не хранит отметки pin_to_primary: пользователь '
+            'может не увидеть свои изменения на репликах.',
+            hint='Подключите общий кеш: Memcached, Redis или DatabaseCache.',
+            id='posts.W002',
+        )]
+    if isinstance(backend, LocMemCache):
+        return [checks.Warning(
+            'LocMemCache хранит отметки pin_to_primary только в своем '
+            'процессе: запрос, попавший в другой процесс, прочитает '
+            'отстающую реплику.',
+            hint='Подключите общий кеш: Memcached, Redis или DatabaseCache.',
+            id='posts.W001',
+        )]
+    return []
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or state.alias is None:
+            return None
+        # Транзакция должна видеть собственные изменения
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными основной БД
+        return db not in get_setting('ALIASES')
@@ -0,0 +1,55 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import images, social_graph, timeline
+from .counters import forget_author_comments
+from .models import Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        social_graph.follow_changed(
+            instance.user_id, instance.following_id, 1
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    social_graph.follow_changed(instance.user_id, instance.following_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.schedule_backfill(instance.user_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def purge_timeline(sender, instance, **kwargs):
+    timeline.purge(instance.user_id, instance.following_id)
+
+
+@receiver(pre_delete, sender=Group)
+def touch_group_posts(sender, instance, **kwargs):
+    # Посты отвязываются от группы UPDATE-запросом, который не обновляет
+    # auto_now-поле, поэтому отмечаем их измененными сами
+    instance.post_set.update(updated=timezone.now())
+
+
+@receiver(pre_delete, sender=User)
+def forget_deleted_user_comments(sender, instance, **kwargs):
+    # Комментарии удаляются каскадом в обход CommentViewSet.destroy
+    forget_author_comments(instance)
+
+
+@receiver(pre_save, sender=Post)
+def process_post_image(sender, instance, **kwargs):
+    image = instance.image
+    if not image:
+        instance.image_variants = {}
+    elif not image._committed:
+        # Только что загруженный файл еще не записан в хранилище
+        images.process_post_image(instance)
@@ -0,0 +1,405 @@
+"""
+Социальный граф: счетчики подписок и проверка «A подписан на B».
+
+Счетчики хранятся в FollowCounts и меняются F()-обновлениями
+в транзакции создания или удаления подписки (см. posts/signals.py),
+поэтому число подписчиков читается одной строкой по первичному ключу,
+а не подсчетом строк Follow.
+
+Ответы кешируются в два уровня: LRU-кеш процесса и общий кеш Django.
+При изменении подписки после коммита сбрасываются оба уровня
+в текущем процессе и общий кеш; LRU-кеши других процессов
+устаревают не дольше LOCAL_CACHE_TTL секунд.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save
+
+from . import timeline
+from .models import Follow, FollowCounts, User
+
+DEFAULTS = {
+    # Размер и время жизни LRU-кеша процесса
+    'LOCAL_CACHE_SIZE': 10_000,
+    'LOCAL_CACHE_TTL': 5,
+    # Время жизни записей в общем кеше
+    'CACHE_TIMEOUT': 300,
+}
+
+CACHE_PREFIX = 'social'
+
+_MISSING = object()
+
+
+def get_setting(name):
+    return getattr(settings, 'SOCIAL_GRAPH', {}).get(name, DEFAULTS[name])
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кеш с ограниченным временем жизни записей."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LRUCache(
+    get_setting('LOCAL_CACHE_SIZE'), get_setting('LOCAL_CACHE_TTL')
+)
+
+
+def _follow_key(user_id, author_id):
+    return f'{CACHE_PREFIX}:follow:{user_id}:{author_id}'
+
+
+def _counts_key(user_id):
+    return f'{CACHE_PREFIX}:counts:{user_id}'
+
+
+def _cached(key, load):
+    value = local_cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = load()
+            cache.set(key, value, get_setting('CACHE_TIMEOUT'))
+        local_cache.set(key, value)
+    return value
+
+
+def is_following(user_id, author_id):
+    """Подписан ли пользователь user_id на автора author_id."""
+    return _cached(
+        _follow_key(user_id, author_id),
+        lambda: Follow.objects.filter(
+            user_id=user_id, following_id=author_id
+        ).exists()
+    )
+
+
+def get_counts(user_id):
+    """Возвращает пару (число подписчиков, число подписок)."""
+    def load():
+        row = FollowCounts.objects.filter(user_id=user_id).values_list(
+            'followers', 'following'
+        ).first()
+        return row or (0, 0)
+
+    return _cached(_counts_key(user_id), load)
+
+
+def get_followers_count(user_id):
+    return get_counts(user_id)[0]
+
+
+def get_following_count(user_id):
+    return get_counts(user_id)[1]
+
+
+def _create_counts(user_ids):
+    """Создает строки счетчиков по настоящему числу подписок."""
+    counts = {
+        user_id: FollowCounts(user_id=user_id) for user_id in user_ids
+    }
+    for user_id, total in Follow.objects.filter(
+        following_id__in=user_ids
+    ).values('following').annotate(total=Count('id')).values_list(
+        'following', 'total'
+    ):
+        counts[user_id].followers = total
+    for user_id, total in Follow.objects.filter(
+        user_id__in=user_ids
+    ).values('user').annotate(total=Count('id')).values_list(
+        'user', 'total'
+    ):
+        counts[user_id].following = total
+    FollowCounts.objects.bulk_create(counts.values(), ignore_conflicts=True)
+
+
+def _change_counts(user_ids, field, delta):
+    user_ids = set(user_ids)
+    updated = FollowCounts.objects.filter(user_id__in=user_ids).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+    # Части строк еще нет (пользователи раньше не участвовали в подписках).
+    # При удалении подписок их не создаем: пользователь может удаляться
+    # вместе со своими подписками
+    if updated < len(user_ids) and delta > 0:
+        existing = FollowCounts.objects.filter(
+            user_id__in=user_ids
+        ).values_list('user_id', flat=True)
+        _create_counts(user_ids - set(existing))
+
+
+def invalidate(user_id, *author_ids):
+    keys = [_counts_key(user_id)]
+    for author_id in author_ids:
+        keys += [_follow_key(user_id, author_id), _counts_key(author_id)]
+
+    def clear():
+        for key in keys:
+            local_cache.delete(key)
+        cache.delete_many(keys)
+
+    transaction.on_commit(clear)
+
+
+def follows_changed(user_id, author_ids, delta):
+    """
+    Обновляет счетчики и сбрасывает кеш после создания (delta=1)
+    или удаления (delta=-1) подписок пользователя на авторов.
+    """
+    _change_counts(author_ids, 'followers', delta)
+    _change_counts([user_id], 'following', delta * len(author_ids))
+    invalidate(user_id, *author_ids)
+
+
+def follow_changed(user_id, author_id, delta):
+    follows_changed(user_id, [author_id], delta)
+
+
+def follow(user_id, username):
+    """
+    Подписывает пользователя на автора с именем `username` одним запросом
+    INSERT ... SELECT, который пропускает конфликт уникальности пары
+    (user, following) вместо ошибки, поэтому параллельные повторные
+    подписки не приводят к IntegrityError.
+    Возвращает id автора или None, если автора нет, это сам пользователь
+    или подписка уже есть.
+    """
+    using = router.db_for_write(Follow)
+    connection = connections[using]
+    ops = connection.ops
+    quote = ops.quote_name
+    user_column = quote(Follow._meta.get_field('user').column)
+    following_column = quote(Follow._meta.get_field('following').column)
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} '
+        f'{quote(Follow._meta.db_table)} ({user_column}, {following_column}) '
+        f'SELECT %s, {quote("id")} FROM {quote(User._meta.db_table)} '
+        f'WHERE {quote("username")} = %s AND {quote("id")} <> %s '
+        f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    returning = connection.features.can_return_columns_from_insert
+    if returning:
+        sql += f' RETURNING {quote("id")}, {following_column}'
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, username, user_id])
+        if cursor.rowcount != 1:
+            return None
+        if returning:
+            follow_id, following_id = cursor.fetchone()
+        else:
+            follow_id = cursor.lastrowid
+            following_id = Follow.objects.using(using).filter(
+                pk=follow_id
+            ).values_list('following_id', flat=True).get()
+        # Вставка прошла мимо ORM: отправляем post_save сами,
+        # чтобы сработали счетчики и рассылка ленты (posts/signals.py)
+        post_save.send(
+            sender=Follow,
+            instance=Follow(
+                id=follow_id, user_id=user_id, following_id=following_id
+            ),
+            created=True, update_fields=None, raw=False, using=using
+        )
+    return following_id
+
+
+def _resolve(usernames):
+    return dict(
+        User.objects.filter(username__in=usernames).values_list(
+            'username', 'id'
+        )
+    )
+
+
+def _follow_columns(connection):
+    quote = connection.ops.quote_name
+    return (
+        quote(Follow._meta.db_table),
+        quote(Follow._meta.get_field('user').column),
+        quote(Follow._meta.get_field('following').column),
+    )
+
+
+def _lock_existing(using, user_id, author_ids):
+    """
+    Для СУБД без RETURNING (SQLite): берет блокировку на запись и читает
+    существующие подписки. Транзакция начинается с записи, как
+    в timeline.fan_out_posts(): начатая чтением, в SQLite она не может
+    дождаться блокировки на запись ("database is locked"). С блокировкой
+    параллельные подписки не меняют таблицу до конца транзакции,
+    поэтому выборка точна.
+    """
+    FollowCounts.objects.using(using).filter(user_id=user_id).update(
+        following=F('following')
+    )
+    return set(Follow.objects.using(using).filter(
+        user_id=user_id, following_id__in=author_ids
+    ).values_list('following_id', flat=True))
+
+
+def _insert_follows(using, user_id, author_ids):
+    """
+    Вставляет подписки одним запросом, пропуская конфликт уникальности
+    пары (user, following), и возвращает id авторов, подписки на которых
+    вставил именно этот запрос. Выполняется в транзакции.
+    """
+    connection = connections[using]
+    if not connection.features.can_return_columns_from_insert:
+        existing = _lock_existing(using, user_id, author_ids)
+        Follow.objects.using(using).bulk_create(
+            (Follow(user_id=user_id, following_id=author_id)
+             for author_id in author_ids),
+            ignore_conflicts=True
+        )
+        return set(author_ids) - existing
+    ops = connection.ops
+    table, user_column, following_column = _follow_columns(connection)
+    values = ', '.join(['(%s, %s)'] * len(author_ids))
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} '
+        f'{table} ({user_column}, {following_column}) VALUES {values} '
+        f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)} '
+        f'RETURNING {following_column}'
+    )
+    params = []
+    for author_id in author_ids:
+        params += [user_id, author_id]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _delete_follows(using, user_id, author_ids):
+    """
+    Удаляет подписки одним запросом DELETE без сигналов и возвращает
+    id авторов, подписки на которых удалил именно этот запрос.
+    Выполняется в транзакции.
+    """
+    connection = connections[using]
+    table, user_column, following_column = _follow_columns(connection)
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    sql = (
+        f'DELETE FROM {table} WHERE {user_column} = %s '
+        f'AND {following_column} IN ({placeholders})'
+    )
+    params = [user_id, *author_ids]
+    returning = connection.features.can_return_columns_from_insert
+    with connection.cursor() as cursor:
+        if returning:
+            cursor.execute(f'{sql} RETURNING {following_column}', params)
+            return {row[0] for row in cursor.fetchall()}
+        existing = _lock_existing(using, user_id, author_ids)
+        cursor.execute(sql, params)
+        return existing
+
+
+def bulk_follow(user_id, usernames):
+    """
+    Подписывает пользователя на авторов из списка имен:
+    одна выборка авторов и одна массовая вставка. Возвращает статус
+    по каждому имени: followed, already_following, self или not_found.
+    Массовая вставка идет без сигналов, поэтому счетчики и ленту
+    обновляем сами, одним запросом на всех авторов, и только для
+    подписок, которые вставил этот вызов: подписку, которую успел
+    создать параллельный запрос, уже посчитал он.
+    """
+    usernames = list(dict.fromkeys(usernames))
+    authors = _resolve(usernames)
+    candidates = [
+        author_id for author_id in authors.values() if author_id != user_id
+    ]
+    created = []
+    if candidates:
+        using = router.db_for_write(Follow)
+        with transaction.atomic(using=using):
+            inserted = _insert_follows(using, user_id, candidates)
+            created = [
+                author_id for author_id in candidates if author_id in inserted
+            ]
+            if created:
+                follows_changed(user_id, created, 1)
+                timeline.schedule_backfill(user_id, *created)
+    results = {}
+    for username in usernames:
+        author_id = authors.get(username)
+        if author_id is None:
+            results[username] = 'not_found'
+        elif author_id == user_id:
+            results[username] = 'self'
+        elif author_id in created:
+            results[username] = 'followed'
+        else:
+            results[username] = 'already_following'
+    return results
+
+
+def bulk_unfollow(user_id, usernames):
+    """
+    Отписывает пользователя от авторов из списка имен одним запросом
+    DELETE. Возвращает статус по каждому имени: unfollowed,
+    not_following или not_found. Счетчики и ленту обновляем только
+    для подписок, которые удалил этот вызов.
+    """
+    usernames = list(dict.fromkeys(usernames))
+    authors = _resolve(usernames)
+    deleted = []
+    if authors:
+        using = router.db_for_write(Follow)
+        with transaction.atomic(using=using):
+            removed = _delete_follows(using, user_id, list(authors.values()))
+            deleted = [
+                author_id for author_id in authors.values()
+                if author_id in removed
+            ]
+            if deleted:
+                follows_changed(user_id, deleted, -1)
+                timeline.purge(user_id, *deleted)
+    results = {}
+    for username in usernames:
+        author_id = authors.get(username)
+        if author_id is None:
+            results[username] = 'not_found'
+        elif author_id in deleted:
+            results[username] = 'unfollowed'
+        else:
+            results[username] = 'not_following'
+    return results
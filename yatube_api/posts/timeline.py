@@ -0,0 +1,156 @@
+"""
+Материализация ленты подписок (fan-out on write).
+
+При публикации пост раскладывается в TimelineEntry всех подписчиков автора.
+Рассылка выполняется в фоновом потоке после коммита транзакции,
+поэтому время создания поста не зависит от числа подписчиков.
+Посты авторов, у которых подписчиков больше порога, не рассылаются:
+лента забирает их запросом при чтении (гибридная схема).
+Пока пост не разослан, у него fanned_out=False и он тоже читается запросом,
+поэтому новый пост виден в ленте сразу.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+
+from . import social_graph
+from .models import Follow, Post, TimelineEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Включает рассылку постов в ленты подписчиков
+    'ENABLED': False,
+    # Авторам с таким числом подписчиков и больше ленты не рассылаются
+    'CELEBRITY_THRESHOLD': 10_000,
+    # False - рассылать сразу в текущем потоке (удобно в тестах)
+    'ASYNC': True,
+    'WORKERS': 2,
+    'BATCH_SIZE': 1000,
+}
+
+_executor = None
+
+
+def get_setting(name):
+    return getattr(settings, 'FEED_FANOUT', {}).get(name, DEFAULTS[name])
+
+
+def is_enabled():
+    return get_setting('ENABLED')
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_setting('WORKERS'),
+            thread_name_prefix='timeline'
+        )
+    return _executor
+
+
+def _run(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Ошибка при обновлении лент подписчиков')
+    finally:
+        # У фонового потока свое соединение с БД, не оставляем его открытым
+        connection.close()
+
+
+def _schedule(func, *args):
+    """Запускает задачу после коммита текущей транзакции."""
+    if get_setting('ASYNC'):
+        transaction.on_commit(
+            lambda: _get_executor().submit(_run, func, *args)
+        )
+    else:
+        transaction.on_commit(lambda: func(*args))
+
+
+def _insert_entries(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=get_setting('BATCH_SIZE'), ignore_conflicts=True
+    )
+
+
+def fan_out_posts(post_ids):
+    """Раскладывает посты в ленты подписчиков их авторов."""
+    posts = list(Post.objects.filter(
+        id__in=post_ids, fanned_out=False
+    ).values_list('id', 'author_id', 'pub_date'))
+    threshold = get_setting('CELEBRITY_THRESHOLD')
+    batch_size = get_setting('BATCH_SIZE')
+    for post_id, author_id, pub_date in posts:
+        if social_graph.get_followers_count(author_id) >= threshold:
+            continue
+        followers = Follow.objects.filter(following_id=author_id)
+        with transaction.atomic():
+            # Начинаем транзакцию с записи: в SQLite транзакция, начатая
+            # чтением, не может дождаться блокировки на запись
+            Post.objects.filter(id=post_id).update(fanned_out=True)
+            batch = []
+            for user_id in followers.values_list(
+                'user_id', flat=True
+            ).iterator(chunk_size=batch_size):
+                batch.append(TimelineEntry(
+                    user_id=user_id, post_id=post_id, pub_date=pub_date
+                ))
+                if len(batch) >= batch_size:
+                    _insert_entries(batch)
+                    batch = []
+            _insert_entries(batch)
+
+
+def backfill(user_id, *author_ids):
+    """Добавляет в ленту нового подписчика уже разосланные посты авторов."""
+    posts = Post.objects.filter(
+        author_id__in=author_ids, fanned_out=True
+    ).values_list('id', 'pub_date')
+    _insert_entries([
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts.iterator()
+    ])
+
+
+def purge(user_id, *author_ids):
+    """
+    Убирает посты авторов из ленты бывшего подписчика.
+    Выполняется сразу и при выключенной рассылке, чтобы после ее включения
+    в ленте не оказалось постов авторов, от которых отписались.
+    """
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id__in=author_ids
+    ).delete()
+
+
+def schedule_fan_out(*posts):
+    if is_enabled():
+        _schedule(fan_out_posts, [post.id for post in posts])
+
+
+def schedule_backfill(user_id, *author_ids):
+    if is_enabled() and author_ids:
+        _schedule(backfill, user_id, *author_ids)
+
+
+def pull_condition(user):
+    """Еще не разосланные посты авторов, на которых подписан пользователь."""
+    following = Follow.objects.filter(user=user).values('following')
+    return Q(fanned_out=False, author__in=following)
+
+
+def feed_condition(user):
+    """
+    Условие выборки ленты: разосланные пользователю посты
+    плюс посты, которые читаются запросом.
+    Проверка записи ленты коррелированная, поэтому при обходе индекса
+    по дате СУБД проверяет только просмотренные посты.
+    """
+    entries = TimelineEntry.objects.filter(user=user, post=OuterRef('pk'))
+    return Q(Exists(entries)) | pull_condition(user)
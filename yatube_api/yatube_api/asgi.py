@@ -9,8 +9,60 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube_api.settings')
 
-application = get_asgi_application()
+# То же, что get_asgi_application()
+django.setup(set_prefix=False)
+
+from api.asynchronous import AsyncStreamingHttpResponse  # noqa: E402
+
+
+class AsyncViewsHandler(ASGIHandler):
+    """
+    ASGI-обработчик, который разрешает URL по yatube_api/asgi_urls.py:
+    чтение API обслуживают асинхронные представления, а не синхронные
+    через общий поток. Части AsyncStreamingHttpResponse перебираются
+    асинхронно, не блокируя цикл событий.
+    """
+    urlconf = 'yatube_api.asgi_urls'
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+    async def send_response(self, response, send):
+        if not isinstance(response, AsyncStreamingHttpResponse):
+            await super().send_response(response, send)
+            return
+        # Как в ASGIHandler.send_response(), но с async for
+        headers = [
+            (header.encode('ascii') if isinstance(header, str) else header,
+             value.encode('latin1') if isinstance(value, str) else value)
+            for header, value in response.items()
+        ]
+        for cookie in response.cookies.values():
+            value = cookie.output(header='').encode('ascii').strip()
+            headers.append((b'Set-Cookie', value))
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        async for part in response.async_streaming_content:
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+application = AsyncViewsHandler()
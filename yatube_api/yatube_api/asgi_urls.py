@@ -0,0 +1,12 @@
+"""
+URL-схема для ASGI: та же, что yatube_api/urls.py, но часть
+представлений API заменена асинхронными (api.urls.async_urlpatterns).
+"""
+from django.urls import include, path
+
+from api.urls import async_urlpatterns
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/v1/', include(async_urlpatterns)),
+] + sync_urlpatterns
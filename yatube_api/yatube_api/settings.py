@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from datetime import timedelta
@@ -64,6 +65,59 @@ DATABASES = {
     }
 }
 
+# Профиль работы с БД, задается переменной окружения DB_PROFILE:
+# development - новое соединение на каждый запрос;
+# production - постоянные соединения с проверкой перед запросом
+# и SQLite в режиме WAL, см. posts/database.py
+DB_PROFILE = os.environ.get('DB_PROFILE', 'development')
+
+DATABASE_TUNING = {
+    'HEALTH_CHECKS': False,
+    'SQLITE_PRAGMAS': {},
+}
+
+if DB_PROFILE == 'production':
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASE_TUNING = {
+        'HEALTH_CHECKS': True,
+        'SQLITE_PRAGMAS': {
+            'journal_mode': 'wal',
+            'synchronous': 'normal',
+            'mmap_size': 256 * 1024 * 1024,
+            # Миллисекунды ожидания блокировки записи
+            'busy_timeout': 20_000,
+        },
+    }
+
+# Реплики для чтения: пути к файлам SQLite через запятую в переменной
+# окружения DB_REPLICAS, каждая подключается как replica1, replica2...
+# См. posts/replicas.py
+DATABASE_REPLICAS = {
+    'ALIASES': [],
+    # Сколько секунд после изменения данных пользователь читает
+    # из основной БД, чтобы видеть свои изменения
+    'PIN_SECONDS': 15,
+}
+for number, name in enumerate(
+    filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': name,
+        # В тестах реплика - та же тестовая база
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS['ALIASES'].append(alias)
+
+DATABASE_ROUTERS = ['posts.replicas.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,12 +154,35 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
 
+    # JWT с кешем проверенных токенов и пользователей,
+    # см. api/authentication.py
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ),
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
+    # JSON кодируется и разбирается через orjson, если он установлен
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Лимиты на действия '<throttle_scope>.<action>' по скользящему окну,
+    # см. api/throttling.py; действия без лимита не ограничиваются
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.SlidingWindowThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'jwt.create': '20/min',
+        'posts.create': '30/min',
+        'posts.bulk': '10/min',
+        'comments.create': '60/min',
+        'comments.bulk': '10/min',
+        'follow.create': '60/min',
+        'follow.bulk': '10/min',
+    },
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -117,6 +194,25 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Рассылка постов в ленты подписчиков, см. posts/timeline.py
+FEED_FANOUT = {
+    'ENABLED': False,
+    'CELEBRITY_THRESHOLD': 10_000,
+}
+
+# Обработка картинок постов, см. posts/images.py
+POST_IMAGES = {
+    'MAX_WIDTH': 8000,
+    'MAX_HEIGHT': 8000,
+    'SIZES': {'small': 320, 'medium': 800, 'large': 1600},
+}
+
+# Пул потоков для запросов к БД из асинхронных представлений под ASGI,
+# см. api/asynchronous.py
+ASYNC_VIEWS = {
+    'MAX_WORKERS': 8,
+}
+
 DJOSER = {
     'LOGIN_FIELD': 'username',  # или 'email', в зависимости от вашей модели пользователя
 }